@@ -0,0 +1,169 @@
+import numpy as np
+
+
+# 平均随机一致性指标RI（n≤15取常用表值）
+RANDOM_INDEX = {
+    1: 0.0,
+    2: 0.0,
+    3: 0.58,
+    4: 0.90,
+    5: 1.12,
+    6: 1.24,
+    7: 1.32,
+    8: 1.41,
+    9: 1.45,
+    10: 1.49,
+    11: 1.51,
+    12: 1.48,
+    13: 1.56,
+    14: 1.57,
+    15: 1.59,
+}
+
+
+def random_index(n):
+    """
+    n阶判断矩阵的RI值；n>15时按Alonso-Lamata回归 λmax≈2.7699n-4.3513 推算
+    """
+    if n in RANDOM_INDEX:
+        return RANDOM_INDEX[n]
+    return (1.7699 * n - 4.3513) / (n - 1)
+
+
+class AHPEngine:
+    """
+    批量AHP赋权
+    一次处理 k×n×n 的专家判断矩阵栈：几何平均法和特征向量法权重、
+    一致性比率CR均按批向量化计算；多位专家的判断矩阵按元素几何平均聚合，
+    聚合后的权重可直接作为主观权重传入 combine_weights
+    """
+
+    METHODS = ("geometric", "eigenvector")
+
+    def __init__(self, method="eigenvector", cr_threshold=0.1):
+        if method not in self.METHODS:
+            raise ValueError(f"不支持的AHP权重计算方法: {method}")
+        self.method = method
+        self.cr_threshold = cr_threshold
+
+    def _check(self, matrices):
+        """
+        统一为 k×n×n 的数组，并检查正值和互反性
+        """
+        matrices = np.asarray(matrices, dtype=np.float64)
+        if matrices.ndim == 2:
+            matrices = matrices[None]
+        if matrices.ndim != 3 or matrices.shape[1] != matrices.shape[2]:
+            raise ValueError("判断矩阵必须是 n×n 或 k×n×n 的方阵")
+        if np.any(~np.isfinite(matrices)) or np.any(matrices <= 0):
+            raise ValueError("判断矩阵的元素必须为正数")
+        if not np.allclose(matrices * matrices.transpose(0, 2, 1), 1.0, rtol=1e-6):
+            raise ValueError("判断矩阵必须满足互反性 a_ij × a_ji = 1")
+        return matrices
+
+    def geometric_weights(self, matrices):
+        """
+        几何平均法权重（k×n）
+        """
+        matrices = self._check(matrices)
+        means = np.exp(np.log(matrices).mean(axis=2))
+        return means / means.sum(axis=1, keepdims=True)
+
+    def eigenvector_weights(self, matrices):
+        """
+        特征向量法权重：返回 (权重 k×n, 最大特征值 k)
+        """
+        matrices = self._check(matrices)
+        eigenvalues, eigenvectors = np.linalg.eig(matrices)
+        # 正互反矩阵的最大特征值为实数，对应的特征向量各分量同号
+        principal = eigenvalues.real.argmax(axis=1)
+        rows = np.arange(len(matrices))
+        lambda_max = eigenvalues.real[rows, principal]
+        vectors = np.abs(eigenvectors.real[rows, :, principal])
+        return vectors / vectors.sum(axis=1, keepdims=True), lambda_max
+
+    def consistency(self, matrices, weights, lambda_max=None):
+        """
+        一致性检验：返回 (CI, CR)，均为长度k的数组
+        未给出最大特征值时按 λmax = mean((A·w) / w) 估计
+        """
+        matrices = self._check(matrices)
+        n = matrices.shape[1]
+        weights = np.atleast_2d(weights)
+        if lambda_max is None:
+            lambda_max = (np.einsum("kij,kj->ki", matrices, weights) / weights).mean(
+                axis=1
+            )
+        ci = (lambda_max - n) / (n - 1) if n > 1 else np.zeros(len(matrices))
+        ri = random_index(n)
+        cr = ci / ri if ri > 0 else np.zeros(len(matrices))
+        return ci, cr
+
+    def evaluate(self, matrices, method=None):
+        """
+        批量计算各专家判断矩阵的权重和一致性
+        返回字典：weights (k×n)、lambda_max、ci、cr、consistent（CR不超过阈值）
+        """
+        method = method or self.method
+        matrices = self._check(matrices)
+        if method == "geometric":
+            weights = self.geometric_weights(matrices)
+            lambda_max = None
+        elif method == "eigenvector":
+            weights, lambda_max = self.eigenvector_weights(matrices)
+        else:
+            raise ValueError(f"不支持的AHP权重计算方法: {method}")
+
+        ci, cr = self.consistency(matrices, weights, lambda_max)
+        if lambda_max is None:
+            lambda_max = ci * (matrices.shape[1] - 1) + matrices.shape[1]
+        return {
+            "weights": weights,
+            "lambda_max": lambda_max,
+            "ci": ci,
+            "cr": cr,
+            "consistent": cr <= self.cr_threshold,
+        }
+
+    def aggregate(
+        self, matrices, expert_weights=None, consistent_only=False, method=None
+    ):
+        """
+        聚合多位专家的判断：各元素取（加权）几何平均得到群体判断矩阵，再计算权重
+        consistent_only为True时先剔除CR超过阈值的专家
+        返回字典：matrix、weights、cr、experts（参与聚合的专家序号）
+        """
+        matrices = self._check(matrices)
+        experts = np.arange(len(matrices))
+        if consistent_only:
+            experts = np.flatnonzero(self.evaluate(matrices, method)["consistent"])
+            if len(experts) == 0:
+                raise ValueError("没有通过一致性检验的专家判断矩阵")
+
+        if expert_weights is None:
+            expert_weights = np.ones(len(matrices))
+        expert_weights = np.asarray(expert_weights, dtype=np.float64)[experts]
+        expert_weights = expert_weights / expert_weights.sum()
+
+        # 加权几何平均保持互反性
+        group_matrix = np.exp(
+            np.einsum("k,kij->ij", expert_weights, np.log(matrices[experts]))
+        )
+        result = self.evaluate(group_matrix, method)
+        return {
+            "matrix": group_matrix,
+            "weights": result["weights"][0],
+            "cr": float(result["cr"][0]),
+            "experts": experts,
+        }
+
+    def aggregate_by_group(self, matrices, groups, **kwargs):
+        """
+        按分组（如行业）分别聚合专家判断，返回 {分组: 聚合结果}
+        """
+        matrices = self._check(matrices)
+        groups = np.asarray(groups).astype(str)
+        return {
+            str(name): self.aggregate(matrices[groups == name], **kwargs)
+            for name in np.unique(groups)
+        }
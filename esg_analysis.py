@@ -0,0 +1,438 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from esg_model import ESGModel
+from esg_ranking import top_k
+
+
+# 交叉项：(维度p, 维度q, 系数名)
+CROSS_TERMS = [(0, 1, "delta"), (0, 2, "epsilon"), (1, 2, "zeta")]
+
+
+class ScoreAttribution:
+    """
+    指标级得分归因
+    因子得分是指标的加权和（经线性标准化），Base Score是E/S/G的二次多项式，
+    因此各指标对每家公司得分的贡献可以一次向量化精确分解：
+    线性项按维度权重分配；交叉项E×S按Shapley方式在两个维度间各分一半，
+    再按指标在维度得分中的贡献分配；饱和加分按各部分占Base Score的比例分配；
+    事件惩罚和0-100截断的影响单独列为调整项
+    """
+
+    # 不属于任何指标的部分
+    BASELINE = "标准化基准"
+    RESIDUAL = "事件与截断调整"
+
+    def __init__(self, model=None):
+        self.model = model
+
+    def _model_for(self, model_results):
+        # 未指定模型时按评分结果中的甲模型参数重建，保证与评分时的参数一致
+        if self.model is not None:
+            return self.model
+        return ESGModel(custom_params=model_results.get("jia_model_params") or None)
+
+    def pillar_components(self, model, processed_data, weights):
+        """
+        分解E/S/G因子得分：返回 (指标贡献矩阵, 各维度截距, 各指标所属维度, 各维度缩放系数)
+        维度得分 = 截距 + 该维度各指标贡献之和；不属于任何维度的指标所属维度为-1
+        """
+        if not isinstance(processed_data, pd.DataFrame):
+            raise ValueError("稀疏宽指标模式的评分结果不支持指标级分解")
+        values = processed_data.to_numpy(dtype=np.float64)
+        n, m = values.shape
+        raw = values * np.asarray(weights, dtype=np.float64)[:m]
+        membership = model.indicator_pillars(processed_data.columns)
+
+        contributions = np.zeros((n, m))
+        intercepts = np.zeros((3, n))
+        scales = np.zeros(3)
+        for p in range(3):
+            mask = membership == p
+            pillar_raw = raw[:, mask].sum(axis=1)
+            # 与calculate_factor_scores相同的标准化：单行×100，多行min-max到0-100
+            if n == 1:
+                scale, offset = 100.0, 0.0
+            elif mask.any() and pillar_raw.max() != pillar_raw.min():
+                scale = 100.0 / (pillar_raw.max() - pillar_raw.min())
+                offset = -pillar_raw.min() * scale
+            else:
+                scale, offset = 0.0, 50.0
+            contributions[:, mask] = raw[:, mask] * scale
+            intercepts[p] = offset
+            scales[p] = scale
+        return contributions, intercepts, membership, scales
+
+    def attribute(self, model_results, industry="默认"):
+        """
+        计算 (公司 × 指标) 的贡献矩阵
+        返回字典：
+        - contributions: 各指标对最终得分的总贡献，另含标准化基准和事件与截断调整两列，
+          每行之和等于最终得分
+        - linear / cross / nonlinear: 总贡献中的线性项、交叉项和饱和加分部分
+        - pillar_scores: 由分解重建的E/S/G得分
+        """
+        model = self._model_for(model_results)
+        processed_data = model_results["processed_data"]
+        contributions, intercepts, membership, _ = self.pillar_components(
+            model, processed_data, model_results["weights"]
+        )
+        columns = list(processed_data.columns)
+        pillars = intercepts + np.stack(
+            [contributions[:, membership == p].sum(axis=1) for p in range(3)]
+        )
+
+        # 线性项
+        coefficients = np.append(model.get_pillar_weights(industry), 0.0)
+        linear = contributions * coefficients[membership]
+        baseline = coefficients[:3] @ intercepts
+
+        # 交叉项：c·P·Q/100 中P、Q各分一半，维度内按指标贡献分配
+        cross_coeffs = model.params["cross_term_coeffs"]
+        cross = np.zeros_like(contributions)
+        for p, q, name in CROSS_TERMS:
+            c = cross_coeffs[name] / 100
+            mask_p, mask_q = membership == p, membership == q
+            cross[:, mask_p] += c * contributions[:, mask_p] * pillars[q][:, None] / 2
+            cross[:, mask_q] += c * contributions[:, mask_q] * pillars[p][:, None] / 2
+            baseline = (
+                baseline
+                + c * (intercepts[p] * pillars[q] + intercepts[q] * pillars[p]) / 2
+            )
+
+        base_parts = linear + cross
+        base_score = base_parts.sum(axis=1) + baseline
+
+        # 饱和加分：按各部分占Base Score的比例分配
+        nl_params = model.params["nonlinear_params"]
+        threshold = 80 * nl_params["threshold_multiplier"]
+        high = base_score > 80
+        bonus = np.zeros(len(base_score))
+        bonus[high] = nl_params["max_bonus"] / (
+            1 + np.exp(-nl_params["bonus_steepness"] * (base_score[high] - threshold))
+        )
+        share = np.divide(bonus, base_score, out=np.zeros_like(bonus), where=high)
+        nonlinear = base_parts * share[:, None]
+        baseline = baseline * (1 + share)
+
+        # 事件惩罚、政策调整和截断：最终得分与已分解部分之差
+        final_score = np.asarray(model_results["final_score"], dtype=np.float64)
+        residual = final_score - base_score - bonus
+
+        total = base_parts + nonlinear
+        frame = pd.DataFrame(total, columns=columns)
+        frame[self.BASELINE] = baseline
+        frame[self.RESIDUAL] = residual
+        return {
+            "contributions": frame,
+            "linear": pd.DataFrame(linear, columns=columns),
+            "cross": pd.DataFrame(cross, columns=columns),
+            "nonlinear": pd.DataFrame(nonlinear, columns=columns),
+            "pillar_scores": pd.DataFrame(
+                pillars.T, columns=["E得分", "S得分", "G得分"]
+            ),
+        }
+
+    def top_drivers(self, attribution, row, n=10):
+        """
+        某家公司贡献绝对值最大的n个指标
+        """
+        contributions = attribution["contributions"]
+        indicators = contributions.columns[:-2]
+        values = contributions.iloc[row, :-2].to_numpy(dtype=np.float64)
+        selected = top_k(np.abs(values), n)
+        return pd.DataFrame(
+            {
+                "指标": indicators[selected],
+                "总贡献": values[selected],
+                "线性项": attribution["linear"].iloc[row].to_numpy()[selected],
+                "交叉项": attribution["cross"].iloc[row].to_numpy()[selected],
+                "饱和加分": attribution["nonlinear"].iloc[row].to_numpy()[selected],
+            }
+        )
+
+
+class ImprovementPlanner:
+    """
+    改进路径规划
+    在当前模型参数和样本标准化区间不变的前提下，为每家公司找出达到目标评级所需改进的最少指标：
+    某一指标改进时只有一个维度得分变化，Base Score随改进幅度线性变化，
+    因此每一步可对全部公司同时计算各指标改进到样本最佳水平可带来的Base提升（梯度×提升空间），
+    按提升最大的指标贪心选择，最后一个指标只改进到恰好达标为止
+    """
+
+    PILLARS = np.array(["环境(E)", "社会(S)", "治理(G)"])
+
+    def __init__(self, model=None):
+        self.attribution = ScoreAttribution(model)
+
+    def required_base(self, model, events, targets, upper=200.0, iterations=60):
+        """
+        达到各目标总分所需的最低Base Score（对非线性调整做二分查找），无法达到时为inf
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        low = np.full(len(targets), -upper)
+        high = np.full(len(targets), upper)
+        for _ in range(iterations):
+            middle = (low + high) / 2
+            reached = (
+                model.apply_nonlinear_adjustments(middle.copy(), events) >= targets
+            )
+            high = np.where(reached, middle, high)
+            low = np.where(reached, low, middle)
+        feasible = (
+            model.apply_nonlinear_adjustments(np.full(len(targets), upper), events)
+            >= targets
+        )
+        return np.where(feasible, high, np.inf)
+
+    def target_scores(self, model, target_rating, industries, n):
+        """
+        各公司目标评级对应的最低总分（行业单独设置阈值时按行业取值）
+        """
+        bands = model.rating_bands
+        labels = list(bands.labels)
+        if target_rating not in labels:
+            raise ValueError(f"未知的目标评级: {target_rating}")
+        level = labels.index(target_rating)
+        if level == 0:
+            return np.full(n, -np.inf)
+
+        targets = np.full(n, bands.thresholds[level - 1])
+        if industries is not None and bands.industry_thresholds:
+            industries = np.asarray(industries).astype(str)
+            for name, thresholds in bands.industry_thresholds.items():
+                targets[industries == name] = thresholds[level - 1]
+        return targets
+
+    def plan(
+        self,
+        model_results,
+        target_rating="良好",
+        industry="默认",
+        industries=None,
+        max_steps=None,
+    ):
+        """
+        为全部公司批量规划改进路径，返回 (各公司汇总, 改进步骤)
+        指标取值为标准化后的值：0为样本最差水平，1为样本最佳水平
+        """
+        model = self.attribution._model_for(model_results)
+        processed_data = model_results["processed_data"]
+        contributions, intercepts, membership, scales = (
+            self.attribution.pillar_components(
+                model, processed_data, model_results["weights"]
+            )
+        )
+        columns = np.array(processed_data.columns, dtype=object)
+        values = processed_data.to_numpy(dtype=np.float64).copy()
+        n, m = values.shape
+        events = model_results.get("events")
+        pillars = intercepts + np.stack(
+            [contributions[:, membership == p].sum(axis=1) for p in range(3)]
+        )
+        valid = membership >= 0
+        pillar_of = np.where(valid, membership, 0)
+        # 指标标准化值每提高1，所属维度得分提高的分数
+        unit = np.where(
+            valid, scales[pillar_of] * np.asarray(model_results["weights"])[:m], 0.0
+        )
+        unit = np.maximum(unit, 0.0)
+        headroom = np.clip(1.0 - values, 0.0, None)
+
+        coefficients = np.array(model.get_pillar_weights(industry), dtype=np.float64)
+        cross = np.zeros((3, 3))
+        for p, q, name in CROSS_TERMS:
+            cross[p, q] = cross[q, p] = model.params["cross_term_coeffs"][name] / 100
+        base = (
+            coefficients @ pillars
+            + np.einsum("pn,pq,qn->n", pillars, cross, pillars) / 2
+        )
+
+        final_score = np.asarray(model_results["final_score"], dtype=np.float64)
+        targets = self.target_scores(model, target_rating, industries, n)
+        unique_targets, inverse = np.unique(targets, return_inverse=True)
+        required = self.required_base(model, events, unique_targets)[inverse] + 1e-9
+
+        status = np.where(final_score >= targets, "已达标", "可达成").astype(object)
+        status[(final_score < targets) & np.isinf(required)] = "无法达成"
+        active = status == "可达成"
+        n_steps = np.zeros(n, dtype=np.int64)
+        steps = []
+
+        for step in range(1, (max_steps or m) + 1):
+            rows = np.flatnonzero(active)
+            if len(rows) == 0:
+                break
+            # 各维度得分对Base Score的梯度（交叉项使梯度随其他维度得分变化）
+            gradient = coefficients[:, None] + cross @ pillars[:, rows]
+            gains = unit * headroom[rows] * gradient[pillar_of].T
+            choice = gains.argmax(axis=1)
+            gain = gains[np.arange(len(rows)), choice]
+
+            stuck = gain <= 1e-12
+            status[rows[stuck]] = "无法达成"
+            active[rows[stuck]] = False
+            rows, choice, gain = rows[~stuck], choice[~stuck], gain[~stuck]
+
+            fraction = np.clip((required[rows] - base[rows]) / gain, 0.0, 1.0)
+            delta = fraction * headroom[rows, choice]
+            steps.append(
+                (
+                    rows,
+                    np.full(len(rows), step),
+                    choice,
+                    values[rows, choice].copy(),
+                    values[rows, choice] + delta,
+                    fraction * gain,
+                )
+            )
+            values[rows, choice] += delta
+            headroom[rows, choice] -= delta
+            np.add.at(pillars, (membership[choice], rows), unit[choice] * delta)
+            base[rows] += fraction * gain
+            n_steps[rows] = step
+            active[rows[fraction < 1.0]] = False
+
+        # 达到步数上限仍未达标
+        status[active] = "无法达成"
+
+        summary = pd.DataFrame(
+            {
+                "当前总分": final_score,
+                "目标评级": target_rating,
+                "目标总分": targets,
+                "需改进指标数": np.where(status == "已达标", 0, n_steps),
+                "规划后总分": np.where(
+                    status == "可达成",
+                    model.apply_nonlinear_adjustments(base.copy(), events),
+                    final_score,
+                ),
+                "状态": status,
+            }
+        )
+
+        if steps:
+            rows, step_no, choice, before, after, gain = (
+                np.concatenate(parts) for parts in zip(*steps)
+            )
+        else:
+            rows = step_no = choice = np.empty(0, dtype=np.int64)
+            before = after = gain = np.empty(0)
+        order = np.lexsort((step_no, rows))
+        steps_df = pd.DataFrame(
+            {
+                "公司序号": rows[order],
+                "步骤": step_no[order],
+                "指标": columns[choice[order]],
+                "所属维度": self.PILLARS[membership[choice[order]]],
+                "当前标准化值": before[order],
+                "目标标准化值": after[order],
+                "Base提升": gain[order],
+            }
+        )
+        # 未达成目标公司的步骤只是部分路径，不计入规划
+        steps_df = steps_df[status[steps_df["公司序号"].to_numpy()] == "可达成"]
+        return summary, steps_df.reset_index(drop=True)
+
+
+class WhatIfSession:
+    """
+    单公司假设分析会话
+    保存已拟合的权重和该公司的标准化指标向量；修改k个指标时按权重增量更新维度得分，
+    再由维度得分重新计算Base Score和最终得分，耗时为O(k)，无需重新预处理和赋权
+    （单公司评分的标准化和熵权都不依赖指标取值，增量结果与完整重算一致）
+    """
+
+    def __init__(self, model_results, industry="默认", model=None, company_name=None):
+        attribution = ScoreAttribution(model)
+        self.model = attribution._model_for(model_results)
+        processed_data = model_results["processed_data"]
+        if len(processed_data) != 1:
+            raise ValueError("假设分析仅支持单公司评分结果")
+
+        contributions, intercepts, membership, scales = attribution.pillar_components(
+            self.model, processed_data, model_results["weights"]
+        )
+        self.industry = industry
+        self.company_name = company_name
+        self.events = model_results.get("events")
+        self.columns = list(processed_data.columns)
+        self._positions = {name: i for i, name in enumerate(self.columns)}
+        self.membership = membership
+        self.unit = np.where(
+            membership >= 0,
+            scales[np.maximum(membership, 0)]
+            * np.asarray(model_results["weights"], dtype=np.float64)[
+                : len(self.columns)
+            ],
+            0.0,
+        )
+
+        self.coefficients = np.array(
+            self.model.get_pillar_weights(industry), dtype=np.float64
+        )
+        self.cross = np.zeros((3, 3))
+        for p, q, name in CROSS_TERMS:
+            self.cross[p, q] = self.cross[q, p] = (
+                self.model.params["cross_term_coeffs"][name] / 100
+            )
+
+        values = processed_data.to_numpy(dtype=np.float64)[0]
+        pillars = intercepts[:, 0] + np.array(
+            [contributions[0, membership == p].sum() for p in range(3)]
+        )
+        self._initial = (values.copy(), pillars.copy())
+        self.values = values
+        self.pillars = pillars
+        self._lock = threading.Lock()
+        self.baseline = self.scores()
+
+    def update(self, changes):
+        """
+        修改指标原始取值，changes为 {指标名称: 取值}，返回更新后的得分
+        """
+        with self._lock:
+            for name, value in changes.items():
+                if name not in self._positions:
+                    raise ValueError(f"未知指标: {name}")
+                i = self._positions[name]
+                new_value = self.model.normalize_single_value(name, float(value or 0))
+                if self.membership[i] >= 0:
+                    self.pillars[self.membership[i]] += self.unit[i] * (
+                        new_value - self.values[i]
+                    )
+                self.values[i] = new_value
+        return self.scores()
+
+    def reset(self):
+        """
+        恢复到评分时的指标取值
+        """
+        with self._lock:
+            self.values = self._initial[0].copy()
+            self.pillars = self._initial[1].copy()
+        return self.scores()
+
+    def scores(self):
+        """
+        由当前维度得分计算Base Score、最终得分和评级
+        """
+        with self._lock:
+            e_score, s_score, g_score = self.pillars.tolist()
+            base_score = float(
+                self.coefficients @ self.pillars
+                + self.pillars @ self.cross @ self.pillars / 2
+            )
+        final_score = self.model.apply_nonlinear_adjustments(base_score, self.events)
+        final_score = max(0, min(final_score, 100))
+        return {
+            "ESG总分": final_score,
+            "Base Score": base_score,
+            "E得分": e_score,
+            "S得分": s_score,
+            "G得分": g_score,
+            "评级": self.model.get_score_interpretation(final_score, self.industry)[0],
+        }
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class StageCache:
+    """
+    评分分阶段缓存
+    同一份数据多次评分时，按各阶段依赖的参数缓存中间结果：数据整理、预处理和熵权只依赖数据，
+    组合权重和维度得分依赖α和主观权重，交叉项、事件和非线性参数只影响最后的计算；
+    只修改靠后阶段的参数时，前面的阶段直接复用。一个实例只对应一份数据，数据变化时换新实例
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatasetCache:
+    """
+    数据集缓存
+    按文件内容哈希缓存清洗后的数据：数值列按数据类型分块保存为.npy，
+    分类列和文本列保存为编码数组加字典，再次加载时以内存映射方式零拷贝读取，
+    列类型与重新解析的结果一致；含有无法无损还原的列的数据不缓存
+    """
+
+    # 缓存格式版本，格式变化时使旧缓存失效
+    FORMAT_VERSION = 2
+
+    def __init__(self, cache_dir=None, max_bytes=1024**3):
+        self.cache_dir = cache_dir or os.path.join(
+            tempfile.gettempdir(), "esg_dataset_cache"
+        )
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_key(self, file_path, *variant):
+        """
+        计算文件内容哈希作为缓存键，variant用于区分不同的读取配置
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"v{self.FORMAT_VERSION}|{'|'.join(map(str, variant))}".encode())
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """
+        读取缓存，返回 (数据, 附加信息)；未命中时返回None
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            # 按原列顺序组装，数值块和编码数组都以内存映射方式引用，不复制
+            columns = {}
+            blocks = {}
+            for i, (col, kind, ref) in enumerate(meta["columns"]):
+                if kind == "block":
+                    if ref[0] not in blocks:
+                        blocks[ref[0]] = np.load(
+                            os.path.join(entry_dir, f"block_{ref[0]}.npy"),
+                            mmap_mode="r",
+                        )
+                    columns[col] = blocks[ref[0]][ref[1]]
+                    continue
+                codes = np.load(
+                    os.path.join(entry_dir, f"codes_{i}.npy"), mmap_mode="r"
+                )
+                values = pd.Categorical.from_codes(
+                    codes, ref["categories"], ordered=ref["ordered"]
+                )
+                # 原为文本（object）列的还原为object，不改变列类型
+                columns[col] = values if kind == "category" else values.astype(object)
+            data = pd.DataFrame(
+                columns, index=pd.RangeIndex(meta["n_rows"]), copy=False
+            )
+        except Exception as e:
+            print(f"警告: 数据集缓存读取失败，将重新解析: {str(e)}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # 更新访问时间用于LRU淘汰
+        os.utime(meta_path)
+        return data, meta.get("info")
+
+    def put(self, key, data, info=None):
+        """
+        写入缓存：先写入临时目录再原子重命名，随后按容量上限淘汰
+        """
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        layout = self._layout(data)
+        if layout is None:
+            # 含有无法无损还原的列时不缓存，避免命中缓存与重新解析得到不同的数据
+            return
+
+        staging_dir = tempfile.mkdtemp(prefix=f".{key}.", dir=self.cache_dir)
+        try:
+            # 同一数据类型的列保存为一个（列 × 行）块，读取时保持原类型
+            dtypes = []
+            for col, kind in layout:
+                if kind == "block" and data[col].dtype not in dtypes:
+                    dtypes.append(data[col].dtype)
+            for k, dtype in enumerate(dtypes):
+                np.save(
+                    os.path.join(staging_dir, f"block_{k}.npy"),
+                    np.stack(
+                        [
+                            data[col].to_numpy()
+                            for col, kind in layout
+                            if kind == "block" and data[col].dtype == dtype
+                        ]
+                    ),
+                )
+
+            # 每列记录 [列名, 缓存方式, 位置]：块列为 [块序号, 块内行号]，编码列为字典
+            columns = []
+            block_rows = [0] * len(dtypes)
+            for i, (col, kind) in enumerate(layout):
+                if kind == "block":
+                    k = dtypes.index(data[col].dtype)
+                    columns.append([col, kind, [k, block_rows[k]]])
+                    block_rows[k] += 1
+                    continue
+                categorical = pd.Categorical(data[col])
+                np.save(os.path.join(staging_dir, f"codes_{i}.npy"), categorical.codes)
+                dictionary = {
+                    "categories": [
+                        value.item() if hasattr(value, "item") else value
+                        for value in categorical.categories
+                    ],
+                    "ordered": bool(categorical.ordered),
+                }
+                columns.append([col, kind, dictionary])
+
+            meta = {
+                "columns": columns,
+                "n_rows": len(data),
+                "info": info,
+                "created": time.time(),
+            }
+            with open(
+                os.path.join(staging_dir, "meta.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            os.replace(staging_dir, entry_dir)
+        except Exception as e:
+            print(f"警告: 数据集缓存写入失败: {str(e)}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    @staticmethod
+    def _layout(data):
+        """
+        确定各列的缓存方式：NumPy原生类型的列按数据类型分块保存（"block"），
+        分类列（"category"）和纯文本列（"object"）保存为编码数组加字典；
+        任何一列无法无损还原时返回None
+        """
+        if not all(isinstance(col, str) for col in data.columns):
+            return None
+        if data.columns.duplicated().any():
+            return None
+
+        layout = []
+        for col in data.columns:
+            dtype = data[col].dtype
+            if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+                layout.append((col, "block"))
+                continue
+
+            if isinstance(dtype, pd.CategoricalDtype):
+                kind, values = "category", dtype.categories
+            elif pd.api.types.is_object_dtype(dtype):
+                kind, values = "object", data[col].dropna().unique()
+            else:
+                return None
+            # 字典需能原样写入JSON
+            if not all(
+                isinstance(v.item() if hasattr(v, "item") else v, (str, int, float))
+                for v in values
+            ):
+                return None
+            if kind == "object" and not all(isinstance(v, str) for v in values):
+                return None
+            layout.append((col, kind))
+        return layout
+
+    def _entries(self):
+        """
+        列出缓存条目：(最近访问时间, 占用字节数, 目录)
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, "meta.json")
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f))
+                for f in os.listdir(entry_dir)
+            )
+            entries.append((os.path.getmtime(meta_path), size, entry_dir))
+        return entries
+
+    def evict(self):
+        """
+        按最近最少使用顺序淘汰条目，直到总大小不超过上限
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        清空全部缓存
+        """
+        for _, _, entry_dir in self._entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
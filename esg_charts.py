@@ -0,0 +1,339 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+
+def _build_base_template():
+    """
+    所有图表共享的基础模板：在plotly_white基础上统一字体和图例位置
+    """
+    template = go.layout.Template(pio.templates["plotly_white"])
+    template.layout.font = dict(size=11)
+    template.layout.legend = dict(
+        orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5
+    )
+    return template
+
+
+# 模块加载时构建一次，各图表只需创建数据轨迹
+BASE_TEMPLATE = _build_base_template()
+
+
+def results_hash(results_df):
+    """
+    评分结果的内容哈希，用作图表缓存键
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("|".join(map(str, results_df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(results_df, index=False).to_numpy())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    图表缓存
+    按 (结果哈希, 图表类型) 缓存已构建的图表，超过容量时淘汰最久未使用的条目
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, result_key, chart_type, builder):
+        key = (result_key, chart_type)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = builder()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class UniverseDashboard:
+    """
+    多公司评分仪表板
+    直方图、行业箱线统计和E/S二维密度都在服务端用NumPy分箱和分位数计算，
+    散点图使用WebGL并降采样，图表数据量与公司数量无关
+    """
+
+    SCORE_COLUMNS = [
+        ("ESG总分", "#9467bd"),
+        ("E得分", "#2ca02c"),
+        ("S得分", "#1f77b4"),
+        ("G得分", "#ff7f0e"),
+    ]
+
+    def __init__(self, bins=40, density_bins=30, max_points=5000, seed=0):
+        self.bins = bins
+        self.density_bins = density_bins
+        self.max_points = max_points
+        self.seed = seed
+
+    def aggregate(self, results_df):
+        """
+        计算仪表板所需的全部汇总数据
+        """
+        scores = {
+            col: results_df[col].to_numpy(dtype=np.float64)
+            for col, _ in self.SCORE_COLUMNS
+        }
+        edges = np.linspace(0, 100, self.bins + 1)
+        histograms = {
+            col: np.histogram(np.clip(values, 0, 100), bins=edges)[0]
+            for col, values in scores.items()
+        }
+
+        density, e_edges, s_edges = np.histogram2d(
+            np.clip(scores["E得分"], 0, 100),
+            np.clip(scores["S得分"], 0, 100),
+            bins=self.density_bins,
+            range=[[0, 100], [0, 100]],
+        )
+
+        return {
+            "n": len(results_df),
+            "edges": edges,
+            "histograms": histograms,
+            "industry_stats": self.industry_box_stats(
+                results_df["行业"].astype(str).to_numpy(), scores["ESG总分"]
+            ),
+            "density": density.T,  # 行对应S，列对应E
+            "density_centers": (
+                (e_edges[:-1] + e_edges[1:]) / 2,
+                (s_edges[:-1] + s_edges[1:]) / 2,
+            ),
+            "sample": self._sample(results_df, scores),
+        }
+
+    def industry_box_stats(self, industries, values):
+        """
+        各行业的箱线图统计量：四分位数、1.5倍IQR须线、均值和样本数
+        """
+        order = np.argsort(industries, kind="stable")
+        sorted_industries = industries[order]
+        names, starts = np.unique(sorted_industries, return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+
+        stats = []
+        for name, start, end in zip(names, starts, bounds):
+            group = np.sort(values[order[start:end]])
+            q1, median, q3 = np.quantile(group, [0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            # 须线取落在1.5倍IQR范围内的最远观测值
+            low = group[np.searchsorted(group, q1 - 1.5 * iqr, side="left")]
+            high = group[np.searchsorted(group, q3 + 1.5 * iqr, side="right") - 1]
+            stats.append(
+                {
+                    "industry": str(name),
+                    "q1": q1,
+                    "median": median,
+                    "q3": q3,
+                    "lower": low,
+                    "upper": high,
+                    "mean": group.mean(),
+                    "n": len(group),
+                }
+            )
+        return stats
+
+    def _sample(self, results_df, scores):
+        """
+        散点图使用的降采样数据
+        """
+        sample = self.sample_points(scores)
+        return {
+            "e": scores["E得分"][sample],
+            "s": scores["S得分"][sample],
+            "final": scores["ESG总分"][sample],
+            "names": results_df["公司名称"].to_numpy()[sample].astype(str),
+        }
+
+    def sample_points(self, scores):
+        """
+        散点图降采样：固定随机种子均匀抽样，并保留总分最高和最低的公司
+        """
+        n = len(scores["ESG总分"])
+        if n <= self.max_points:
+            return np.arange(n)
+
+        final = scores["ESG总分"]
+        extremes = np.concatenate(
+            [
+                np.argpartition(final, 50)[:50],
+                np.argpartition(final, n - 50)[n - 50 :],
+            ]
+        )
+        rng = np.random.default_rng(self.seed)
+        sample = rng.choice(n, self.max_points - len(extremes), replace=False)
+        return np.unique(np.concatenate([sample, extremes]))
+
+    # 可单独查看的面板：(图表类型, 标题)
+    PANELS = {
+        "histogram": "📊 得分分布直方图",
+        "industry": "🏭 各行业ESG总分分布",
+        "density": "🌡️ E/S得分密度",
+    }
+
+    def _histogram_traces(self, agg):
+        # 按预先分箱的计数绘制柱形
+        centers = (agg["edges"][:-1] + agg["edges"][1:]) / 2
+        width = agg["edges"][1] - agg["edges"][0]
+        return [
+            go.Bar(
+                x=centers,
+                y=agg["histograms"][col],
+                width=width,
+                name=col,
+                marker=dict(color=color),
+                opacity=0.55,
+                hovertemplate=f"{col} %{{x:.1f}}分: %{{y}}家<extra></extra>",
+            )
+            for col, color in self.SCORE_COLUMNS
+        ]
+
+    def _industry_traces(self, agg):
+        # 使用预先计算的统计量绘制箱线图
+        stats = agg["industry_stats"]
+        return [
+            go.Box(
+                x=[s["industry"] for s in stats],
+                q1=[s["q1"] for s in stats],
+                median=[s["median"] for s in stats],
+                q3=[s["q3"] for s in stats],
+                lowerfence=[s["lower"] for s in stats],
+                upperfence=[s["upper"] for s in stats],
+                mean=[s["mean"] for s in stats],
+                name="行业分布",
+                marker=dict(color="#17becf"),
+                customdata=[s["n"] for s in stats],
+                showlegend=False,
+            )
+        ]
+
+    def _density_traces(self, agg):
+        e_centers, s_centers = agg["density_centers"]
+        return [
+            go.Heatmap(
+                x=e_centers,
+                y=s_centers,
+                z=agg["density"],
+                colorscale="Viridis",
+                showscale=False,
+                hovertemplate="E %{x:.0f} / S %{y:.0f}: %{z:.0f}家<extra></extra>",
+                name="密度",
+            )
+        ]
+
+    def _scatter_traces(self, agg):
+        # WebGL散点（降采样后）
+        sample = agg["sample"]
+        return [
+            go.Scattergl(
+                x=sample["e"],
+                y=sample["s"],
+                mode="markers",
+                text=sample["names"],
+                marker=dict(
+                    size=5,
+                    color=sample["final"],
+                    colorscale="RdYlGn",
+                    cmin=0,
+                    cmax=100,
+                    opacity=0.7,
+                    showscale=True,
+                    colorbar=dict(title="总分", len=0.4, y=0.2),
+                ),
+                hovertemplate="%{text}<br>E: %{x:.1f} S: %{y:.1f}<extra></extra>",
+                name="公司",
+                showlegend=False,
+            )
+        ]
+
+    def figure(self, results_df, agg=None):
+        """
+        构建多公司仪表板图表
+        """
+        agg = agg or self.aggregate(results_df)
+        fig = make_subplots(
+            rows=2,
+            cols=2,
+            subplot_titles=[
+                self.PANELS["histogram"],
+                self.PANELS["industry"],
+                self.PANELS["density"],
+                f"🔍 E/S得分散点（显示{len(agg['sample']['e'])}/{agg['n']}家）",
+            ],
+            vertical_spacing=0.14,
+            horizontal_spacing=0.1,
+        )
+        for position, traces in [
+            ((1, 1), self._histogram_traces(agg)),
+            ((1, 2), self._industry_traces(agg)),
+            ((2, 1), self._density_traces(agg)),
+            ((2, 2), self._scatter_traces(agg)),
+        ]:
+            for trace in traces:
+                fig.add_trace(trace, row=position[0], col=position[1])
+
+        fig.update_layout(
+            height=800,
+            title=dict(
+                text=f"🌐 {agg['n']}家企业ESG评分仪表板",
+                x=0.5,
+                font=dict(size=20),
+            ),
+            template=BASE_TEMPLATE,
+            barmode="overlay",
+        )
+        fig.update_xaxes(title_text="得分", range=[0, 100], row=1, col=1)
+        fig.update_yaxes(title_text="企业数量", row=1, col=1)
+        fig.update_yaxes(title_text="ESG总分", range=[0, 100], row=1, col=2)
+        for col in (1, 2):
+            fig.update_xaxes(title_text="E得分", range=[0, 100], row=2, col=col)
+            fig.update_yaxes(title_text="S得分", range=[0, 100], row=2, col=col)
+
+        return fig
+
+    def panel_figure(self, agg, chart_type):
+        """
+        构建单个面板的图表（密度面板同时叠加降采样散点）
+        """
+        if chart_type == "histogram":
+            traces = self._histogram_traces(agg)
+            axes = ("得分", "企业数量")
+        elif chart_type == "industry":
+            traces = self._industry_traces(agg)
+            axes = ("行业", "ESG总分")
+        elif chart_type == "density":
+            traces = self._density_traces(agg) + self._scatter_traces(agg)
+            axes = ("E得分", "S得分")
+        else:
+            raise ValueError(f"不支持的图表类型: {chart_type}")
+
+        fig = go.Figure(data=traces)
+        fig.update_layout(
+            height=600,
+            title=dict(text=self.PANELS[chart_type], x=0.5),
+            template=BASE_TEMPLATE,
+            barmode="overlay",
+            xaxis_title=axes[0],
+            yaxis_title=axes[1],
+        )
+        return fig
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pandas as pd
 
@@ -8,8 +10,29 @@ class ESGDataProcessor:
     用于处理真实的ESG指标数据
     """
 
-    def __init__(self):
-        pass
+    # 标准化列名映射
+    COLUMN_ALIASES = {
+        "公司名称": "company_name",
+        "企业名称": "company_name",
+        "公司": "company_name",
+        "行业": "industry",
+        "行业类型": "industry",
+        "所属行业": "industry",
+    }
+
+    # 支持直接读取的列式文件格式
+    PARQUET_EXTENSIONS = [".parquet", ".pq"]
+    FEATHER_EXTENSIONS = [".feather", ".arrow", ".ipc"]
+
+    # 不参与评分的已知非指标列，读取时不投影
+    NON_INDICATOR_COLUMNS = ["market_cap", "employees"]
+
+    # xlsx流式读取时每批转换的行数
+    EXCEL_BATCH_SIZE = 50000
+
+    def __init__(self, float_dtype="float64"):
+        # 指标列的数值类型（float64保持精度，float32节省一半内存）
+        self.float_dtype = float_dtype
 
         # 环境指标 (E) - 基于甲模型附录
         self.e_indicators = [
@@ -80,39 +103,23 @@ class ESGDataProcessor:
         """
         验证公司ESG数据的完整性和有效性
         """
-        required_columns = ["company_name", "industry"]
-        missing_columns = [col for col in required_columns if col not in data.columns]
-
-        if missing_columns:
-            raise ValueError(f"缺少必要列: {missing_columns}")
-
-        # 验证行业是否在支持列表中
-        invalid_industries = data[~data["industry"].isin(self.supported_industries)][
-            "industry"
-        ].unique()
-        if len(invalid_industries) > 0:
-            print(f"警告: 发现不在支持列表中的行业: {invalid_industries}")
+        validator = _BatchValidator(self.supported_industries)
+        validator.check(data)
+        problem = validator.finish()
+        if problem is not None:
+            raise ValueError(problem)
 
         return True
 
-    def clean_and_standardize_data(self, data):
+    def clean_and_standardize_data(self, data, copy=True):
         """
         清洗和标准化ESG数据
+        copy为False时直接在传入的数据上清洗（数据由调用方独占时避免复制一份）
         """
-        cleaned_data = data.copy()
-
-        # 标准化列名映射
-        column_mapping = {
-            "公司名称": "company_name",
-            "企业名称": "company_name",
-            "公司": "company_name",
-            "行业": "industry",
-            "行业类型": "industry",
-            "所属行业": "industry",
-        }
+        cleaned_data = data.copy() if copy else data
 
         # 应用列名映射
-        for chinese_col, english_col in column_mapping.items():
+        for chinese_col, english_col in self.COLUMN_ALIASES.items():
             if (
                 chinese_col in cleaned_data.columns
                 and english_col not in cleaned_data.columns
@@ -167,12 +174,241 @@ class ESGDataProcessor:
         从CSV文件加载ESG数据
         """
         try:
-            data = pd.read_csv(file_path)
+            data = self.read_table(file_path)
             self.validate_company_data(data)
             return self.clean_and_standardize_data(data)
         except Exception as e:
             raise ValueError(f"数据加载失败: {str(e)}")
 
+    def get_key_columns(self):
+        """
+        获取公司和行业标识列（含中文别名）
+        """
+        return ["company_name", "industry"] + list(self.COLUMN_ALIASES)
+
+    def build_dtype_schema(self, columns):
+        """
+        根据指标注册表构建显式的列类型：指标列为浮点数，公司和行业列为分类类型
+        """
+        indicators = set(sum(self.get_all_indicators().values(), []))
+        key_columns = set(self.get_key_columns())
+
+        schema = {}
+        for col in columns:
+            if col in key_columns or col in ["category", "indicator"]:
+                # 纵向格式的类别和指标列同样使用分类类型
+                schema[col] = "category"
+            elif col in indicators or col == "value":
+                schema[col] = self.float_dtype
+        return schema
+
+    def get_needed_columns(self, columns):
+        """
+        计算需要读取的列：只跳过已知不参与评分的非指标列，
+        注册表以外的自定义指标列（如供应商指标）全部保留
+        """
+        skip = set(self.NON_INDICATOR_COLUMNS)
+        return [col for col in columns if col not in skip]
+
+    def read_table(self, file_path, columns=None):
+        """
+        按扩展名读取数据文件，使用显式类型并只投影需要的列
+        CSV优先使用多线程的pyarrow引擎，Parquet和Feather/Arrow IPC文件直接读取
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+
+        if file_extension in self.PARQUET_EXTENSIONS + self.FEATHER_EXTENSIONS:
+            _import_pyarrow()
+            if file_extension in self.PARQUET_EXTENSIONS:
+                import pyarrow.parquet as pq
+
+                available = pq.read_schema(file_path).names
+            else:
+                import pyarrow.ipc
+
+                with pyarrow.memory_map(file_path) as source:
+                    available = pyarrow.ipc.open_file(source).schema.names
+
+            usecols = columns or self.get_needed_columns(available)
+            if file_extension in self.PARQUET_EXTENSIONS:
+                data = pd.read_parquet(file_path, columns=usecols)
+            else:
+                data = pd.read_feather(file_path, columns=usecols)
+            return data.astype(self.build_dtype_schema(data.columns))
+
+        if file_extension == ".csv":
+            available = pd.read_csv(file_path, nrows=0).columns
+            usecols = columns or self.get_needed_columns(available)
+            engine = "pyarrow" if _has_pyarrow() else None
+            return pd.read_csv(
+                file_path,
+                engine=engine,
+                usecols=usecols,
+                dtype=self.build_dtype_schema(usecols),
+            )
+
+        if file_extension == ".xlsx":
+            # xlsx使用只读流式读取，避免一次性加载整个工作簿
+            return self.read_excel_streaming(file_path, columns=columns)
+
+        if file_extension == ".xls":
+            available = pd.read_excel(file_path, nrows=0).columns
+            usecols = columns or self.get_needed_columns(available)
+            return pd.read_excel(
+                file_path, usecols=usecols, dtype=self.build_dtype_schema(usecols)
+            )
+
+        raise ValueError("不支持的文件格式，请上传CSV、Excel、Parquet或Feather文件")
+
+    def iter_excel_batches(self, file_path, columns=None, batch_size=None):
+        """
+        以只读流式模式逐行读取xlsx工作簿，并按批次转换为带类型的列缓冲区
+        每批只保留batch_size行原始单元格，峰值内存与工作簿大小无关
+        """
+        from openpyxl import load_workbook
+
+        batch_size = batch_size or self.EXCEL_BATCH_SIZE
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+
+            header = [
+                str(col) if col is not None else f"Unnamed: {i}"
+                for i, col in enumerate(header)
+            ]
+            usecols = columns or self.get_needed_columns(header)
+            positions = [header.index(col) for col in usecols]
+            schema = self.build_dtype_schema(usecols)
+
+            batch_rows = []
+            for row in rows:
+                # 跳过空行
+                if all(value is None for value in row):
+                    continue
+                batch_rows.append(row)
+                if len(batch_rows) >= batch_size:
+                    yield self._build_typed_batch(
+                        batch_rows, usecols, positions, schema
+                    )
+                    batch_rows = []
+
+            if batch_rows:
+                yield self._build_typed_batch(batch_rows, usecols, positions, schema)
+        finally:
+            workbook.close()
+
+    def _build_typed_batch(self, batch_rows, usecols, positions, schema):
+        """
+        将一批原始行转换为按列存储的带类型数据
+        """
+        n_rows = len(batch_rows)
+        columns = {}
+        for col, pos in zip(usecols, positions):
+            values = (row[pos] if pos < len(row) else None for row in batch_rows)
+            dtype = schema.get(col)
+            if dtype == "category":
+                # 标识列统一转为文本，避免各批次推断出不同的类别类型
+                columns[col] = pd.Categorical(
+                    [None if value is None else str(value) for value in values]
+                )
+            elif dtype is not None:
+                columns[col] = np.fromiter(
+                    (_to_float(value) for value in values), dtype=dtype, count=n_rows
+                )
+            else:
+                columns[col] = pd.Series(list(values), dtype=object).infer_objects()
+        return pd.DataFrame(columns)
+
+    def read_excel_streaming(self, file_path, columns=None, batch_size=None):
+        """
+        流式读取xlsx工作簿，每批读出后立即并入各列的累积缓冲区并释放，
+        不会同时保留全部批次
+        """
+        return _concat_batches(self.iter_excel_batches(file_path, columns, batch_size))
+
+    def iter_data_batches(self, file_path, batch_size=None):
+        """
+        按批读取数据文件：xlsx逐批流式读取，
+        其余格式由列式读取器一次读出（本身已是整列向量化解析），作为单个批次
+        """
+        if os.path.splitext(file_path)[1].lower() == ".xlsx":
+            yield from self.iter_excel_batches(file_path, batch_size=batch_size)
+        else:
+            yield self.read_table(file_path)
+
+    def read_data_file(self, file_path):
+        """
+        按扩展名完整读取数据文件
+        """
+        return self.read_table(file_path)
+
+    def load_data_file(self, file_path, batch_size=None):
+        """
+        读取、验证并清洗数据文件，返回 (数据, 问题描述)
+        每批读出后先逐批验证再并入列缓冲区，合并后的数据就地清洗，不再复制一份；
+        验证失败时返回未清洗的数据和问题描述
+        """
+        validator = _BatchValidator(self.supported_industries)
+        data = _concat_batches(
+            self.iter_data_batches(file_path, batch_size), on_batch=validator.check
+        )
+        if not validator.checked:
+            validator.check(data)
+        problem = validator.finish()
+
+        if problem is None:
+            try:
+                data = self.clean_and_standardize_data(data, copy=False)
+            except ValueError as ve:
+                problem = str(ve)
+        return data, problem
+
+    def read_preview(self, file_path, nrows=10):
+        """
+        只读取表头和前nrows行用于快速预览
+        CSV使用nrows截断读取，xlsx使用只读流式模式，避免解析整个文件
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == ".csv":
+            return pd.read_csv(file_path, nrows=nrows)
+        elif file_extension == ".xlsx":
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(max_row=nrows + 1, values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    return pd.DataFrame()
+                return pd.DataFrame(list(rows), columns=list(header))
+            finally:
+                workbook.close()
+        elif file_extension == ".xls":
+            return pd.read_excel(file_path, nrows=nrows)
+        elif file_extension in self.PARQUET_EXTENSIONS:
+            _import_pyarrow()
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(file_path).iter_batches(batch_size=nrows)
+            first_batch = next(batches, None)
+            return (
+                first_batch.to_pandas() if first_batch is not None else pd.DataFrame()
+            )
+        elif file_extension in self.FEATHER_EXTENSIONS:
+            _import_pyarrow()
+            import pyarrow.ipc
+
+            with pyarrow.memory_map(file_path) as source:
+                reader = pyarrow.ipc.open_file(source)
+                if reader.num_record_batches == 0:
+                    return pd.DataFrame()
+                return reader.get_batch(0).slice(0, nrows).to_pandas()
+        else:
+            raise ValueError("不支持的文件格式，请上传CSV、Excel、Parquet或Feather文件")
+
     def export_data_template(self, file_path):
         """
         导出ESG数据模板
@@ -191,6 +427,418 @@ class ESGDataProcessor:
         return f"数据模板已导出到: {file_path}"
 
 
+class CompactLongData:
+    """
+    紧凑的纵向（长格式）ESG指标数据
+    公司、行业、类别和指标以分类编码存储，指标值为float32，
+    指标轴采用字典编码（每个指标只保存一次名称和所属类别）
+    """
+
+    def __init__(
+        self,
+        entity_codes,
+        indicator_codes,
+        values,
+        companies,
+        industries,
+        entity_company_codes,
+        entity_industry_codes,
+        indicators,
+        categories,
+        indicator_category_codes,
+    ):
+        # 每行的编码和取值
+        self.entity_codes = entity_codes
+        self.indicator_codes = indicator_codes
+        self.values = values
+
+        # 公司/行业字典，实体为（公司，行业）组合
+        self.companies = companies
+        self.industries = industries
+        self.entity_company_codes = entity_company_codes
+        self.entity_industry_codes = entity_industry_codes
+
+        # 指标字典及其所属类别
+        self.indicators = indicators
+        self.categories = categories
+        self.indicator_category_codes = indicator_category_codes
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def n_entities(self):
+        return len(self.entity_company_codes)
+
+    @property
+    def nbytes(self):
+        """
+        编码数组占用的字节数（不含字典）
+        """
+        return (
+            self.entity_codes.nbytes
+            + self.indicator_codes.nbytes
+            + self.values.nbytes
+            + self.entity_company_codes.nbytes
+            + self.entity_industry_codes.nbytes
+            + self.indicator_category_codes.nbytes
+        )
+
+    @staticmethod
+    def _encode(values):
+        """
+        对一列取值进行分类编码，已是分类类型时直接复用其编码
+        """
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            return values.cat.codes.to_numpy(), values.cat.categories.to_numpy()
+        codes, uniques = pd.factorize(np.asarray(values))
+        return codes, np.asarray(uniques)
+
+    @staticmethod
+    def _code_dtype(n):
+        """
+        选择能容纳n个类别的最小整数编码类型
+        """
+        return np.min_scalar_type(-max(n, 1))
+
+    @classmethod
+    def _build_entities(cls, company_codes, industry_codes, n_industries):
+        """
+        将（公司，行业）组合编码为实体
+        """
+        pair_codes = company_codes.astype(np.int64) * max(n_industries, 1)
+        pair_codes += industry_codes
+        entity_codes, pairs = pd.factorize(pair_codes, sort=False)
+        entity_company = pairs // max(n_industries, 1)
+        entity_industry = pairs % max(n_industries, 1)
+        return entity_codes, entity_company, entity_industry
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        从长格式DataFrame（company_name, industry, category, indicator, value）构建
+        """
+        # 公司、行业或指标缺失的行无法编码（编码为-1），直接剔除
+        valid = (
+            data["company_name"].notna().to_numpy()
+            & data["industry"].notna().to_numpy()
+            & data["indicator"].notna().to_numpy()
+        )
+        if not valid.all():
+            print(
+                f"警告: 纵向数据中有{int((~valid).sum())}行缺少公司、行业或指标名称，已忽略"
+            )
+            data = data[valid]
+
+        company_codes, companies = cls._encode(data["company_name"])
+        industry_codes, industries = cls._encode(data["industry"])
+        indicator_codes, indicators = cls._encode(data["indicator"])
+
+        entity_codes, entity_company, entity_industry = cls._build_entities(
+            company_codes, industry_codes, len(industries)
+        )
+
+        # 字典编码的指标轴：每个指标记录一次所属类别，类别缺失的指标编码为-1
+        if "category" in data.columns:
+            row_category_codes, categories = cls._encode(data["category"])
+        else:
+            row_category_codes = np.zeros(len(data), dtype=np.int8)
+            categories = np.array([""], dtype=object)
+        indicator_category_codes = np.full(len(indicators), -1, dtype=np.int8)
+        has_category = row_category_codes >= 0
+        indicator_category_codes[indicator_codes[has_category]] = row_category_codes[
+            has_category
+        ]
+
+        return cls(
+            entity_codes.astype(cls._code_dtype(len(entity_company))),
+            indicator_codes.astype(cls._code_dtype(len(indicators))),
+            data["value"].to_numpy(dtype=np.float32),
+            companies,
+            industries,
+            entity_company.astype(cls._code_dtype(len(companies))),
+            entity_industry.astype(cls._code_dtype(len(industries))),
+            indicators,
+            categories,
+            indicator_category_codes,
+        )
+
+    @classmethod
+    def from_wide(
+        cls, company_names, industries, matrix, indicators, indicator_categories
+    ):
+        """
+        从横向指标矩阵（公司 × 指标）构建，缺失值（NaN）不会生成行
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        company_names, industries = pd.Series(company_names), pd.Series(industries)
+        valid = (company_names.notna() & industries.notna()).to_numpy()
+        if not valid.all():
+            print(f"警告: 有{int((~valid).sum())}家公司缺少公司或行业名称，已忽略")
+            company_names, industries = company_names[valid], industries[valid]
+            matrix = matrix[valid]
+
+        company_codes, companies = cls._encode(company_names)
+        industry_codes, industry_values = cls._encode(industries)
+        entity_codes, entity_company, entity_industry = cls._build_entities(
+            company_codes, industry_codes, len(industry_values)
+        )
+        category_codes, categories = cls._encode(pd.Series(indicator_categories))
+
+        rows, cols = np.nonzero(~np.isnan(matrix))
+        return cls(
+            entity_codes[rows].astype(cls._code_dtype(len(entity_company))),
+            cols.astype(cls._code_dtype(len(indicators))),
+            matrix[rows, cols],
+            companies,
+            industry_values,
+            entity_company.astype(cls._code_dtype(len(companies))),
+            entity_industry.astype(cls._code_dtype(len(industry_values))),
+            np.asarray(indicators, dtype=object),
+            categories,
+            category_codes.astype(np.int8),
+        )
+
+    def entity_frame(self):
+        """
+        实体（公司，行业）表，使用分类类型而非对象字符串列
+        """
+        return pd.DataFrame(
+            {
+                "company_name": pd.Categorical.from_codes(
+                    self.entity_company_codes, self.companies
+                ),
+                "industry": pd.Categorical.from_codes(
+                    self.entity_industry_codes, self.industries
+                ),
+            }
+        )
+
+    def to_wide(self, fill_value=np.nan):
+        """
+        散射为横向指标矩阵（实体 × 指标），返回 (实体表, 矩阵)
+        """
+        matrix = np.full(
+            (self.n_entities, len(self.indicators)), fill_value, dtype=np.float32
+        )
+        matrix[self.entity_codes, self.indicator_codes] = self.values
+        return self.entity_frame(), matrix
+
+    def pivot(self, fill_value=np.nan):
+        """
+        长格式转横向矩阵的散射内核
+        按编码计算每个单元格的线性位置并直接累加到预分配数组中，
+        重复单元格取平均值，缺失单元格以fill_value填充，二者数量均在结果中显式给出
+        """
+        n_entities, n_indicators = self.n_entities, len(self.indicators)
+        observed = ~np.isnan(self.values)
+        cells = self.entity_codes[observed].astype(np.int64) * n_indicators
+        cells += self.indicator_codes[observed]
+
+        counts = np.bincount(cells, minlength=n_entities * n_indicators)
+        sums = np.bincount(
+            cells, weights=self.values[observed], minlength=n_entities * n_indicators
+        )
+        counts = counts.reshape(n_entities, n_indicators)
+        sums = sums.reshape(n_entities, n_indicators)
+
+        # 没有任何观测值的指标不生成列（与pivot_table的行为一致）
+        present = counts.any(axis=0)
+        counts, sums = counts[:, present], sums[:, present]
+
+        matrix = np.full(counts.shape, fill_value, dtype=np.float64)
+        filled = counts > 0
+        matrix[filled] = sums[filled] / counts[filled]
+
+        return {
+            "entities": self.entity_frame(),
+            "indicators": self.indicators[present],
+            "matrix": matrix,
+            "duplicates": int(np.count_nonzero(counts > 1)),
+            "missing": int(np.count_nonzero(~filled)),
+        }
+
+    def to_frame(self):
+        """
+        还原为长格式DataFrame，字符串维度均为分类类型
+        """
+        return pd.DataFrame(
+            {
+                "company_name": pd.Categorical.from_codes(
+                    self.entity_company_codes[self.entity_codes], self.companies
+                ),
+                "industry": pd.Categorical.from_codes(
+                    self.entity_industry_codes[self.entity_codes], self.industries
+                ),
+                "category": pd.Categorical.from_codes(
+                    self.indicator_category_codes[self.indicator_codes],
+                    self.categories,
+                ),
+                "indicator": pd.Categorical.from_codes(
+                    self.indicator_codes, self.indicators
+                ),
+                "value": self.values,
+            }
+        )
+
+
+def _has_pyarrow():
+    """
+    检查是否安装了pyarrow
+    """
+    try:
+        import pyarrow  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def _to_float(value):
+    """
+    将单元格值转换为浮点数，空值和无法解析的文本记为NaN
+    """
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _ColumnBuffer:
+    """
+    流式合并单列数据的累积缓冲区
+    分类列只累积整数编码并增量维护类别字典，其余列写入按倍数扩容的数组
+    """
+
+    def __init__(self):
+        self.values = None
+        self.size = 0
+        self.categories = None
+
+    def append(self, part):
+        if isinstance(part.dtype, pd.CategoricalDtype):
+            if self.categories is None:
+                self.categories = pd.Index([], dtype=object)
+            # 新类别追加到字典末尾，已写入的编码保持不变
+            self.categories = self.categories.append(
+                part.cat.categories.difference(self.categories, sort=False)
+            )
+            mapping = self.categories.get_indexer(part.cat.categories)
+            codes = part.cat.codes.to_numpy()
+            # 整批为空值时没有类别，只能按观测到的编码查表
+            mapped = np.full(len(codes), -1, dtype=np.int32)
+            observed = codes >= 0
+            mapped[observed] = mapping[codes[observed]]
+            self._write(mapped)
+        else:
+            self._write(part.to_numpy())
+
+    def _write(self, data):
+        if self.values is None:
+            self.values = np.empty(max(len(data), 1024), dtype=data.dtype)
+        elif data.dtype != self.values.dtype:
+            # 各批次推断的类型不同时提升为共同类型，无法提升时改用object
+            try:
+                dtype = np.result_type(self.values.dtype, data.dtype)
+            except TypeError:
+                dtype = np.dtype(object)
+            self.values = self.values.astype(dtype)
+
+        needed = self.size + len(data)
+        if needed > len(self.values):
+            grown = np.empty(max(needed, 2 * len(self.values)), dtype=self.values.dtype)
+            grown[: self.size] = self.values[: self.size]
+            self.values = grown
+        self.values[self.size : needed] = data
+        self.size = needed
+
+    def result(self):
+        values = self.values[: self.size]
+        if self.categories is not None:
+            return pd.Categorical.from_codes(values, self.categories)
+        return values
+
+
+def _concat_batches(batches, on_batch=None):
+    """
+    依次合并各批数据：只有一批时直接返回该批，
+    多批时逐批并入各列的累积缓冲区，不同时保留全部批次；on_batch在每批读出后调用
+    """
+    first = None
+    buffers = None
+    for batch in batches:
+        if on_batch is not None:
+            on_batch(batch)
+        if first is None and buffers is None:
+            first = batch
+            continue
+        if buffers is None:
+            buffers = {col: _ColumnBuffer() for col in first.columns}
+            for col in first.columns:
+                buffers[col].append(first[col])
+            first = None
+        for col in batch.columns:
+            buffers[col].append(batch[col])
+
+    if buffers is not None:
+        return pd.DataFrame({col: buffer.result() for col, buffer in buffers.items()})
+    return first if first is not None else pd.DataFrame()
+
+
+class _BatchValidator:
+    """
+    逐批验证公司数据：必要列在第一批检查，不在支持列表中的行业跨批次汇总后统一提示
+    """
+
+    REQUIRED_COLUMNS = ["company_name", "industry"]
+
+    def __init__(self, supported_industries):
+        self.supported_industries = supported_industries
+        self.checked = False
+        self.problem = None
+        self.invalid_industries = {}
+
+    def check(self, batch):
+        if not self.checked:
+            self.checked = True
+            missing_columns = [
+                col for col in self.REQUIRED_COLUMNS if col not in batch.columns
+            ]
+            if missing_columns:
+                self.problem = f"缺少必要列: {missing_columns}"
+        if self.problem is not None:
+            return
+
+        industries = batch["industry"]
+        invalid = industries[~industries.isin(self.supported_industries)].unique()
+        for industry in invalid:
+            # 以文本为键去重，空值（NaN）也只记录一次
+            self.invalid_industries.setdefault(str(industry), industry)
+
+    def finish(self):
+        """
+        结束验证，返回问题描述（没有问题时为None）
+        """
+        if self.invalid_industries:
+            print(
+                "警告: 发现不在支持列表中的行业: "
+                f"{np.array(list(self.invalid_industries.values()))}"
+            )
+        return self.problem
+
+
+def _import_pyarrow():
+    """
+    检查pyarrow可用，未安装时给出明确的错误提示
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError("读取Parquet/Feather文件需要安装pyarrow: pip install pyarrow")
+
+
 # 使用示例
 if __name__ == "__main__":
     processor = ESGDataProcessor()
@@ -0,0 +1,303 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+
+class StreamingExporter:
+    """
+    分块流式导出
+    数据按固定行数分块写出，内存占用只与块大小有关：
+    CSV/CSV.GZ逐块追加，Parquet按块写入行组，Feather按块写入IPC记录批，
+    Excel使用openpyxl的只写模式逐行写入
+    """
+
+    # 导出格式到文件后缀的映射
+    FORMATS = {
+        "CSV": ".csv",
+        "CSV.GZ": ".csv.gz",
+        "Parquet": ".parquet",
+        "Feather": ".feather",
+        "Excel": ".xlsx",
+    }
+
+    # Excel单个工作表可写入的最大数据行数（不含表头）
+    EXCEL_MAX_ROWS = 1048575
+
+    def __init__(self, chunk_rows=100000):
+        self.chunk_rows = chunk_rows
+
+    def suffix(self, format_type):
+        if format_type not in self.FORMATS:
+            raise ValueError(f"不支持的导出格式: {format_type}")
+        return self.FORMATS[format_type]
+
+    def iter_chunks(self, source):
+        """
+        将数据源统一为DataFrame块的迭代
+        source可以是DataFrame，也可以是逐块产出DataFrame的迭代器（如评分存储的分页查询）
+        """
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, max(len(source), 1), self.chunk_rows):
+                yield source.iloc[start : start + self.chunk_rows]
+        else:
+            yield from source
+
+    def export(self, source, format_type, path=None, total_rows=None, progress=None):
+        """
+        导出数据到文件，返回文件路径
+        progress(已写行数, 总行数) 在每块写完后调用；总行数未知时为None
+        """
+        suffix = self.suffix(format_type)
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=suffix, prefix="esg_export_")
+            os.close(fd)
+        if total_rows is None and isinstance(source, pd.DataFrame):
+            total_rows = len(source)
+
+        writer = {
+            "CSV": self._write_csv,
+            "CSV.GZ": self._write_csv_gz,
+            "Parquet": self._write_parquet,
+            "Feather": self._write_feather,
+            "Excel": self._write_excel,
+        }[format_type]
+
+        try:
+            for written in writer(self.iter_chunks(source), path):
+                if progress is not None:
+                    progress(written, total_rows)
+        except BaseException:
+            # 导出失败时删除写了一半的文件，避免留下截断的导出结果
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def _write_csv(self, chunks, path):
+        # utf-8-sig便于Excel直接打开中文CSV
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            yield from self._write_csv_chunks(chunks, f)
+
+    def _write_csv_gz(self, chunks, path):
+        # 压缩级别取5：体积接近默认的9级，写出速度快得多
+        with gzip.open(
+            path, "wt", compresslevel=5, encoding="utf-8-sig", newline=""
+        ) as f:
+            yield from self._write_csv_chunks(chunks, f)
+
+    def _write_csv_chunks(self, chunks, f):
+        written = 0
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=i == 0, index=False)
+            written += len(chunk)
+            yield written
+
+    def _arrow_batches(self, chunks):
+        """
+        将DataFrame块转换为Arrow表，并以第一块的schema为准统一后续块
+        """
+        import pyarrow as pa
+
+        schema = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            schema = schema or table.schema
+            yield table
+
+    def _write_parquet(self, chunks, path):
+        import pyarrow.parquet as pq
+
+        writer = None
+        written = 0
+        try:
+            for table in self._arrow_batches(chunks):
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                writer.write_table(table)
+                written += table.num_rows
+                yield written
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _write_feather(self, chunks, path):
+        import pyarrow.ipc
+
+        writer = None
+        written = 0
+        try:
+            for table in self._arrow_batches(chunks):
+                if writer is None:
+                    writer = pyarrow.ipc.new_file(
+                        path,
+                        table.schema,
+                        options=pyarrow.ipc.IpcWriteOptions(compression="lz4"),
+                    )
+                writer.write_table(table)
+                written += table.num_rows
+                yield written
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _write_excel(self, chunks, path):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = None
+        sheet_rows = 0
+        written = 0
+        try:
+            for chunk in chunks:
+                header = [str(col) for col in chunk.columns]
+                values = chunk.astype(object).where(chunk.notna(), None)
+                for row in values.itertuples(index=False, name=None):
+                    # 超过Excel单表行数上限时续写到新工作表
+                    if sheet is None or sheet_rows >= self.EXCEL_MAX_ROWS:
+                        sheet = workbook.create_sheet(
+                            f"Sheet{len(workbook.worksheets) + 1}"
+                        )
+                        sheet.append(header)
+                        sheet_rows = 0
+                    sheet.append(row)
+                    sheet_rows += 1
+                written += len(chunk)
+                yield written
+        except BaseException:
+            # 失败时关闭已创建工作表的临时写入流，不保存工作簿
+            for worksheet in workbook.worksheets:
+                worksheet.close()
+            raise
+
+        if sheet is None:
+            workbook.create_sheet("Sheet1")
+        # 只在全部数据写完后保存，失败时不生成文件
+        workbook.save(path)
+
+
+class ExportStore:
+    """
+    受管理的导出目录
+    导出文件按内容哈希和格式寻址：相同内容重复导出时直接返回已有文件；
+    目录总大小和文件存活时间设有上限，超出时按最近最少使用顺序淘汰
+    """
+
+    def __init__(self, root_dir=None, max_bytes=2 * 1024**3, max_age=7 * 24 * 3600):
+        self.root_dir = root_dir or os.path.join(tempfile.gettempdir(), "esg_exports")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def content_key(self, payload, format_type, *variant):
+        """
+        计算导出内容的哈希键
+        payload可以是DataFrame、字符串或字节串
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{format_type}|{'|'.join(map(str, variant))}".encode())
+        if isinstance(payload, pd.DataFrame):
+            digest.update(
+                "|".join(
+                    f"{col}:{dtype}" for col, dtype in payload.dtypes.items()
+                ).encode()
+            )
+            digest.update(
+                pd.util.hash_pandas_object(payload, index=False).to_numpy().tobytes()
+            )
+        elif isinstance(payload, str):
+            digest.update(payload.encode("utf-8"))
+        else:
+            digest.update(bytes(payload))
+        return digest.hexdigest()
+
+    def _lookup(self, key):
+        """
+        查找键对应的已有文件，命中时刷新访问时间用于LRU淘汰
+        """
+        entry_dir = os.path.join(self.root_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None
+        for name in os.listdir(entry_dir):
+            path = os.path.join(entry_dir, name)
+            os.utime(path)
+            return path
+        return None
+
+    def get_or_create(self, key, filename, writer):
+        """
+        返回键对应的导出文件；不存在时调用writer(临时路径)写出后原子移动到位
+        """
+        with self._lock:
+            path = self._lookup(key)
+        if path is not None:
+            return path
+
+        staging_dir = tempfile.mkdtemp(prefix=f".{key}.", dir=self.root_dir)
+        try:
+            writer(os.path.join(staging_dir, filename))
+            with self._lock:
+                path = self._lookup(key)
+                if path is None:
+                    os.replace(staging_dir, os.path.join(self.root_dir, key))
+                    path = os.path.join(self.root_dir, key, filename)
+                else:
+                    # 并发导出了相同内容，保留先完成的文件
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        self.evict(keep=key)
+        return path
+
+    def _entries(self):
+        """
+        列出导出条目：(最近访问时间, 占用字节数, 键)
+        """
+        entries = []
+        for name in os.listdir(self.root_dir):
+            entry_dir = os.path.join(self.root_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            files = [os.path.join(entry_dir, f) for f in os.listdir(entry_dir)]
+            if not files:
+                continue
+            entries.append(
+                (
+                    max(os.path.getmtime(f) for f in files),
+                    sum(os.path.getsize(f) for f in files),
+                    name,
+                )
+            )
+        return entries
+
+    def evict(self, keep=None):
+        """
+        先删除超过存活时间的条目，再按LRU顺序淘汰直到总大小不超过上限
+        keep指定的条目（刚返回给调用方的文件）不会被淘汰
+        """
+        with self._lock:
+            now = time.time()
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, key in entries:
+                if key == keep:
+                    continue
+                if now - mtime > self.max_age or total > self.max_bytes:
+                    shutil.rmtree(os.path.join(self.root_dir, key), ignore_errors=True)
+                    total -= size
+
+    def clear(self):
+        """
+        清空导出目录
+        """
+        with self._lock:
+            for _, _, key in self._entries():
+                shutil.rmtree(os.path.join(self.root_dir, key), ignore_errors=True)
@@ -3,9 +3,120 @@ import pandas as pd
 from scipy.optimize import minimize
 import warnings
 
+from esg_ahp import AHPEngine
+from esg_sparse import SparseESGScorer, SparseIndicatorMatrix
+
 warnings.filterwarnings("ignore")
 
 
+class RatingBands:
+    """
+    ESG评级分档
+    分档以升序阈值数组表示（得分不低于第i个阈值即进入第i+1档），
+    整列得分用np.searchsorted一次得到档位编码，再按编码查找评级和说明；
+    可为个别行业单独设置阈值，也可按得分分位数生成阈值
+    """
+
+    DEFAULT_THRESHOLDS = (40, 60, 80)
+    DEFAULT_LABELS = ("较差", "一般", "良好", "优秀")
+    DEFAULT_DESCRIPTIONS = (
+        "ESG表现不佳，存在较大风险，需要全面改进",
+        "ESG表现中等，需要改进部分领域",
+        "ESG表现较好，具备一定可持续发展能力",
+        "ESG表现卓越，可持续发展能力强",
+    )
+
+    def __init__(
+        self,
+        thresholds=None,
+        labels=None,
+        descriptions=None,
+        industry_thresholds=None,
+    ):
+        self.thresholds = self._check_thresholds(
+            self.DEFAULT_THRESHOLDS if thresholds is None else thresholds
+        )
+        self.labels = np.array(
+            self.DEFAULT_LABELS if labels is None else labels, dtype=object
+        )
+        self.descriptions = np.array(
+            self.DEFAULT_DESCRIPTIONS if descriptions is None else descriptions,
+            dtype=object,
+        )
+        if len(self.labels) != len(self.thresholds) + 1 or len(
+            self.descriptions
+        ) != len(self.labels):
+            raise ValueError("评级数量必须比阈值数量多一个，且与说明数量一致")
+
+        # 行业单独的阈值表：{行业: 阈值数组}
+        self.industry_thresholds = {
+            str(industry): self._check_thresholds(values)
+            for industry, values in (industry_thresholds or {}).items()
+        }
+        for values in self.industry_thresholds.values():
+            if len(values) != len(self.thresholds):
+                raise ValueError("行业阈值数量必须与默认阈值数量一致")
+
+    @staticmethod
+    def _check_thresholds(values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 1 or np.any(np.diff(values) < 0):
+            raise ValueError("评级阈值必须是升序的一维数组")
+        return values
+
+    @classmethod
+    def from_percentiles(
+        cls, scores, quantiles=(0.2, 0.5, 0.8), industries=None, **kwargs
+    ):
+        """
+        按得分分位数生成分档阈值；提供industries时各行业分别取分位数
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        valid = ~np.isnan(scores)
+        thresholds = np.quantile(scores[valid], quantiles)
+        industry_thresholds = None
+        if industries is not None:
+            industries = np.asarray(industries).astype(str)
+            industry_thresholds = {
+                name: np.quantile(scores[valid & (industries == name)], quantiles)
+                for name in np.unique(industries[valid])
+            }
+        return cls(thresholds, industry_thresholds=industry_thresholds, **kwargs)
+
+    def codes(self, scores, industries=None):
+        """
+        整列得分的档位编码（0为最低档），缺失得分归入最低档
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        codes = np.searchsorted(self.thresholds, scores, side="right")
+        if industries is not None and self.industry_thresholds:
+            industries = np.asarray(industries).astype(str)
+            for name, thresholds in self.industry_thresholds.items():
+                mask = industries == name
+                if mask.any():
+                    codes[mask] = np.searchsorted(
+                        thresholds, scores[mask], side="right"
+                    )
+        codes[np.isnan(scores)] = 0
+        return codes
+
+    def assign(self, scores, industries=None):
+        """
+        返回 (评级数组, 说明数组)
+        """
+        codes = self.codes(scores, industries)
+        return self.labels[codes], self.descriptions[codes]
+
+    def interpret(self, score, industry=None):
+        """
+        单个得分的 (评级, 说明)
+        """
+        labels, descriptions = self.assign(
+            [score], None if industry is None else [industry]
+        )
+        return labels[0], descriptions[0]
+
+
 class ESGModel:
     """
     ESG评分模型
@@ -68,6 +179,9 @@ class ESGModel:
         # 保持向后兼容
         self.industry_weights = self.params["industry_weights"]
 
+        # 评级分档（可替换为自定义阈值、行业阈值或分位数分档）
+        self.rating_bands = RatingBands()
+
         # 行业名称映射
         self.industry_mapping = {
             "制造业": "制造",
@@ -210,7 +324,7 @@ class ESGModel:
 
         # 1. 缺失值处理
         for column in processed_data.columns:
-            if processed_data[column].dtype in ["float64", "int64"]:
+            if pd.api.types.is_numeric_dtype(processed_data[column]):
                 # 数值型：用中位数填充
                 processed_data[column].fillna(
                     processed_data[column].median(), inplace=True
@@ -244,13 +358,9 @@ class ESGModel:
         if len(processed_data) == 1:
             # 对于单行数据，使用基于指标理想值的标准化
             for column in numeric_columns:
-                value = processed_data[column].iloc[0]
-                if column in self.negative_indicators:
-                    # 负向指标：值越小越好，理想值为0，最大容忍值为100
-                    processed_data[column] = max(0, (100 - value) / 100)
-                else:
-                    # 正向指标：值越大越好，理想值为100，最小值为0
-                    processed_data[column] = max(0, min(1, value / 100))
+                processed_data[column] = self.normalize_single_value(
+                    column, processed_data[column].iloc[0]
+                )
         else:
             # 多行数据使用原有的标准化方法
             for column in numeric_columns:
@@ -278,6 +388,16 @@ class ESGModel:
 
         return processed_data
 
+    def normalize_single_value(self, column, value):
+        """
+        单公司数据的指标标准化（基于指标理想值，不依赖样本分布）
+        """
+        if column in self.negative_indicators:
+            # 负向指标：值越小越好，理想值为0，最大容忍值为100
+            return max(0, (100 - value) / 100)
+        # 正向指标：值越大越好，理想值为100，最小值为0
+        return max(0, min(1, value / 100))
+
     def calculate_vif(self, data):
         """
         计算方差膨胀因子(VIF)检测多重共线性
@@ -318,25 +438,13 @@ class ESGModel:
         except Exception:
             return 1.0
 
-    def calculate_ahp_weights(self, comparison_matrix):
+    def calculate_ahp_weights(self, comparison_matrix, method="geometric"):
         """
-        计算AHP主观权重
+        计算AHP主观权重，返回 (权重, 一致性比率CR)
+        多位专家的判断矩阵栈请使用 AHPEngine.aggregate
         """
-        # 计算几何平均
-        n = comparison_matrix.shape[0]
-        geometric_means = np.power(np.prod(comparison_matrix, axis=1), 1 / n)
-
-        # 归一化得到权重
-        weights = geometric_means / np.sum(geometric_means)
-
-        # 一致性检验
-        lambda_max = np.sum(np.dot(comparison_matrix, weights) / weights) / n
-        ci = (lambda_max - n) / (n - 1)
-        ri_values = {3: 0.58, 4: 0.90, 5: 1.12, 6: 1.24, 7: 1.32, 8: 1.41, 9: 1.45}
-        ri = ri_values.get(n, 1.0)
-        cr = ci / ri if ri > 0 else 0
-
-        return weights, cr
+        result = AHPEngine(method=method).evaluate(comparison_matrix)
+        return result["weights"][0], float(result["cr"][0])
 
     def calculate_entropy_weights(self, data):
         """
@@ -376,12 +484,12 @@ class ESGModel:
         # 避免所有权重为0的情况
         if g.sum() == 0 or np.isnan(g.sum()):
             # 如果所有权重都是0或NaN，使用均匀权重
-            weights = pd.Series(np.ones(n) / n, index=data.columns)
+            weights = np.ones(n) / n
         else:
             # 归一化权重
             weights = g / g.sum()
 
-        return weights.values
+        return np.asarray(weights)
 
     def combine_weights(self, subjective_weights, objective_weights, alpha=0.5):
         """
@@ -475,10 +583,40 @@ class ESGModel:
 
         return e_score, s_score, g_score
 
-    def calculate_base_score(self, e_score, s_score, g_score, industry="默认"):
+    def indicator_pillars(self, columns):
         """
-        计算Base Score（显式交叉项法）
-        基于甲模型整合性原则，考虑E、S、G维度的联动效应
+        各指标所属维度编码：0=E、1=S、2=G，不属于任何维度为-1
+        """
+        columns = np.asarray(list(columns), dtype=object)
+        pillars = np.full(len(columns), -1, dtype=np.int8)
+        for p, names in enumerate(
+            [self.e_indicators, self.s_indicators, self.g_indicators]
+        ):
+            pillars[np.isin(columns, names)] = p
+        return pillars
+
+    def expand_pillar_weights(self, pillar_weights, pillars):
+        """
+        将E、S、G维度权重在各维度的指标间均分，得到指标级主观权重
+        不属于任何维度的指标权重为0，没有指标的维度的权重按比例分给其余维度；
+        所有指标都不属于任何维度时使用均匀权重
+        """
+        pillars = np.asarray(pillars)
+        counts = np.bincount(pillars[pillars >= 0], minlength=3)
+        per_indicator = np.divide(
+            np.asarray(pillar_weights, dtype=np.float64),
+            counts,
+            out=np.zeros(3),
+            where=counts > 0,
+        )
+        weights = np.where(pillars >= 0, per_indicator[np.maximum(pillars, 0)], 0.0)
+        if weights.sum() <= 0:
+            return np.full(len(pillars), 1.0 / max(len(pillars), 1))
+        return weights / weights.sum()
+
+    def get_pillar_weights(self, industry="默认"):
+        """
+        获取行业的E、S、G维度权重 (α, β, γ)
         """
         # 处理行业名称映射
         mapped_industry = self.industry_mapping.get(industry, industry)
@@ -490,7 +628,14 @@ class ESGModel:
             print(f"警告：未找到行业'{industry}'的权重配置，使用默认权重")
             weights = self.params["industry_weights"]["默认"]
 
-        alpha, beta, gamma = weights["E"], weights["S"], weights["G"]
+        return weights["E"], weights["S"], weights["G"]
+
+    def calculate_base_score(self, e_score, s_score, g_score, industry="默认"):
+        """
+        计算Base Score（显式交叉项法）
+        基于甲模型整合性原则，考虑E、S、G维度的联动效应
+        """
+        alpha, beta, gamma = self.get_pillar_weights(industry)
 
         # 获取可配置的交叉项系数
         cross_coeffs = self.params["cross_term_coeffs"]
@@ -591,9 +736,12 @@ class ESGModel:
         subjective_weights=None,
         alpha=0.5,
         jia_model_params=None,
+        stage_cache=None,
     ):
         """
         计算完整的ESG评分（基于甲模型设计理念）
+        stage_cache为同一份数据的分阶段缓存（esg_cache.StageCache），
+        给出时预处理、熵权、组合权重和维度得分按其依赖的参数复用
         """
         # 应用甲模型参数（如果提供）
         if jia_model_params is not None:
@@ -602,67 +750,123 @@ class ESGModel:
             if "alpha" in jia_model_params:
                 alpha = jia_model_params["alpha"]
 
-        # 1. 数据预处理
-        processed_data = self.preprocess_data(data)
+        coverage = None
+        if isinstance(data, SparseIndicatorMatrix):
+            # 宽指标稀疏模式：预处理、赋权和维度汇总只在已填报单元格上进行
+            scorer = SparseESGScorer(self)
+            processed_data = self._stage(
+                stage_cache, ("preprocess",), lambda: scorer.preprocess(data)
+            )
+            objective_weights = self._stage(
+                stage_cache,
+                ("entropy",),
+                lambda: scorer.entropy_weights(processed_data),
+            )
+            weight_key = (
+                float(alpha),
+                tuple(self.get_pillar_weights(industry)),
+                None
+                if subjective_weights is None
+                else np.asarray(subjective_weights, dtype=np.float64).tobytes(),
+            )
+            final_weights = self._stage(
+                stage_cache,
+                ("weights",) + weight_key,
+                lambda: scorer.weights(
+                    processed_data,
+                    industry,
+                    subjective_weights,
+                    alpha,
+                    objective_weights=objective_weights,
+                ),
+            )
+            e_score, s_score, g_score, coverage = self._stage(
+                stage_cache,
+                ("factors",) + weight_key,
+                lambda: scorer.pillar_scores(processed_data, final_weights),
+            )
+        else:
+            # 1. 数据预处理
+            processed_data = self._stage(
+                stage_cache, ("preprocess",), lambda: self.preprocess_data(data)
+            )
 
-        # 2. 权重计算
-        if subjective_weights is None:
-            # 使用甲模型的行业差异化权重
-            # 确保industry_weights是字典类型
-            if not isinstance(self.params["industry_weights"], dict):
-                print(
-                    f"错误：industry_weights应该是字典类型，但得到了{type(self.params['industry_weights'])}"
-                )
-                # 使用默认权重
-                self.params["industry_weights"] = self.default_industry_weights.copy()
-
-            # 获取行业权重
-            industry_weights = self.params["industry_weights"].get(industry)
-            if industry_weights is None:
-                # 如果没有找到对应行业，使用默认权重
-                industry_weights = self.params["industry_weights"].get("默认")
+            # 2. 权重计算
+            if subjective_weights is None:
+                # 使用甲模型的行业差异化权重
+                # 确保industry_weights是字典类型
+                if not isinstance(self.params["industry_weights"], dict):
+                    print(
+                        f"错误：industry_weights应该是字典类型，但得到了{type(self.params['industry_weights'])}"
+                    )
+                    # 使用默认权重
+                    self.params["industry_weights"] = (
+                        self.default_industry_weights.copy()
+                    )
+
+                # 获取行业权重
+                industry_weights = self.params["industry_weights"].get(industry)
                 if industry_weights is None:
-                    # 如果连默认权重都没有，创建一个
+                    # 如果没有找到对应行业，使用默认权重
+                    industry_weights = self.params["industry_weights"].get("默认")
+                    if industry_weights is None:
+                        # 如果连默认权重都没有，创建一个
+                        industry_weights = {"E": 0.33, "S": 0.33, "G": 0.34}
+
+                # 确保获取到的权重也是字典类型
+                if not isinstance(industry_weights, dict):
+                    print(
+                        f"错误：行业权重应该是字典类型，但得到了{type(industry_weights)}"
+                    )
+                    # 使用默认权重
                     industry_weights = {"E": 0.33, "S": 0.33, "G": 0.34}
 
-            # 确保获取到的权重也是字典类型
-            if not isinstance(industry_weights, dict):
-                print(f"错误：行业权重应该是字典类型，但得到了{type(industry_weights)}")
-                # 使用默认权重
-                industry_weights = {"E": 0.33, "S": 0.33, "G": 0.34}
+                # 确保权重包含必需的键
+                if not all(key in industry_weights for key in ["E", "S", "G"]):
+                    print(f"错误：行业权重缺少必需的键，当前权重：{industry_weights}")
+                    industry_weights = {"E": 0.33, "S": 0.33, "G": 0.34}
 
-            # 确保权重包含必需的键
-            if not all(key in industry_weights for key in ["E", "S", "G"]):
-                print(f"错误：行业权重缺少必需的键，当前权重：{industry_weights}")
-                industry_weights = {"E": 0.33, "S": 0.33, "G": 0.34}
+                # 按各指标实际所属维度分配（而非按列数三等分）
+                subjective_weights = self.expand_pillar_weights(
+                    np.array(
+                        [
+                            industry_weights["E"],
+                            industry_weights["S"],
+                            industry_weights["G"],
+                        ]
+                    ),
+                    self.indicator_pillars(processed_data.columns),
+                )
 
-            subjective_weights = np.array(
-                [industry_weights["E"], industry_weights["S"], industry_weights["G"]]
+            else:
+                # 外部主观权重（如 AHPEngine.aggregate 的结果）需与指标一一对应
+                subjective_weights = np.asarray(subjective_weights, dtype=np.float64)
+                if len(subjective_weights) != processed_data.shape[1]:
+                    raise ValueError(
+                        f"主观权重数量({len(subjective_weights)})与指标数量"
+                        f"({processed_data.shape[1]})不一致"
+                    )
+
+            objective_weights = self._stage(
+                stage_cache,
+                ("entropy",),
+                lambda: self.calculate_entropy_weights(processed_data),
             )
-            # 扩展到所有指标
-            n_indicators = processed_data.shape[1]
-            e_indicators = n_indicators // 3
-            s_indicators = n_indicators // 3
-            g_indicators = n_indicators - e_indicators - s_indicators
-
-            expanded_weights = np.concatenate(
-                [
-                    np.full(e_indicators, subjective_weights[0] / e_indicators),
-                    np.full(s_indicators, subjective_weights[1] / s_indicators),
-                    np.full(g_indicators, subjective_weights[2] / g_indicators),
-                ]
+            weight_key = (float(alpha), subjective_weights.tobytes())
+            final_weights = self._stage(
+                stage_cache,
+                ("weights",) + weight_key,
+                lambda: self.combine_weights(
+                    subjective_weights, objective_weights, alpha
+                ),
             )
-            subjective_weights = expanded_weights
-
-        objective_weights = self.calculate_entropy_weights(processed_data)
-        final_weights = self.combine_weights(
-            subjective_weights, objective_weights, alpha
-        )
 
-        # 3. 因子得分计算
-        e_score, s_score, g_score = self.calculate_factor_scores(
-            processed_data, final_weights
-        )
+            # 3. 因子得分计算
+            e_score, s_score, g_score = self._stage(
+                stage_cache,
+                ("factors",) + weight_key,
+                lambda: self.calculate_factor_scores(processed_data, final_weights),
+            )
 
         # 4. Base Score计算（使用甲模型交叉项）
         base_score = self.calculate_base_score(e_score, s_score, g_score, industry)
@@ -700,20 +904,30 @@ class ESGModel:
             "g_score": g_score,
             "weights": final_weights,
             "processed_data": processed_data,
+            "coverage": coverage,
+            "events": events,
             "jia_model_params": jia_model_params or {},
         }
 
         return results
 
-    def get_score_interpretation(self, score):
+    @staticmethod
+    def _stage(stage_cache, key, compute):
+        """
+        计算一个评分阶段，有分阶段缓存时按键复用
+        """
+        if stage_cache is None:
+            return compute()
+        return stage_cache.get_or_compute(key, compute)
+
+    def get_score_interpretation(self, score, industry=None):
         """
         ESG评分解释
         """
-        if score >= 80:
-            return "优秀", "ESG表现卓越，可持续发展能力强"
-        elif score >= 60:
-            return "良好", "ESG表现较好，具备一定可持续发展能力"
-        elif score >= 40:
-            return "一般", "ESG表现中等，需要改进部分领域"
-        else:
-            return "较差", "ESG表现不佳，存在较大风险，需要全面改进"
+        return self.rating_bands.interpret(score, industry)
+
+    def assign_ratings(self, scores, industries=None):
+        """
+        批量评级：返回 (评级数组, 说明数组)
+        """
+        return self.rating_bands.assign(scores, industries)
@@ -0,0 +1,126 @@
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+def top_k(values, k, largest=True):
+    """
+    取最高（或最低）的k个值的位置，按名次排列
+    用argpartition只做部分选择，只对选出的k个排序；并列时位置靠前者优先，
+    与稳定全排序后取前k个的结果一致，缺失值排在最后
+    """
+    values = np.asarray(values, dtype=np.float64)
+    k = max(0, min(int(k), len(values)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    keys = -values if largest else values
+    missing = np.isnan(keys)
+    valid = np.flatnonzero(~missing)
+    if len(valid) < len(keys):
+        keys = keys[valid]
+    else:
+        valid = None
+
+    n_valid = len(keys)
+    if k >= n_valid:
+        selected = np.arange(n_valid)
+    else:
+        # 第k名的分值；严格优于它的全部入选，等于它的按位置取前几个补足
+        kth = np.partition(keys, k - 1)[k - 1]
+        better = np.flatnonzero(keys < kth)
+        tied = np.flatnonzero(keys == kth)[: k - len(better)]
+        selected = np.concatenate([better, tied])
+    selected = selected[np.lexsort((selected, keys[selected]))]
+
+    if valid is not None:
+        selected = valid[selected]
+        if len(selected) < k:
+            selected = np.concatenate(
+                [selected, np.flatnonzero(missing)[: k - len(selected)]]
+            )
+    return selected
+
+
+def group_top_k(values, groups, k, largest=True):
+    """
+    按分组（如行业、报告期）分别取前k名，返回 {分组: 位置数组}
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, names = pd.factorize(np.asarray(groups), sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+    return {
+        name: order[bounds[i] : bounds[i + 1]][
+            top_k(values[order[bounds[i] : bounds[i + 1]]], k, largest)
+        ]
+        for i, name in enumerate(names)
+    }
+
+
+class StreamingTopK:
+    """
+    分块流式维护前k名
+    每块先用argpartition选出块内前k名，再并入大小为k的堆，
+    全部结果无需同时驻留内存或整体排序；指定by时按该列分组各自维护
+    """
+
+    def __init__(self, k, column="ESG总分", largest=True, by=None):
+        self.k = int(k)
+        self.column = column
+        self.largest = largest
+        self.by = by
+        self.columns = None
+        self._heaps = {}
+        self._sequence = itertools.count()
+
+    def push(self, chunk):
+        """
+        并入一块结果（DataFrame）
+        """
+        if chunk is None or len(chunk) == 0 or self.k <= 0:
+            return
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        chunk = chunk[self.columns]
+        values = chunk[self.column].to_numpy(dtype=np.float64)
+
+        if self.by is None:
+            selections = {None: top_k(values, self.k, self.largest)}
+        else:
+            selections = group_top_k(
+                values, chunk[self.by].astype(str).to_numpy(), self.k, self.largest
+            )
+
+        rows = chunk.to_numpy(dtype=object)
+        sign = 1.0 if self.largest else -1.0
+        for group, positions in selections.items():
+            heap = self._heaps.setdefault(group, [])
+            for position in positions.tolist():
+                value = values[position]
+                # 堆顶是当前最差的一名；分值相同时后到的更差，先被替换
+                item = (
+                    -np.inf if np.isnan(value) else sign * value,
+                    -next(self._sequence),
+                    rows[position],
+                )
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+
+    def result(self):
+        """
+        返回前k名的DataFrame，按分组和名次排列，并附加“排名”列
+        """
+        frames = []
+        for group in sorted(self._heaps, key=lambda g: (g is not None, g)):
+            items = sorted(self._heaps[group], key=lambda item: item[:2], reverse=True)
+            frame = pd.DataFrame([item[2] for item in items], columns=self.columns)
+            frame.insert(0, "排名", np.arange(1, len(frame) + 1))
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["排名"] + (self.columns or []))
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,365 @@
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_ORDERED_ITEM = re.compile(r"^(\d+)[.)]\s+(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+class ReportDocument:
+    """
+    报告文档模型
+    Markdown报告只解析一次，得到由标题、段落、列表、表格和分隔线组成的块序列，
+    各格式的渲染器都基于该序列输出
+    """
+
+    def __init__(self, source, blocks):
+        self.source = source
+        self.blocks = blocks
+
+    @classmethod
+    def parse(cls, markdown):
+        """
+        解析Markdown报告（相同内容的解析结果会被缓存）
+        """
+        return _parse_cached(markdown)
+
+    def headings(self, level=None):
+        return [
+            block["text"]
+            for block in self.blocks
+            if block["type"] == "heading" and (level is None or block["level"] == level)
+        ]
+
+
+def _split_row(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+@lru_cache(maxsize=64)
+def _parse_cached(markdown):
+    blocks = []
+    lines = markdown.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+
+        if not line:
+            blocks.append({"type": "blank"})
+            i += 1
+            continue
+
+        # 表格：表头行后紧跟分隔行
+        if (
+            line.startswith("|")
+            and i + 1 < len(lines)
+            and _TABLE_SEPARATOR.match(lines[i + 1].strip())
+        ):
+            header = _split_row(line)
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_split_row(lines[i]))
+                i += 1
+            blocks.append({"type": "table", "header": header, "rows": rows})
+            continue
+
+        if re.fullmatch(r"-{3,}|\*{3,}", line):
+            blocks.append({"type": "rule"})
+        elif _HEADING.match(line):
+            marks, text = _HEADING.match(line).groups()
+            blocks.append({"type": "heading", "level": len(marks), "text": text})
+        elif line.startswith("- ") or line.startswith("* "):
+            blocks.append({"type": "list_item", "ordered": False, "text": line[2:]})
+        elif _ORDERED_ITEM.match(line):
+            number, text = _ORDERED_ITEM.match(line).groups()
+            blocks.append(
+                {"type": "list_item", "ordered": True, "number": number, "text": text}
+            )
+        elif line.startswith("**") and line.endswith("**") and line.count("**") == 2:
+            blocks.append({"type": "paragraph", "text": line[2:-2], "bold": True})
+        else:
+            blocks.append({"type": "paragraph", "text": line, "bold": False})
+        i += 1
+
+    return ReportDocument(markdown, blocks)
+
+
+def _inline_runs(text):
+    """
+    将行内**粗体**拆分为 (文本, 是否粗体) 片段
+    """
+    runs = []
+    position = 0
+    for match in _BOLD.finditer(text):
+        if match.start() > position:
+            runs.append((text[position : match.start()], False))
+        runs.append((match.group(1), True))
+        position = match.end()
+    if position < len(text):
+        runs.append((text[position:], False))
+    return runs
+
+
+class DocxRenderer:
+    """
+    Word渲染器
+    自定义样式只注册一次，保存为模板字节串；每次渲染从模板打开新文档
+    """
+
+    _template = None
+    _template_lock = threading.Lock()
+
+    @classmethod
+    def _template_bytes(cls):
+        with cls._template_lock:
+            if cls._template is None:
+                doc = Document()
+
+                # 设置文档样式
+                style = doc.styles["Normal"]
+                style.font.name = "宋体"
+                style.font.size = Pt(12)
+
+                # 添加标题样式
+                title_style = doc.styles.add_style(
+                    "CustomTitle", WD_STYLE_TYPE.PARAGRAPH
+                )
+                title_style.font.name = "黑体"
+                title_style.font.size = Pt(16)
+                title_style.font.bold = True
+                title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+                # 添加二级标题样式
+                heading_style = doc.styles.add_style(
+                    "CustomHeading", WD_STYLE_TYPE.PARAGRAPH
+                )
+                heading_style.font.name = "黑体"
+                heading_style.font.size = Pt(14)
+                heading_style.font.bold = True
+
+                buffer = io.BytesIO()
+                doc.save(buffer)
+                cls._template = buffer.getvalue()
+        return cls._template
+
+    def render(self, report, file_path):
+        doc = Document(io.BytesIO(self._template_bytes()))
+
+        for block in report.blocks:
+            kind = block["type"]
+            if kind in ("blank", "rule"):
+                continue
+
+            if kind == "heading":
+                if block["level"] == 1:
+                    doc.add_paragraph(block["text"], style="CustomTitle")
+                elif block["level"] == 2:
+                    doc.add_paragraph(block["text"], style="CustomHeading")
+                else:
+                    doc.add_paragraph().add_run(block["text"]).bold = True
+            elif kind == "list_item":
+                style = "List Number" if block["ordered"] else "List Bullet"
+                self._add_runs(doc.add_paragraph(style=style), block["text"])
+            elif kind == "table":
+                self._add_table(doc, block)
+            elif block["bold"]:
+                doc.add_paragraph().add_run(block["text"]).bold = True
+            else:
+                self._add_runs(doc.add_paragraph(), block["text"])
+
+        doc.save(file_path)
+        return file_path
+
+    def _add_runs(self, paragraph, text):
+        for content, bold in _inline_runs(text):
+            paragraph.add_run(content).bold = bold
+
+    def _add_table(self, doc, block):
+        n_cols = len(block["header"])
+        table = doc.add_table(rows=len(block["rows"]) + 1, cols=n_cols)
+        table.style = "Table Grid"
+
+        # 按列写入单元格，避免逐行查找单元格
+        for j, column in enumerate(table.columns):
+            cells = column.cells
+            cells[0].paragraphs[0].add_run(block["header"][j]).bold = True
+            for i, row in enumerate(block["rows"], start=1):
+                cells[i].text = row[j] if j < len(row) else ""
+
+
+class PdfRenderer:
+    """
+    PDF渲染器
+    段落样式和表格样式只创建一次并在各次渲染间共享
+    """
+
+    _styles = None
+    _styles_lock = threading.Lock()
+
+    @classmethod
+    def styles(cls):
+        with cls._styles_lock:
+            if cls._styles is None:
+                styles = getSampleStyleSheet()
+                cls._styles = {
+                    "title": ParagraphStyle(
+                        "CustomTitle",
+                        parent=styles["Title"],
+                        fontSize=16,
+                        spaceAfter=20,
+                        alignment=1,  # 居中
+                    ),
+                    "heading": ParagraphStyle(
+                        "CustomHeading",
+                        parent=styles["Heading1"],
+                        fontSize=14,
+                        spaceAfter=12,
+                        spaceBefore=12,
+                    ),
+                    "normal": ParagraphStyle(
+                        "CustomNormal",
+                        parent=styles["Normal"],
+                        fontSize=12,
+                        spaceAfter=6,
+                    ),
+                    "cell": ParagraphStyle(
+                        "CustomCell", parent=styles["Normal"], fontSize=9
+                    ),
+                    "table": TableStyle(
+                        [
+                            ("GRID", (0, 0), (-1, -1), 0.5, "#999999"),
+                            ("BACKGROUND", (0, 0), (-1, 0), "#EEEEEE"),
+                            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                        ]
+                    ),
+                }
+        return cls._styles
+
+    def _markup(self, text):
+        """
+        转义XML特殊字符（如“ESG<40分”）后再把**粗体**转换为<b>标签
+        """
+        return _BOLD.sub(r"<b>\1</b>", escape(text))
+
+    def render(self, report, file_path):
+        styles = self.styles()
+        story = []
+
+        for block in report.blocks:
+            kind = block["type"]
+            if kind in ("blank", "rule"):
+                story.append(Spacer(1, 6))
+            elif kind == "heading":
+                if block["level"] == 1:
+                    story.append(
+                        Paragraph(self._markup(block["text"]), styles["title"])
+                    )
+                elif block["level"] == 2:
+                    story.append(
+                        Paragraph(self._markup(block["text"]), styles["heading"])
+                    )
+                else:
+                    story.append(
+                        Paragraph(
+                            f"<b>{self._markup(block['text'])}</b>", styles["normal"]
+                        )
+                    )
+            elif kind == "list_item":
+                bullet = f"{block['number']}." if block["ordered"] else "•"
+                story.append(
+                    Paragraph(
+                        f"{bullet} {self._markup(block['text'])}", styles["normal"]
+                    )
+                )
+            elif kind == "table":
+                rows = [block["header"]] + block["rows"]
+                story.append(
+                    Table(
+                        [
+                            [
+                                Paragraph(self._markup(cell), styles["cell"])
+                                for cell in row
+                            ]
+                            for row in rows
+                        ],
+                        style=styles["table"],
+                        repeatRows=1,
+                    )
+                )
+            elif block["bold"]:
+                story.append(
+                    Paragraph(f"<b>{self._markup(block['text'])}</b>", styles["normal"])
+                )
+            else:
+                story.append(Paragraph(self._markup(block["text"]), styles["normal"]))
+
+        SimpleDocTemplate(file_path, pagesize=A4).build(story)
+        return file_path
+
+
+class ReportRenderer:
+    """
+    报告多格式渲染
+    同一报告只解析一次，各格式在线程池中并发渲染，总耗时取决于最慢的格式
+    """
+
+    FORMATS = {"txt": ".txt", "docx": ".docx", "pdf": ".pdf"}
+
+    # 渲染器版本，渲染方式变化时使导出目录中的旧文件失效
+    VERSION = 1
+
+    def __init__(self, max_workers=3):
+        self.docx = DocxRenderer()
+        self.pdf = PdfRenderer()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="esg-report"
+        )
+
+    def render(self, report, format_type, file_path):
+        """
+        将报告渲染为指定格式；report可以是Markdown文本或已解析的ReportDocument
+        """
+        if not isinstance(report, ReportDocument):
+            report = ReportDocument.parse(report)
+
+        if format_type == "txt":
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(report.source)
+            return file_path
+        if format_type == "docx":
+            return self.docx.render(report, file_path)
+        if format_type == "pdf":
+            return self.pdf.render(report, file_path)
+        raise ValueError(f"不支持的报告格式: {format_type}")
+
+    def submit(self, fn, *args):
+        """
+        在渲染线程池中执行任务（供调用方并发完成各格式的导出）
+        """
+        return self._executor.submit(fn, *args)
+
+    def render_all(self, report, paths):
+        """
+        并发渲染多个格式，paths为 {格式: 文件路径}，返回 {格式: 文件路径}
+        """
+        report = ReportDocument.parse(report) if isinstance(report, str) else report
+        futures = {
+            format_type: self._executor.submit(self.render, report, format_type, path)
+            for format_type, path in paths.items()
+        }
+        return {format_type: future.result() for format_type, future in futures.items()}
@@ -0,0 +1,150 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class ResultsPager:
+    """
+    评分结果的服务端分页器
+    完整结果保留在服务端，按列预先计算排序索引（argsort），
+    筛选时只在排序索引上做布尔掩码，每次只把当前页的数据发送给前端
+    """
+
+    # 默认排序列（总分由高到低）
+    DEFAULT_SORT = "ESG总分"
+
+    def __init__(self, results_df, score_column="ESG总分"):
+        self.results = results_df.reset_index(drop=True)
+        self.score_column = score_column
+        self._sort_index = {}
+
+        # 筛选用的列数组只提取一次
+        self._industries = self._column_array("行业")
+        self._ratings = self._column_array("评级")
+        self._scores = (
+            self.results[score_column].to_numpy(dtype=np.float64)
+            if score_column in self.results.columns
+            else None
+        )
+
+    def __len__(self):
+        return len(self.results)
+
+    def _column_array(self, column):
+        if column not in self.results.columns:
+            return None
+        return self.results[column].astype(str).to_numpy()
+
+    def sort_index(self, column, descending=False):
+        """
+        获取某列的排序索引（稳定排序，首次使用时计算并缓存）
+        降序对取负后的键做稳定排序，并列行保持原顺序；缺失值无论升降序都排在最后
+        """
+        key = (column, bool(descending))
+        if key not in self._sort_index:
+            values = self.results[column]
+            if pd.api.types.is_numeric_dtype(values):
+                keys = values.to_numpy(dtype=np.float64)
+            else:
+                # 文本列先编码为有序整数，再对编码排序
+                codes, _ = pd.factorize(values.astype(str), sort=True)
+                keys = np.where(values.isna().to_numpy(), np.nan, codes)
+            # NumPy排序把NaN放在最后，取负不改变这一点
+            self._sort_index[key] = np.argsort(
+                -keys if descending else keys, kind="stable"
+            )
+        return self._sort_index[key]
+
+    def sortable_columns(self):
+        return list(self.results.columns)
+
+    def industries(self):
+        if self._industries is None:
+            return []
+        return sorted(pd.unique(self._industries).tolist())
+
+    def ratings(self):
+        if self._ratings is None:
+            return []
+        return pd.unique(self._ratings).tolist()
+
+    def _filter_mask(self, industry=None, rating=None, min_score=None, max_score=None):
+        """
+        构造筛选掩码；没有任何筛选条件时返回None
+        """
+        mask = None
+
+        def combine(condition):
+            return condition if mask is None else mask & condition
+
+        if industry and self._industries is not None:
+            industry = [industry] if isinstance(industry, str) else list(industry)
+            mask = combine(np.isin(self._industries, industry))
+        if rating and self._ratings is not None:
+            rating = [rating] if isinstance(rating, str) else list(rating)
+            mask = combine(np.isin(self._ratings, rating))
+        if min_score is not None and self._scores is not None:
+            mask = combine(self._scores >= float(min_score))
+        if max_score is not None and self._scores is not None:
+            mask = combine(self._scores <= float(max_score))
+        return mask
+
+    def select(
+        self,
+        sort_by=None,
+        descending=True,
+        industry=None,
+        rating=None,
+        min_score=None,
+        max_score=None,
+    ):
+        """
+        返回满足筛选条件、按指定列排序后的行位置
+        """
+        sort_by = sort_by if sort_by in self.results.columns else None
+        if sort_by is None and self.DEFAULT_SORT in self.results.columns:
+            sort_by = self.DEFAULT_SORT
+
+        if sort_by is not None:
+            order = self.sort_index(sort_by, descending)
+        else:
+            order = np.arange(len(self.results))
+
+        mask = self._filter_mask(industry, rating, min_score, max_score)
+        if mask is not None:
+            order = order[mask[order]]
+        return order
+
+    def page(
+        self,
+        page=1,
+        page_size=50,
+        sort_by=None,
+        descending=True,
+        industry=None,
+        rating=None,
+        min_score=None,
+        max_score=None,
+    ):
+        """
+        获取一页结果，返回 (当前页数据, 分页信息)
+        分页信息包含筛选后的总行数、总页数和修正后的页码
+        """
+        order = self.select(sort_by, descending, industry, rating, min_score, max_score)
+        page_size = max(int(page_size), 1)
+        total = len(order)
+        pages = max(math.ceil(total / page_size), 1)
+        page = min(max(int(page or 1), 1), pages)
+
+        start = (page - 1) * page_size
+        rows = order[start : start + page_size]
+        page_df = self.results.iloc[rows].reset_index(drop=True)
+
+        return page_df, {"total": total, "pages": pages, "page": page}
+
+    def filtered(self, **filters):
+        """
+        获取筛选排序后的完整结果（用于导出）
+        """
+        return self.results.iloc[self.select(**filters)].reset_index(drop=True)
@@ -0,0 +1,403 @@
+import numpy as np
+from scipy import sparse
+
+from esg_data_utils import CompactLongData
+
+
+class SparseIndicatorMatrix:
+    """
+    稀疏宽指标矩阵
+    （实体 × 指标）的CSR矩阵只保存已填报的单元格（填报值为0的单元格同样显式保存），
+    未填报的单元格不占内存；pillars记录每个指标所属维度（0=E、1=S、2=G、-1=不属于任何维度），
+    内存和计算量与已填报单元格数成正比，而与指标总数无关
+    """
+
+    # 类别名称到维度编码的映射
+    PILLAR_CODES = {"E": 0, "环境": 0, "S": 1, "社会": 1, "G": 2, "治理": 2}
+
+    # 宽表列名中维度前缀与指标名之间的分隔符，如 E_碳排放强度、治理:董事会独立性
+    PILLAR_SEPARATORS = ("_", ":", "：", "-")
+
+    def __init__(self, matrix, indicators, pillars, entities=None, duplicates=0):
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        self.matrix.sort_indices()
+        self.indicators = np.asarray(indicators, dtype=object)
+        self.pillars = np.asarray(pillars, dtype=np.int8)
+        self.entities = entities
+        self.duplicates = duplicates
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def nnz(self):
+        return self.matrix.nnz
+
+    @property
+    def density(self):
+        """
+        已填报单元格占全部单元格的比例
+        """
+        cells = self.shape[0] * self.shape[1]
+        return self.nnz / cells if cells else 0.0
+
+    @property
+    def nbytes(self):
+        return (
+            self.matrix.data.nbytes
+            + self.matrix.indices.nbytes
+            + self.matrix.indptr.nbytes
+            + self.pillars.nbytes
+        )
+
+    def pattern(self):
+        """
+        填报模式矩阵：结构与指标矩阵相同，已填报单元格取1
+        """
+        pattern = self.matrix.copy()
+        pattern.data = np.ones_like(pattern.data)
+        return pattern
+
+    def with_values(self, data):
+        """
+        保持稀疏结构不变，替换已填报单元格的取值
+        """
+        matrix = self.matrix.copy()
+        matrix.data = np.asarray(data, dtype=np.float64)
+        return SparseIndicatorMatrix(
+            matrix, self.indicators, self.pillars, self.entities, self.duplicates
+        )
+
+    @classmethod
+    def resolve_pillars(cls, indicators, categories=None, model=None):
+        """
+        确定各指标所属维度：优先按类别名称（E/S/G或环境/社会/治理），其次按模型的指标分类
+        """
+        if model is not None:
+            pillars = model.indicator_pillars(indicators)
+        else:
+            pillars = np.full(len(indicators), -1, dtype=np.int8)
+        if categories is not None:
+            by_category = np.array(
+                [cls.PILLAR_CODES.get(str(c).strip(), -1) for c in categories],
+                dtype=np.int8,
+            )
+            pillars = np.where(by_category >= 0, by_category, pillars)
+        return pillars
+
+    @classmethod
+    def name_categories(cls, indicators):
+        """
+        由列名的维度前缀推断类别（如 E_碳排放强度 -> E），没有可识别前缀时为None
+        """
+        categories = []
+        for name in indicators:
+            category = None
+            for separator in cls.PILLAR_SEPARATORS:
+                head, found, _ = str(name).partition(separator)
+                if found and head.strip() in cls.PILLAR_CODES:
+                    category = head.strip()
+                    break
+            categories.append(category)
+        return categories
+
+    @classmethod
+    def from_long(cls, long_data, model=None):
+        """
+        从CompactLongData构建，缺失值不占单元格，重复单元格取平均值
+        """
+        n_entities, n_indicators = long_data.n_entities, len(long_data.indicators)
+        observed = ~np.isnan(long_data.values)
+        cells = long_data.entity_codes[observed].astype(np.int64) * n_indicators
+        cells += long_data.indicator_codes[observed]
+
+        # 单元格编号升序即CSR的行优先顺序
+        cells, inverse, counts = np.unique(
+            cells, return_inverse=True, return_counts=True
+        )
+        values = (
+            np.bincount(
+                inverse.ravel(),
+                weights=long_data.values[observed].astype(np.float64),
+            )
+            / counts
+        )
+        rows = cells // n_indicators
+        matrix = sparse.csr_matrix(
+            (
+                values,
+                cells % n_indicators,
+                np.searchsorted(rows, np.arange(n_entities + 1)),
+            ),
+            shape=(n_entities, n_indicators),
+        )
+
+        category_codes = long_data.indicator_category_codes
+        categories = np.where(
+            category_codes >= 0, long_data.categories[category_codes], None
+        )
+        return cls(
+            matrix,
+            long_data.indicators,
+            cls.resolve_pillars(long_data.indicators, categories, model),
+            long_data.entity_frame(),
+            int(np.count_nonzero(counts > 1)),
+        )
+
+    @classmethod
+    def from_frame(cls, data, model=None):
+        """
+        从长格式DataFrame（company_name, industry, category, indicator, value）构建
+        """
+        return cls.from_long(CompactLongData.from_frame(data), model)
+
+    @classmethod
+    def from_wide(cls, frame, entities=None, model=None, categories=None):
+        """
+        从横向指标表（公司 × 指标，缺失为NaN）构建
+        categories为各列类别（与列一一对应的列表，或 {指标: 类别} 字典），
+        未给出时按列名的维度前缀推断；都无法确定的指标再按模型的指标分类
+        """
+        indicators = list(frame.columns)
+        if categories is None:
+            categories = cls.name_categories(indicators)
+        elif isinstance(categories, dict):
+            categories = [categories.get(name) for name in indicators]
+        elif len(categories) != len(indicators):
+            raise ValueError(
+                f"类别数量({len(categories)})与指标数量({len(indicators)})不一致"
+            )
+        values = frame.to_numpy(dtype=np.float64)
+        rows, cols = np.nonzero(~np.isnan(values))
+        matrix = sparse.csr_matrix(
+            (values[rows, cols], (rows, cols)), shape=values.shape
+        )
+        return cls(
+            matrix,
+            indicators,
+            cls.resolve_pillars(indicators, categories, model),
+            entities,
+        )
+
+
+class SparseESGScorer:
+    """
+    稀疏宽指标模式的评分计算
+    缩尾、标准化、熵权和变异系数都只在各指标已填报的单元格上计算（按CSC列段向量化），
+    维度得分用稀疏矩阵乘积汇总：各维度取已填报指标的加权平均再乘以维度总权重，
+    相当于以公司自身在该维度的表现代替未填报指标，而不是以样本中位数填满整个矩阵；
+    其后的Base Score、非线性调整与稠密模式共用ESGModel的实现
+    """
+
+    # 能确定所属维度的指标至少占全部指标的比例，否则维度得分没有意义
+    MIN_RESOLVED_SHARE = 0.5
+
+    def __init__(self, model):
+        self.model = model
+
+    def check_pillars(self, data):
+        """
+        检查指标的维度归属：能确定维度的指标过少时报错，某维度没有指标时给出警告，
+        避免未识别的指标被静默忽略、各维度得分退化为常数
+        """
+        resolved = data.pillars >= 0
+        n_indicators = len(resolved)
+        if n_indicators and resolved.sum() < self.MIN_RESOLVED_SHARE * n_indicators:
+            examples = "、".join(str(name) for name in data.indicators[~resolved][:5])
+            raise ValueError(
+                f"仅{int(resolved.sum())}/{n_indicators}个指标能确定所属维度（E/S/G），"
+                f"无法计算维度得分（未识别的指标如: {examples}）；"
+                "请在列名前加维度前缀（如 E_碳排放强度、S_员工流失率、G_董事会独立性），"
+                "或使用带category列的纵向数据"
+            )
+        for p, name in enumerate(["E", "S", "G"]):
+            if not (data.pillars == p).any():
+                print(f"警告: 没有属于{name}维度的指标，{name}得分没有区分度")
+
+    @staticmethod
+    def column_quantiles(matrix, quantiles):
+        """
+        各指标已填报取值的分位数（线性插值，与pandas一致），返回 (分位数 × 指标)
+        没有填报值的指标为NaN
+        """
+        csc = matrix.tocsc()
+        counts = np.diff(csc.indptr)
+        columns = np.repeat(np.arange(matrix.shape[1]), counts)
+        ordered = csc.data[np.lexsort((csc.data, columns))]
+
+        result = np.full((len(quantiles), matrix.shape[1]), np.nan)
+        present = counts > 0
+        starts, counts = csc.indptr[:-1][present], counts[present]
+        for i, q in enumerate(quantiles):
+            position = q * (counts - 1)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, counts - 1)
+            low_values = ordered[starts + lower]
+            result[i, present] = low_values + (ordered[starts + upper] - low_values) * (
+                position - lower
+            )
+        return result
+
+    def preprocess(self, data):
+        """
+        数据预处理：IQR缩尾和min-max标准化（考虑负向指标），只处理已填报单元格
+        单公司数据按指标理想值标准化，与ESGModel.normalize_single_value一致
+        """
+        matrix = data.matrix
+        values = matrix.data
+        columns = matrix.indices
+        negative = np.isin(data.indicators, list(self.model.negative_indicators))
+
+        if data.shape[0] == 1:
+            normalized = np.where(
+                negative[columns],
+                np.maximum(0, (100 - values) / 100),
+                np.clip(values / 100, 0, 1),
+            )
+            return data.with_values(normalized)
+
+        minimum, q1, q3, maximum = self.column_quantiles(matrix, [0.0, 0.25, 0.75, 1.0])
+        iqr = q3 - q1
+        lower_bound, upper_bound = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        values = np.clip(values, lower_bound[columns], upper_bound[columns])
+
+        # 缩尾是单调变换，缩尾后的最值即原最值的缩尾结果
+        minimum = np.clip(minimum, lower_bound, upper_bound)
+        maximum = np.clip(maximum, lower_bound, upper_bound)
+        span = (maximum - minimum)[columns]
+        degenerate = span == 0
+        scaled = np.where(
+            negative[columns], maximum[columns] - values, values - minimum[columns]
+        ) / np.where(degenerate, 1.0, span)
+        # 所有填报值相同的指标设为中间值
+        return data.with_values(np.where(degenerate, 0.5, scaled))
+
+    def entropy_weights(self, data):
+        """
+        熵权法客观权重（变异系数修正），各指标的样本量为其已填报单元格数
+        填报不足两家公司的指标不提供区分信息，权重为0
+        """
+        matrix = data.matrix
+        n_indicators = matrix.shape[1]
+        values, columns = matrix.data, matrix.indices
+
+        counts = np.bincount(columns, minlength=n_indicators)
+        sums = np.bincount(columns, weights=values, minlength=n_indicators)
+        squares = np.bincount(columns, weights=values**2, minlength=n_indicators)
+        x_log_x = np.bincount(
+            columns,
+            weights=np.where(
+                values > 0, values * np.log(np.maximum(values, 1e-300)), 0
+            ),
+            minlength=n_indicators,
+        )
+
+        # Σ p·ln p = Σ x·ln x / S - ln S，其中 p = x / S
+        informative = counts > 1
+        positive = informative & (sums > 0)
+        entropy = np.where(informative, 0.0, 1.0)
+        entropy[positive] = -(
+            x_log_x[positive] / sums[positive] - np.log(sums[positive])
+        ) / np.log(counts[positive])
+
+        # 样本标准差（ddof=1）和变异系数
+        safe_counts = np.maximum(counts, 1)
+        means = sums / safe_counts
+        variances = np.maximum(squares - counts * means**2, 0) / np.maximum(
+            counts - 1, 1
+        )
+        stds = np.sqrt(variances)
+        cv = np.where(
+            informative & (means != 0) & (stds != 0),
+            stds / np.where(means != 0, means, 1.0),
+            1.0,
+        )
+
+        g = cv * (1 - entropy)
+        if g.sum() == 0 or np.isnan(g.sum()):
+            # 退化时在有填报值的指标间均分
+            g = (counts > 0).astype(np.float64)
+            if g.sum() == 0:
+                g = np.ones(n_indicators)
+        return g / g.sum()
+
+    def weights(
+        self,
+        data,
+        industry="默认",
+        subjective_weights=None,
+        alpha=0.5,
+        objective_weights=None,
+    ):
+        """
+        组合权重：主观权重按维度归属均分行业维度权重，客观权重为熵权
+        两组权重和均为1且在[0, 1]内时，combine_weights目标函数的约束最优解
+        恰为 α·主观 + (1-α)·客观，无需对数千维权重做数值优化；
+        objective_weights为已计算的熵权（如分阶段缓存中的结果），未给出时重新计算
+        """
+        if subjective_weights is None:
+            subjective_weights = self.model.expand_pillar_weights(
+                np.array(self.model.get_pillar_weights(industry), dtype=np.float64),
+                data.pillars,
+            )
+        else:
+            subjective_weights = np.asarray(subjective_weights, dtype=np.float64)
+            if len(subjective_weights) != data.shape[1]:
+                raise ValueError(
+                    f"主观权重数量({len(subjective_weights)})与指标数量"
+                    f"({data.shape[1]})不一致"
+                )
+        if objective_weights is None:
+            objective_weights = self.entropy_weights(data)
+        return alpha * subjective_weights + (1 - alpha) * objective_weights
+
+    def pillar_scores(self, data, weights):
+        """
+        计算E、S、G因子得分和各维度的填报覆盖率（已填报指标权重占维度总权重的比例）
+        维度得分 = 已填报指标加权和 / 已填报指标权重和 × 维度总权重，
+        分子分母分别由 X·P 和 填报模式·P 两次稀疏乘积得到（P为 指标 × 3 的维度权重矩阵）；
+        某维度没有任何填报的公司以该维度的中位数填充
+        """
+        self.check_pillars(data)
+        n_entities, n_indicators = data.shape
+        member = np.flatnonzero(data.pillars >= 0)
+        pillar_map = sparse.csr_matrix(
+            (np.asarray(weights)[member], (member, data.pillars[member])),
+            shape=(n_indicators, 3),
+        )
+        numerator = (data.matrix @ pillar_map).toarray()
+        denominator = (data.pattern() @ pillar_map).toarray()
+        totals = np.asarray(pillar_map.sum(axis=0)).ravel()
+
+        observed = denominator > 0
+        raw = np.divide(
+            numerator, denominator, out=np.zeros_like(numerator), where=observed
+        )
+        raw *= totals
+        coverage = np.divide(
+            denominator,
+            totals,
+            out=np.zeros_like(denominator),
+            where=totals > 0,
+        )
+
+        scores = []
+        for p in range(3):
+            pillar = raw[:, p]
+            if observed[:, p].any() and not observed[:, p].all():
+                pillar[~observed[:, p]] = np.median(pillar[observed[:, p]])
+            if n_entities == 1:
+                # 单公司直接将加权得分转换为0-100分
+                scores.append(pillar * 100)
+            elif pillar.max() != pillar.min():
+                scores.append(
+                    (pillar - pillar.min()) / (pillar.max() - pillar.min()) * 100
+                )
+            else:
+                scores.append(np.full(n_entities, 50.0))
+
+        return scores[0], scores[1], scores[2], coverage
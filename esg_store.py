@@ -0,0 +1,866 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def current_period(now=None):
+    """
+    当前报告期（季度），如 2024Q3
+    """
+    now = now or datetime.now()
+    return f"{now.year}Q{(now.month - 1) // 3 + 1}"
+
+
+def row_periods(results_df, period=None):
+    """
+    每行的报告期：结果中有“报告期”列时逐行取用（缺失值用给定报告期补足），
+    否则全部使用给定报告期，都没有时取当前季度
+    """
+    fallback = str(period or current_period())
+    if "报告期" in results_df.columns:
+        periods = results_df["报告期"].astype(object)
+        return periods.where(periods.notna(), fallback).astype(str).to_numpy()
+    return np.full(len(results_df), fallback, dtype=object)
+
+
+def params_hash(params):
+    """
+    计算模型参数的稳定哈希，用于识别相同参数的评分运行
+    """
+    payload = json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ESGScoreStore:
+    """
+    基于SQLite的本地评分存储
+    每次评分运行按批次事务追加写入，并为公司、行业、报告期和分数区间查询建立索引
+    """
+
+    # 评分结果表列名到存储字段的映射
+    RESULT_COLUMNS = {
+        "公司名称": "company_name",
+        "行业": "industry",
+        "E得分": "e_score",
+        "S得分": "s_score",
+        "G得分": "g_score",
+        "Base Score": "base_score",
+        "ESG总分": "final_score",
+        "评级": "rating",
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            period TEXT NOT NULL,
+            params_hash TEXT NOT NULL,
+            params_json TEXT,
+            n_companies INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS scores (
+            run_id TEXT NOT NULL REFERENCES runs(run_id),
+            params_hash TEXT NOT NULL,
+            company_name TEXT NOT NULL,
+            industry TEXT,
+            period TEXT NOT NULL,
+            e_score REAL,
+            s_score REAL,
+            g_score REAL,
+            base_score REAL,
+            final_score REAL,
+            rating TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_scores_company ON scores(company_name, period);
+        CREATE INDEX IF NOT EXISTS idx_scores_industry ON scores(industry, period);
+        CREATE INDEX IF NOT EXISTS idx_scores_period ON scores(period, final_score);
+        CREATE INDEX IF NOT EXISTS idx_scores_final ON scores(final_score);
+        CREATE INDEX IF NOT EXISTS idx_scores_run ON scores(run_id);
+    """
+
+    def __init__(self, db_path=None, batch_size=10000):
+        self.db_path = db_path or os.path.join(
+            os.path.expanduser("~"), ".esg_scoring", "esg_scores.db"
+        )
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        """
+        每次操作使用独立连接，便于在界面的多个工作线程中调用
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def append_run(self, results_df, params=None, period=None, run_id=None):
+        """
+        追加一次评分运行，返回运行ID
+        所有行在同一事务内按batch_size分批写入
+        """
+        run_id = run_id or uuid.uuid4().hex
+        periods = row_periods(results_df, period)
+        run_hash = params_hash(params)
+
+        columns = [col for col in self.RESULT_COLUMNS if col in results_df.columns]
+        frame = results_df[columns].rename(columns=self.RESULT_COLUMNS)
+        fields = list(frame.columns)
+        frame.insert(0, "period", periods)
+        placeholders = ", ".join("?" for _ in range(len(fields) + 3))
+        insert_sql = (
+            f"INSERT INTO scores (run_id, params_hash, period, {', '.join(fields)}) "
+            f"VALUES ({placeholders})"
+        )
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        datetime.now().isoformat(timespec="seconds"),
+                        # 一次运行包含多个报告期时记录全部报告期
+                        ",".join(sorted(set(periods))),
+                        run_hash,
+                        json.dumps(params or {}, ensure_ascii=False, default=str),
+                        len(frame),
+                    ),
+                )
+                for start in range(0, len(frame), self.batch_size):
+                    batch = frame.iloc[start : start + self.batch_size]
+                    conn.executemany(
+                        insert_sql,
+                        (
+                            (run_id, run_hash, *row)
+                            for row in batch.astype(object).itertuples(
+                                index=False, name=None
+                            )
+                        ),
+                    )
+        finally:
+            conn.close()
+
+        return run_id
+
+    def latest_score(self, company_name):
+        """
+        查询某公司最新一期、最近一次运行的评分
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM scores WHERE company_name = ? "
+                "ORDER BY period DESC, rowid DESC LIMIT 1",
+                (company_name,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row is not None else None
+
+    def query_scores(
+        self,
+        company_name=None,
+        industry=None,
+        period=None,
+        min_score=None,
+        max_score=None,
+        run_id=None,
+        page_size=1000,
+        cursor=None,
+    ):
+        """
+        按条件分页查询评分
+        使用基于rowid的游标分页，返回 (当前页数据, 下一页游标)；没有更多数据时游标为None
+        """
+        conditions = []
+        values = []
+        for field, value in [
+            ("company_name", company_name),
+            ("industry", industry),
+            ("period", period),
+            ("run_id", run_id),
+        ]:
+            if value is not None:
+                conditions.append(f"{field} = ?")
+                values.append(value)
+        if min_score is not None:
+            conditions.append("final_score >= ?")
+            values.append(float(min_score))
+        if max_score is not None:
+            conditions.append("final_score <= ?")
+            values.append(float(max_score))
+        if cursor is not None:
+            conditions.append("rowid > ?")
+            values.append(int(cursor))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT rowid AS row_id, * FROM scores {where} ORDER BY rowid LIMIT ?"
+
+        conn = self._connect()
+        try:
+            page = pd.read_sql_query(sql, conn, params=values + [int(page_size)])
+        finally:
+            conn.close()
+
+        next_cursor = int(page["row_id"].iloc[-1]) if len(page) == page_size else None
+        return page.drop(columns="row_id"), next_cursor
+
+    def iter_scores(self, page_size=1000, **filters):
+        """
+        逐页遍历满足条件的全部评分
+        """
+        cursor = None
+        while True:
+            page, cursor = self.query_scores(
+                page_size=page_size, cursor=cursor, **filters
+            )
+            if len(page) > 0:
+                yield page
+            if cursor is None:
+                break
+
+    def list_runs(self, limit=50):
+        """
+        列出最近的评分运行
+        """
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(
+                "SELECT * FROM runs ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                conn,
+                params=[int(limit)],
+            )
+        finally:
+            conn.close()
+
+
+class ScoreHistoryDataset:
+    """
+    按报告期和行业分区的Parquet评分历史
+    目录采用Hive分区（period=.../industry=...），每个文件的行组记录min/max统计，
+    查询时先按分区目录剪枝，再利用行组统计跳过不满足分数条件的数据；
+    写入先在内存中缓冲，累积到flush_rows行（或查询、退出时）才成批写出，
+    分区内文件数超过compact_files时合并为一个按总分排序的文件
+    """
+
+    # 可用于区间过滤的分数字段
+    SCORE_FIELDS = ["final_score", "base_score", "e_score", "s_score", "g_score"]
+
+    def __init__(
+        self, root_dir=None, row_group_size=64 * 1024, flush_rows=50000, compact_files=8
+    ):
+        import pyarrow  # noqa: F401  未安装pyarrow时直接抛出ImportError
+
+        self.root_dir = root_dir or os.path.join(
+            os.path.expanduser("~"), ".esg_scoring", "score_history"
+        )
+        self.row_group_size = row_group_size
+        self.flush_rows = flush_rows
+        self.compact_files = compact_files
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.RLock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+        # 进程退出时写出尚在缓冲区中的结果
+        atexit.register(self.flush)
+
+    def _partitioning(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(
+            pa.schema([("period", pa.string()), ("industry", pa.string())]),
+            flavor="hive",
+        )
+
+    def write(self, results_df, period=None, run_id=None, params=None):
+        """
+        追加一次评分运行的结果，返回运行ID
+        报告期逐行取自结果的“报告期”列，没有该列时使用period（默认当前季度）
+        """
+        run_id = run_id or uuid.uuid4().hex
+        columns = [
+            col for col in ESGScoreStore.RESULT_COLUMNS if col in results_df.columns
+        ]
+        frame = results_df[columns].rename(columns=ESGScoreStore.RESULT_COLUMNS)
+        frame = frame.astype({"company_name": str, "industry": str})
+        frame.insert(0, "run_id", run_id)
+        frame["params_hash"] = params_hash(params)
+        frame["period"] = row_periods(results_df, period)
+
+        with self._lock:
+            self._pending.append(frame)
+            self._pending_rows += len(frame)
+            if self._pending_rows >= self.flush_rows:
+                self.flush()
+        return run_id
+
+    def flush(self):
+        """
+        将缓冲的全部运行一次写出（每个分区一个文件），随后合并文件过多的分区
+        分区内按总分排序，使行组的分数统计区间互不重叠，区间查询可跳过更多行组
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        with self._lock:
+            if not self._pending:
+                return
+            written_files = []
+            frame = pd.concat(self._pending, ignore_index=True)
+            frame = frame.sort_values(
+                ["period", "industry", "final_score"], kind="stable"
+            )
+            ds.write_dataset(
+                pa.Table.from_pandas(frame, preserve_index=False),
+                self.root_dir,
+                format="parquet",
+                partitioning=self._partitioning(),
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                max_rows_per_group=self.row_group_size,
+                min_rows_per_group=min(self.row_group_size, 1024),
+                file_visitor=lambda written: written_files.append(written.path),
+            )
+            self._pending, self._pending_rows = [], 0
+
+            for directory in sorted({os.path.dirname(path) for path in written_files}):
+                if len(self._data_files(directory)) > self.compact_files:
+                    self.compact_partition(directory)
+
+    @staticmethod
+    def _data_files(directory):
+        # 与pyarrow一致，忽略以“.”或“_”开头的文件
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(".parquet") and not name.startswith((".", "_"))
+        )
+
+    def compact_partition(self, directory):
+        """
+        将一个分区目录下的全部文件合并为一个按总分排序的文件
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            files = self._data_files(directory)
+            if len(files) <= 1:
+                return
+            table = ds.dataset(files, format="parquet").to_table()
+            table = table.sort_by("final_score")
+
+            # 先写入隐藏的临时文件，完成后再替换旧文件
+            tmp_path = os.path.join(directory, f".compact-{uuid.uuid4().hex}.tmp")
+            pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+            os.replace(
+                tmp_path,
+                os.path.join(directory, f"part-{uuid.uuid4().hex}-0.parquet"),
+            )
+            for path in files:
+                os.remove(path)
+
+    def compact(self):
+        """
+        写出缓冲区并合并所有包含多个文件的分区
+        """
+        with self._lock:
+            self.flush()
+            for root, _, _ in os.walk(self.root_dir):
+                if len(self._data_files(root)) > 1:
+                    self.compact_partition(root)
+
+    def dataset(self):
+        """
+        打开整个历史数据集（其他Python工具也可直接以Hive分区Parquet读取该目录）
+        """
+        import pyarrow.dataset as ds
+
+        self.flush()
+        return ds.dataset(
+            self.root_dir, format="parquet", partitioning=self._partitioning()
+        )
+
+    def query(
+        self,
+        industries=None,
+        period_from=None,
+        period_to=None,
+        score_ranges=None,
+        columns=None,
+    ):
+        """
+        查询评分历史
+        score_ranges形如 {"e_score": (None, 40)}，区间两端可为None；
+        报告期字符串（如2023Q1）按字典序比较即为时间顺序
+        """
+        self.flush()
+        if not os.listdir(self.root_dir):
+            return pd.DataFrame()
+
+        table = self.dataset().to_table(
+            columns=columns,
+            filter=self._filter(industries, period_from, period_to, score_ranges),
+        )
+        return table.to_pandas()
+
+    def scan(
+        self,
+        industries=None,
+        period_from=None,
+        period_to=None,
+        score_ranges=None,
+        columns=None,
+        batch_size=64 * 1024,
+    ):
+        """
+        按与query相同的条件逐批产出DataFrame，整个结果集不必同时载入内存
+        """
+        self.flush()
+        if not os.listdir(self.root_dir):
+            return
+
+        for batch in self.dataset().to_batches(
+            columns=columns,
+            filter=self._filter(industries, period_from, period_to, score_ranges),
+            batch_size=batch_size,
+        ):
+            if batch.num_rows > 0:
+                yield batch.to_pandas()
+
+    def _filter(self, industries, period_from, period_to, score_ranges):
+        """
+        由查询条件构造pyarrow过滤表达式
+        """
+        import pyarrow.dataset as ds
+
+        conditions = []
+        if industries:
+            conditions.append(ds.field("industry").isin(list(industries)))
+        if period_from is not None:
+            conditions.append(ds.field("period") >= period_from)
+        if period_to is not None:
+            conditions.append(ds.field("period") <= period_to)
+        for field, (low, high) in (score_ranges or {}).items():
+            if field not in self.SCORE_FIELDS:
+                raise ValueError(f"不支持的分数字段: {field}")
+            if low is not None:
+                conditions.append(ds.field(field) >= float(low))
+            if high is not None:
+                conditions.append(ds.field(field) <= float(high))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+
+class IndustryBenchmarks:
+    """
+    行业基准分布（物化视图）
+    按（公司, 报告期）只保留最近一次评分，每个行业的各分数字段保存为有序数组：
+    新评分归并进去，同一公司同一报告期的旧评分从数组中移除，重复评分不会虚增样本；
+    百分位只需一次searchsorted，分位数和均值直接由有序数组和累计和得到，
+    不必在每次请求时扫描全部历史。各公司的评分另按公司索引，
+    查询时排除被比较的公司自身只需取出该公司的几条评分
+    """
+
+    # 汇总全部行业的分布
+    ALL_INDUSTRIES = "全部行业"
+
+    # 优秀企业基准取同业分布的分位
+    TOP_QUANTILE = 0.9
+
+    # 每条评分的唯一键
+    KEY_COLUMNS = ["company_name", "period"]
+
+    # 快照最短保存间隔（秒），间隔内的更新留到下次保存或进程退出时写出
+    SAVE_INTERVAL = 30
+
+    def __init__(self, snapshot_path=None, save_interval=None):
+        self.snapshot_path = snapshot_path
+        self.save_interval = (
+            self.SAVE_INTERVAL if save_interval is None else save_interval
+        )
+        self.fields = list(ScoreHistoryDataset.SCORE_FIELDS)
+        self._companies = {}  # 公司 -> {报告期: (行业, 各分数字段数组)}
+        self._size = 0
+        self._sorted = {}  # (行业, 字段) -> 有序分数数组
+        self._sums = {}  # (行业, 字段) -> 分数总和
+        self.version = 0  # 每次更新加1，可用作依赖基准的缓存键
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.RLock()
+        if snapshot_path and os.path.exists(snapshot_path):
+            try:
+                self._load(snapshot_path)
+            except Exception as e:
+                print(f"警告: 行业基准快照读取失败: {str(e)}")
+                self._reset()
+        if snapshot_path:
+            atexit.register(self.flush)
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def _reset(self):
+        self._companies, self._size = {}, 0
+        self._sorted, self._sums = {}, {}
+
+    def _normalize(self, results_df, period=None):
+        """
+        统一为 (公司, 报告期, 行业, 分数矩阵)（评分结果表使用中文列名，评分存储使用英文字段名），
+        同一批数据中重复的键保留最后一条
+        """
+        frame = results_df.rename(columns=ESGScoreStore.RESULT_COLUMNS)
+        if "period" in frame.columns:
+            periods = frame["period"].astype(str).to_numpy()
+        else:
+            periods = row_periods(frame, period)
+        companies = frame["company_name"].astype(str).to_numpy()
+        keep = ~pd.MultiIndex.from_arrays([companies, periods]).duplicated(keep="last")
+        scores = np.column_stack(
+            [
+                frame[field].to_numpy(dtype=np.float64)
+                if field in frame.columns
+                else np.full(len(frame), np.nan)
+                for field in self.fields
+            ]
+        )
+        return (
+            companies[keep],
+            periods[keep],
+            frame["industry"].astype(str).to_numpy()[keep],
+            scores[keep],
+        )
+
+    def update(self, results_df, period=None, save=True):
+        """
+        将一次评分运行的结果归并到各行业的有序分布中
+        同一公司同一报告期已有的评分被替换；报告期取结果中的“报告期”列，否则取period
+        """
+        if results_df is None or len(results_df) == 0:
+            return
+        companies, periods, industries, scores = self._normalize(results_df, period)
+
+        with self._lock:
+            replaced = []
+            for company, report_period, industry, row in zip(
+                companies, periods, industries, scores
+            ):
+                entries = self._companies.setdefault(company, {})
+                previous = entries.get(report_period)
+                if previous is None:
+                    self._size += 1
+                else:
+                    replaced.append(previous)
+                entries[report_period] = (industry, row)
+            if replaced:
+                self._apply(
+                    np.array([industry for industry, _ in replaced]),
+                    np.array([row for _, row in replaced]),
+                    self._remove,
+                )
+            self._apply(industries, scores, self._merge)
+            self.version += 1
+            self._dirty = True
+            due = time.time() - self._last_save >= self.save_interval
+
+        if save and self.snapshot_path and due:
+            self.save()
+
+    def _apply(self, industries, scores, operation):
+        """
+        对全部行业和各行业的每个分数字段执行归并或移除
+        """
+        if len(industries) == 0:
+            return
+        names, codes = np.unique(industries, return_inverse=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        for f, field in enumerate(self.fields):
+            values = scores[:, f]
+            operation((self.ALL_INDUSTRIES, field), values)
+            for i, name in enumerate(names):
+                operation((str(name), field), values[order[bounds[i] : bounds[i + 1]]])
+
+    def _merge(self, key, values):
+        # 新分数排序后按插入位置归并，复杂度与已有样本数成线性，无需整体重排
+        values = np.sort(values[~np.isnan(values)])
+        existing = self._sorted.get(key)
+        if existing is None:
+            self._sorted[key] = values
+        else:
+            self._sorted[key] = np.insert(
+                existing, np.searchsorted(existing, values, side="right"), values
+            )
+        self._sums[key] = self._sums.get(key, 0.0) + float(values.sum())
+
+    def _remove(self, key, values):
+        values = np.sort(values[~np.isnan(values)])
+        existing = self._sorted.get(key)
+        if existing is None or len(values) == 0:
+            return
+        self._sorted[key] = self._without(existing, values)
+        self._sums[key] = (
+            self._sums[key] - float(values.sum()) if len(self._sorted[key]) else 0.0
+        )
+
+    @staticmethod
+    def _without(distribution, values):
+        """
+        从有序数组中移除一组（有序、且都在数组中的）取值，重复取值依次对应相邻位置
+        """
+        positions = np.searchsorted(distribution, values, side="left")
+        positions += np.arange(len(values)) - np.searchsorted(
+            values, values, side="left"
+        )
+        return np.delete(distribution, positions)
+
+    def _own_values(self, company, industry, field):
+        """
+        某公司计入该行业分布的全部得分（各报告期，有序，不含NaN；需持有锁）
+        """
+        f = self.fields.index(field)
+        values = np.array(
+            [
+                row[f]
+                for own_industry, row in self._companies.get(str(company), {}).values()
+                if industry == self.ALL_INDUSTRIES or own_industry == industry
+            ],
+            dtype=np.float64,
+        )
+        return np.sort(values[~np.isnan(values)])
+
+    def _distribution(self, industry, field, exclude=None):
+        """
+        行业分布的有序数组和总和，exclude给定时去掉该公司自身的得分（需持有锁）
+        """
+        key = (str(industry), field)
+        values = self._sorted.get(key)
+        if values is None:
+            return np.empty(0), 0.0
+        total = self._sums[key]
+        if exclude is not None:
+            own = self._own_values(exclude, key[0], field)
+            if len(own) > 0:
+                values = self._without(values, own)
+                total -= float(own.sum())
+        return values, total
+
+    def _own_counts(self, industries, values, field, companies):
+        """
+        逐行统计公司自身计入同业分布的得分：不高于该行得分的个数和总个数（需持有锁）
+        """
+        n = len(values)
+        below, total = np.zeros(n), np.zeros(n)
+        if companies is None:
+            return below, total
+        f = self.fields.index(field)
+        for i, (company, industry) in enumerate(
+            zip(np.asarray(companies).astype(str), industries)
+        ):
+            for own_industry, row in self._companies.get(company, {}).values():
+                if own_industry == industry and not np.isnan(row[f]):
+                    total[i] += 1
+                    below[i] += row[f] <= values[i]
+        return below, total
+
+    def rebuild(self, frames):
+        """
+        从评分存储或历史数据逐块重建全部分布（如 ESGScoreStore.iter_scores()），
+        各块按写入顺序处理，同一公司同一报告期保留最后一条
+        """
+        with self._lock:
+            self._reset()
+        for frame in frames:
+            self.update(frame, save=False)
+        if self.snapshot_path:
+            self.save()
+
+    def industries(self):
+        with self._lock:
+            return sorted(
+                {
+                    industry
+                    for industry, _ in self._sorted
+                    if industry != self.ALL_INDUSTRIES
+                }
+            )
+
+    def count(self, industry, field="final_score", exclude=None):
+        with self._lock:
+            return len(self._distribution(industry, field, exclude)[0])
+
+    def counts(self, industries, companies=None, field="final_score"):
+        """
+        批量计算同业样本数，companies给定时各行不计公司自身
+        """
+        industries = np.asarray(industries).astype(str)
+        result = np.zeros(len(industries))
+        with self._lock:
+            _, own = self._own_counts(industries, result, field, companies)
+            for name in np.unique(industries):
+                distribution = self._sorted.get((name, field))
+                if distribution is not None:
+                    result[industries == name] = len(distribution)
+        return (result - own).astype(np.int64)
+
+    def percentiles(self, industries, values, field="final_score", companies=None):
+        """
+        批量计算百分位：不高于该得分的同业企业比例（%），没有同业样本时为NaN
+        companies给定时各行的同业分布不含公司自身
+        """
+        industries = np.asarray(industries).astype(str)
+        values = np.asarray(values, dtype=np.float64)
+        result = np.full(len(values), np.nan)
+        with self._lock:
+            own_below, own_total = self._own_counts(
+                industries, values, field, companies
+            )
+            for name in np.unique(industries):
+                distribution = self._sorted.get((name, field))
+                if distribution is None or len(distribution) == 0:
+                    continue
+                mask = industries == name
+                size = len(distribution) - own_total[mask]
+                below = (
+                    np.searchsorted(distribution, values[mask], side="right")
+                    - own_below[mask]
+                )
+                result[mask] = np.where(
+                    size > 0, below / np.maximum(size, 1) * 100, np.nan
+                )
+        return result
+
+    def percentile(self, industry, value, field="final_score", exclude=None):
+        """
+        单个得分在行业分布中的百分位，exclude为被比较的公司
+        """
+        companies = None if exclude is None else [exclude]
+        return float(self.percentiles([industry], [value], field, companies)[0])
+
+    @staticmethod
+    def _interpolate(values, q):
+        # 有序数组上线性插值，与pandas一致
+        position = q * (len(values) - 1)
+        low = int(np.floor(position))
+        high = min(low + 1, len(values) - 1)
+        return float(values[low] + (values[high] - values[low]) * (position - low))
+
+    def quantile(self, industry, q, field="final_score", exclude=None):
+        """
+        行业分布的分位数，没有样本时返回None
+        """
+        with self._lock:
+            values = self._distribution(industry, field, exclude)[0]
+        if len(values) == 0:
+            return None
+        return self._interpolate(values, q)
+
+    def baseline(self, industry, min_peers=1, exclude=None):
+        """
+        行业基准：各分数字段的均值、中位数，以及总分的优秀企业分位
+        exclude为被比较的公司，其自身得分不计入基准；同业样本少于min_peers时返回None
+        """
+        industry = str(industry)
+        with self._lock:
+            distributions = {
+                field: self._distribution(industry, field, exclude)
+                for field in self.fields
+            }
+        final_values = distributions["final_score"][0]
+        if len(final_values) == 0 or len(final_values) < min_peers:
+            return None
+        return {
+            "industry": industry,
+            "count": len(final_values),
+            "mean": {
+                field: total / len(values)
+                for field, (values, total) in distributions.items()
+                if len(values) > 0
+            },
+            "median": self._interpolate(final_values, 0.5),
+            "top": self._interpolate(final_values, self.TOP_QUANTILE),
+        }
+
+    def flush(self):
+        """
+        写出尚未保存的更新（进程退出时自动调用）
+        """
+        if self._dirty and self.snapshot_path:
+            self.save()
+
+    def save(self, path=None):
+        """
+        原子写入快照文件，下次启动时直接加载
+        快照保存每个（公司, 报告期）的最新评分，加载时重建有序数组
+        """
+        path = path or self.snapshot_path
+        with self._lock:
+            keys, industries, rows = [], [], []
+            for company, entries in self._companies.items():
+                for report_period, (industry, row) in entries.items():
+                    keys.append((company, report_period))
+                    industries.append(industry)
+                    rows.append(row)
+            version = self.version
+            self._last_save = time.time()
+
+        scores = np.array(rows, dtype=np.float64).reshape(len(rows), len(self.fields))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(version),
+                industry=np.array(industries, dtype=str),
+                **{
+                    col: np.array([key[i] for key in keys], dtype=str)
+                    for i, col in enumerate(self.KEY_COLUMNS)
+                },
+                **{field: scores[:, i] for i, field in enumerate(self.fields)},
+            )
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._dirty = self.version != version
+
+    def _load(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            if "company_name" not in data.files:
+                raise ValueError("快照为旧格式，缺少公司和报告期信息")
+            companies = data["company_name"].tolist()
+            periods = data["period"].tolist()
+            industries = data["industry"]
+            scores = np.column_stack([data[field] for field in self.fields])
+            version = int(data["version"])
+        for company, report_period, industry, row in zip(
+            companies, periods, industries.tolist(), scores
+        ):
+            self._companies.setdefault(company, {})[report_period] = (industry, row)
+        self._size = len(companies)
+        self._apply(industries, scores, self._merge)
+        self.version = version
@@ -0,0 +1,264 @@
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from esg_report import DocxRenderer, PdfRenderer, ReportDocument
+
+
+# 工作进程内的共享状态（由进程初始化函数设置一次）
+_worker_state = {}
+
+
+def _init_worker(static_sections, formats):
+    """
+    工作进程初始化：保存共享的静态章节，并预先创建渲染器样式
+    """
+    _worker_state["static_sections"] = static_sections
+    _worker_state["formats"] = formats
+    _worker_state["renderers"] = {"pdf": PdfRenderer(), "docx": DocxRenderer()}
+    PdfRenderer.styles()
+    DocxRenderer._template_bytes()
+
+
+def _render_chunk(records):
+    """
+    渲染一批公司的单页报告，返回 [(文件名, 文件内容), ...]
+    """
+    renderers = _worker_state["renderers"]
+    outputs = []
+    for record in records:
+        markdown = render_tear_sheet(record, _worker_state["static_sections"])
+        report = ReportDocument.parse(markdown)
+        for format_type in _worker_state["formats"]:
+            buffer = io.BytesIO()
+            renderers[format_type].render(report, buffer)
+            outputs.append((f"{record['file_stem']}.{format_type}", buffer.getvalue()))
+    return outputs
+
+
+def render_tear_sheet(record, static_sections):
+    """
+    生成单个公司的单页报告（Markdown），只渲染与该公司相关的数据片段
+    """
+    lines = [
+        f"# {record['company']} ESG单页报告",
+        f"**行业**: {record['industry']} | **评级**: {record['rating']} | "
+        f"**报告日期**: {static_sections['date']}",
+        "",
+        "## 📊 评分概览",
+        "| 指标 | 得分 | 行业平均 | 全样本平均 | 全样本分位 |",
+        "|------|------|----------|------------|------------|",
+    ]
+    for label, key in TearSheetBatch.SCORE_ROWS:
+        lines.append(
+            f"| {label} | {record[key]:.2f} | {record['industry_' + key]:.2f} | "
+            f"{static_sections['universe_means'][key]:.2f} | "
+            f"{record['pct_' + key]:.0f}% |"
+        )
+
+    pillars = [(label, record[key]) for label, key in TearSheetBatch.SCORE_ROWS[2:]]
+    best = max(pillars, key=lambda x: x[1])
+    worst = min(pillars, key=lambda x: x[1])
+    lines.extend(
+        [
+            "",
+            "## 🔍 要点",
+            f"- **优势领域**: {best[0]}（{best[1]:.1f}分）",
+            f"- **改进重点**: {worst[0]}（{worst[1]:.1f}分）",
+            f"- **行业内排名**: 第{record['industry_rank']}名 / 共{record['industry_size']}家",
+        ]
+    )
+    if record.get("peer_count"):
+        lines.append(
+            f"- **历史同业分位**: {record['peer_pct']:.0f}%"
+            f"（{record['peer_count']}家历史同业样本）"
+        )
+    lines.extend(["", static_sections["methodology"]])
+    return "\n".join(lines)
+
+
+class TearSheetBatch:
+    """
+    批量生成公司单页报告并流式写入ZIP
+    公司记录分块分发到进程池渲染，在途任务数有上限，
+    完成的文件立即写入ZIP，内存占用与公司总数无关
+    """
+
+    # 单页报告中的评分行：(显示名称, 记录字段)
+    SCORE_ROWS = [
+        ("ESG总分", "final"),
+        ("Base Score", "base"),
+        ("环境(E)", "e"),
+        ("社会(S)", "s"),
+        ("治理(G)", "g"),
+    ]
+
+    RESULT_COLUMNS = {
+        "final": "ESG总分",
+        "base": "Base Score",
+        "e": "E得分",
+        "s": "S得分",
+        "g": "G得分",
+    }
+
+    # 所有单页报告共享的静态章节
+    METHODOLOGY = "\n".join(
+        [
+            "## 📐 评分方法",
+            "- 评分基于甲模型量化评分体系：主客观组合赋权、交叉项效应与非线性事件调整",
+            "- 分位表示该得分在全部样本中不低于的企业比例",
+            "",
+            "---",
+            "*本报告基于甲模型量化评分体系生成，仅供参考*",
+        ]
+    )
+
+    def __init__(
+        self, formats=("pdf",), max_workers=None, chunk_size=25, benchmarks=None
+    ):
+        self.formats = tuple(formats)
+        for format_type in self.formats:
+            if format_type not in ("pdf", "docx"):
+                raise ValueError(f"不支持的单页报告格式: {format_type}")
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.chunk_size = chunk_size
+        # 行业基准分布（IndustryBenchmarks），提供时加入历史同业分位
+        self.benchmarks = benchmarks
+
+    def prepare(self, results_df, report_date):
+        """
+        一次性计算各公司记录中的行业均值、分位和行业排名，返回 (记录列表, 静态章节)
+        """
+        n = len(results_df)
+        industries = results_df["行业"].astype(str).to_numpy()
+        columns = {
+            key: results_df[col].to_numpy(dtype=np.float64)
+            for key, col in self.RESULT_COLUMNS.items()
+        }
+        industry_names, industry_codes = np.unique(industries, return_inverse=True)
+        industry_counts = np.bincount(industry_codes, minlength=len(industry_names))
+
+        derived = {}
+        for key, values in columns.items():
+            sums = np.bincount(industry_codes, weights=values)
+            derived["industry_" + key] = (sums / industry_counts)[industry_codes]
+            # 全样本分位：不高于该得分的企业比例
+            sorted_values = np.sort(values)
+            derived["pct_" + key] = (
+                np.searchsorted(sorted_values, values, side="right") / n * 100
+            )
+
+        # 行业内按总分降序排名
+        order = np.lexsort((-columns["final"], industry_codes))
+        group_starts = np.concatenate([[0], np.cumsum(industry_counts)[:-1]])
+        ranks = np.empty(n, dtype=np.int64)
+        ranks[order] = np.arange(n) - group_starts[industry_codes[order]] + 1
+
+        companies = results_df["公司名称"].astype(str).tolist()
+
+        # 历史同业分位：在行业基准分布上批量searchsorted，同业不含公司自身
+        peer_pct = peer_count = None
+        if self.benchmarks is not None:
+            peer_pct = self.benchmarks.percentiles(
+                industries, columns["final"], companies=companies
+            )
+            peer_count = self.benchmarks.counts(industries, companies=companies)
+        ratings = results_df["评级"].astype(str).tolist()
+        records = []
+        for i in range(n):
+            record = {
+                "company": companies[i],
+                "industry": industries[i],
+                "rating": ratings[i],
+                "industry_rank": int(ranks[i]),
+                "industry_size": int(industry_counts[industry_codes[i]]),
+                "file_stem": f"{i + 1:05d}_{_safe_filename(companies[i])}",
+            }
+            for key, values in columns.items():
+                record[key] = float(values[i])
+            for key, values in derived.items():
+                record[key] = float(values[i])
+            if peer_pct is not None and not np.isnan(peer_pct[i]):
+                record["peer_pct"] = float(peer_pct[i])
+                record["peer_count"] = int(peer_count[i])
+            records.append(record)
+
+        static_sections = {
+            "date": report_date,
+            "universe_means": {
+                key: float(values.mean()) for key, values in columns.items()
+            },
+            "methodology": self.METHODOLOGY,
+        }
+        return records, static_sections
+
+    def build_zip(self, results_df, zip_path, report_date, progress=None):
+        """
+        生成全部单页报告并写入ZIP，返回写入的文件数
+        progress(已完成公司数, 公司总数) 在每批完成后调用
+        """
+        records, static_sections = self.prepare(results_df, report_date)
+        chunks = (
+            records[start : start + self.chunk_size]
+            for start in range(0, len(records), self.chunk_size)
+        )
+        max_in_flight = self.max_workers * 2
+        done_companies = 0
+        written = 0
+
+        with zipfile.ZipFile(
+            zip_path, "w", compression=zipfile.ZIP_DEFLATED
+        ) as archive, ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(static_sections, self.formats),
+        ) as executor:
+            pending = {}
+            for chunk in chunks:
+                # 在途任务达到上限时，先等待并写出已完成的批次
+                while len(pending) >= max_in_flight:
+                    companies, files = self._collect(pending, archive)
+                    done_companies += companies
+                    written += files
+                    if progress is not None:
+                        progress(done_companies, len(records))
+                pending[executor.submit(_render_chunk, chunk)] = len(chunk)
+
+            while pending:
+                companies, files = self._collect(pending, archive)
+                done_companies += companies
+                written += files
+                if progress is not None:
+                    progress(done_companies, len(records))
+
+        return written
+
+    def _collect(self, pending, archive):
+        """
+        等待至少一个批次完成并写入ZIP，返回 (完成的公司数, 写入的文件数)
+        """
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        companies = 0
+        files = 0
+        for future in finished:
+            companies += pending.pop(future)
+            files += self._write_outputs(archive, future.result())
+        return companies, files
+
+    def _write_outputs(self, archive, outputs):
+        for filename, content in outputs:
+            archive.writestr(filename, content)
+        return len(outputs)
+
+
+def _safe_filename(name):
+    """
+    去除文件名中的非法字符
+    """
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("_")[:80] or "company"
@@ -0,0 +1,624 @@
+from datetime import datetime
+
+import numpy as np
+
+from esg_ranking import top_k
+
+
+# 各维度在报告中的显示名称
+DIMENSIONS = [("E得分", "环境(E)"), ("S得分", "社会(S)"), ("G得分", "治理(G)")]
+
+
+def _fmt(values, spec=".2f"):
+    """
+    按列批量格式化数值
+    """
+    return [format(value, spec) for value in values.tolist()]
+
+
+def _table(header, separator, columns):
+    """
+    由按列格式化好的字符串拼接Markdown表格
+    """
+    rows = [" | ".join(cells) for cells in zip(*columns)]
+    return [header, separator] + [f"| {row} |" for row in rows]
+
+
+class ReportContext:
+    """
+    单次报告渲染的数据上下文
+    评分列只提取一次为数组，各模板片段共享
+    """
+
+    def __init__(self, results_df, jia_model_params, model_results, current_time):
+        self.n = len(results_df)
+        self.names = results_df["公司名称"].to_numpy()
+        self.ratings = results_df["评级"].astype(str).to_numpy()
+        self.final = results_df["ESG总分"].to_numpy(dtype=np.float64)
+        self.dims = {
+            col: results_df[col].to_numpy(dtype=np.float64) for col, _ in DIMENSIONS
+        }
+        self.params = jia_model_params
+        self.model_results = model_results or {}
+        self.time = current_time
+
+    @property
+    def subject(self):
+        return self.names[0] if self.n == 1 else f"{self.n}家企业"
+
+    @property
+    def avg(self):
+        return self.final.mean()
+
+    def dim_avg(self, col):
+        return self.dims[col].mean()
+
+    def param(self, name, default):
+        return self.params.get(name, default)
+
+
+class ReportTemplates:
+    """
+    预编译的报告模板
+    每个模板在初始化时编译为片段序列：不变的文字段落预先拼接为字符串，
+    只有依赖数据的片段在渲染时计算；表格按列从数组格式化
+    """
+
+    TEMPLATE_TYPES = ["标准分析报告", "简化报告", "详细技术报告", "投资决策报告"]
+
+    def __init__(self):
+        self._templates = {
+            "标准分析报告": self._compile(self._standard_parts()),
+            "简化报告": self._compile(self._simplified_parts()),
+            "详细技术报告": self._compile(self._detailed_parts()),
+            "投资决策报告": self._compile(self._investment_parts()),
+        }
+
+    def _compile(self, parts):
+        """
+        合并相邻的静态片段，返回 (静态字符串 | 片段函数) 序列
+        """
+        compiled = []
+        static = []
+        for part in parts:
+            if isinstance(part, str):
+                static.append(part)
+                continue
+            if static:
+                compiled.append("\n".join(static))
+                static = []
+            compiled.append(part)
+        if static:
+            compiled.append("\n".join(static))
+        return compiled
+
+    def render(
+        self,
+        template_type,
+        results_df,
+        jia_model_params=None,
+        model_results=None,
+        current_time=None,
+    ):
+        """
+        渲染报告；未知模板类型按标准分析报告处理
+        """
+        template = self._templates.get(template_type, self._templates["标准分析报告"])
+        ctx = ReportContext(
+            results_df,
+            jia_model_params,
+            model_results,
+            current_time or datetime.now().strftime("%Y年%m月%d日"),
+        )
+
+        output = []
+        for part in template:
+            if isinstance(part, str):
+                output.append(part)
+                continue
+            lines = part(ctx)
+            if lines:
+                output.extend(lines)
+        return "\n".join(output)
+
+    # ---------- 标准分析报告 ----------
+
+    def _standard_parts(self):
+        return [
+            "# 📋 ESG评分分析报告",
+            lambda ctx: [
+                f"## {ctx.subject} ESG表现评估",
+                f"\n**报告日期**: {ctx.time}",
+                f"**评估对象**: {ctx.subject}",
+            ],
+            "**评估方法**: 甲模型量化评分体系",
+            "**QureLab团队** 专业出品\n",
+            "---\n",
+            "## 📊 执行摘要",
+            self._standard_summary,
+            "\n### 🔍 主要发现",
+            self._standard_findings,
+            "\n## 📈 详细分析",
+            "### 各维度表现",
+            self._standard_dimensions,
+            "\n## 💡 改进建议",
+            self._standard_suggestions,
+            "\n---",
+            "\n*本报告基于甲模型量化评分体系生成，仅供参考*",
+        ]
+
+    def _standard_summary(self, ctx):
+        avg_score = ctx.avg
+        if avg_score >= 80:
+            verdict = "表现**优秀**，具备强劲的可持续发展能力。"
+        elif avg_score >= 60:
+            verdict = "表现**良好**，在可持续发展方面具有一定基础。"
+        elif avg_score >= 40:
+            verdict = "表现**中等**，需要在多个维度加强改进。"
+        else:
+            verdict = "表现**有待提升**，建议全面优化ESG管理体系。"
+        return [
+            f"本报告采用甲模型对{ctx.subject}进行ESG评分分析。",
+            f"综合评分为**{avg_score:.2f}分**，",
+            verdict,
+        ]
+
+    def _standard_findings(self, ctx):
+        if ctx.n != 1:
+            return None
+        dimensions = [(name, ctx.dims[col][0]) for col, name in DIMENSIONS]
+        best_dim = max(dimensions, key=lambda x: x[1])
+        worst_dim = min(dimensions, key=lambda x: x[1])
+        return [
+            f"- **优势领域**: {best_dim[0]}维度表现突出({best_dim[1]:.1f}分)",
+            f"- **改进重点**: {worst_dim[0]}维度需要加强({worst_dim[1]:.1f}分)",
+            f"- **整体评级**: {ctx.ratings[0]}",
+        ]
+
+    def _standard_dimensions(self, ctx):
+        lines = []
+        for col, dim_name in DIMENSIONS:
+            dim_avg = ctx.dim_avg(col)
+            if dim_avg >= 80:
+                performance, suggestion = "优秀", "继续保持领先优势"
+            elif dim_avg >= 60:
+                performance, suggestion = "良好", "可进一步优化提升"
+            elif dim_avg >= 40:
+                performance, suggestion = "中等", "需要重点改进"
+            else:
+                performance, suggestion = "待提升", "急需全面改善"
+            lines.append(f"\n**{dim_name}**: {dim_avg:.1f}分 ({performance})")
+            lines.append(f"- {suggestion}")
+        return lines
+
+    def _standard_suggestions(self, ctx):
+        if ctx.n != 1:
+            return None
+        lines = []
+        if ctx.dims["E得分"][0] < 70:
+            lines.append("- **环境方面**: 加强碳排放管控，提升可再生能源使用比例")
+        if ctx.dims["S得分"][0] < 70:
+            lines.append("- **社会方面**: 完善员工福利体系，加强供应链社会责任管理")
+        if ctx.dims["G得分"][0] < 70:
+            lines.append("- **治理方面**: 强化董事会独立性，完善风险管理体系")
+        return lines
+
+    # ---------- 简化报告 ----------
+
+    def _simplified_parts(self):
+        return [
+            "# 📋 ESG评分简报",
+            lambda ctx: [
+                f"**{ctx.subject}** | {ctx.time}",
+                "",
+                f"**综合得分**: {ctx.avg:.1f}分",
+                f"**评级**: {ctx.ratings[0] if ctx.n == 1 else '见详细数据'}",
+                "",
+                "**各维度得分**:",
+                f"- 环境(E): {ctx.dim_avg('E得分'):.1f}分",
+                f"- 社会(S): {ctx.dim_avg('S得分'):.1f}分",
+                f"- 治理(G): {ctx.dim_avg('G得分'):.1f}分",
+            ],
+            "",
+            "*QureLab甲模型评估结果*",
+        ]
+
+    # ---------- 投资决策报告 ----------
+
+    def _investment_parts(self):
+        return [
+            "# 💼 ESG投资分析报告",
+            lambda ctx: [
+                f"## {ctx.subject} 投资建议",
+                f"**分析日期**: {ctx.time}",
+                "",
+                "### 🎯 投资要点",
+                f"- **ESG得分**: {ctx.avg:.1f}分",
+                "- **投资评级**: "
+                + ("推荐" if ctx.avg >= 75 else "观望" if ctx.avg >= 60 else "谨慎"),
+                "",
+                "### 📊 风险评估",
+            ],
+            self._investment_risk,
+            "",
+            "### 💡 投资逻辑",
+            "基于甲模型量化分析，该标的在ESG各维度表现如下：",
+            lambda ctx: [
+                f"- 环境维度: {ctx.dim_avg('E得分'):.1f}分",
+                f"- 社会维度: {ctx.dim_avg('S得分'):.1f}分",
+                f"- 治理维度: {ctx.dim_avg('G得分'):.1f}分",
+            ],
+            "",
+            "*本报告仅供投资参考，不构成投资建议*",
+        ]
+
+    def _investment_risk(self, ctx):
+        if ctx.avg >= 80:
+            return [
+                "- **风险等级**: 低风险",
+                "- **投资建议**: 优质ESG标的，建议重点关注",
+            ]
+        if ctx.avg >= 60:
+            return [
+                "- **风险等级**: 中等风险",
+                "- **投资建议**: ESG表现中等，可适度配置",
+            ]
+        return ["- **风险等级**: 高风险", "- **投资建议**: ESG风险较高，建议谨慎投资"]
+
+    # ---------- 详细技术报告 ----------
+
+    def _detailed_parts(self):
+        return [
+            "# 企业ESG评分分析报告",
+            "## ——基于甲模型的量化投资策略研究",
+            "\n**QureLab团队研究成果**\n",
+            lambda ctx: [
+                f"**报告日期**: {ctx.time}",
+                f"**样本规模**: {ctx.n}家企业",
+            ],
+            "**研究方法**: 甲模型量化评分体系",
+            "\n---\n",
+            "## 摘要",
+            lambda ctx: [
+                f"本报告基于甲模型设计理念，对{ctx.n}家企业进行了全面的ESG评分分析。",
+                f"样本企业ESG平均得分为{ctx.avg:.2f}分，整体表现"
+                f"{'良好' if ctx.avg >= 70 else '中等' if ctx.avg >= 50 else '有待提升'}。",
+            ],
+            "甲模型通过多维度交叉项效应、非线性调整机制和政策响应参数，",
+            "实现了对企业ESG表现的精准量化评估，为投资决策提供了科学依据。\n",
+            "**关键词**: ESG评分、甲模型、量化投资、可持续发展、风险管理\n",
+            "## 1. 引言",
+            "### 1.1 研究背景",
+            "随着全球可持续发展理念的深入推进，ESG（环境、社会、治理）投资已成为",
+            "现代金融市场的重要趋势。2024年中国人民银行等七部委联合印发的",
+            "《关于进一步强化金融支持绿色低碳发展的指导意见》明确提出，",
+            "要建立国际领先的金融支持绿色低碳发展体系，推动ESG信息披露规范化。",
+            "\n### 1.2 甲模型设计理念",
+            "甲模型是QureLab团队基于量化投资理论和ESG评估实践开发的",
+            "综合评分体系。该模型融合了多模态数据处理、机器学习算法",
+            "和金融工程方法，具有以下核心特征：",
+            "- **多维度整合**: 通过E×S、E×G、S×G交叉项效应建模",
+            "- **非线性调整**: 采用事件分级惩罚和饱和函数奖励机制",
+            "- **政策响应**: 动态反映绿色金融政策和监管要求",
+            "- **行业差异化**: 基于行业特征的权重优化配置\n",
+            self._detailed_params,
+            "## 3. 样本数据统计分析",
+            "### 3.1 基本统计信息",
+            self._detailed_statistics,
+            "### 3.2 ESG评级分布",
+            self._detailed_rating_table,
+            "### 3.3 各维度表现分析",
+            self._detailed_dimension_table,
+            "## 4. 企业ESG表现排名",
+            "### 4.1 ESG表现优秀企业（前10名）",
+            self._detailed_top_table,
+            "### 4.2 ESG表现待提升企业（后5名）",
+            self._detailed_bottom_table,
+            "## 5. 基于甲模型的量化投资策略分析",
+            "### 5.1 数据驱动的投资决策",
+            "根据量化投资理论，甲模型采用多模态数据处理技术，",
+            "整合了结构化财务数据、非结构化新闻舆情、",
+            "以及实时政策信息，形成全方位的ESG评估体系。",
+            "\n### 5.2 因子分析与特征工程",
+            "甲模型构建了三类核心因子：",
+            "- **量价因子**: 基于市场交易数据的技术指标",
+            "- **基本面因子**: 来源于财务报表和ESG披露信息",
+            "- **另类因子**: 包括舆情数据、政策响应等",
+            "\n### 5.3 风险管理与组合优化",
+            self._detailed_risk_tiers,
+            "\n## 6. 绿色金融政策环境分析",
+            "### 6.1 政策背景",
+            "2024年10月，中国人民银行等四部委联合印发",
+            "《关于发挥绿色金融作用 服务美丽中国建设的意见》，",
+            "明确了绿色金融支持美丽中国建设的重点领域和实施路径。",
+            "\n### 6.2 政策影响分析",
+            "甲模型的政策响应机制体现在以下方面：",
+            self._detailed_policy,
+            self._detailed_weights,
+            "\n## 8. 投资策略建议",
+            "### 8.1 维度优化建议",
+            self._detailed_dimension_advice,
+            "\n### 8.2 量化投资策略建议",
+            "基于甲模型分析结果，建议采用以下投资策略：",
+            "\n**1. 多因子选股策略**",
+            "- 构建ESG-增强型多因子模型",
+            "- 结合价值、成长、质量因子",
+            "- 动态调整因子权重",
+            "\n**2. 风险平价策略**",
+            "- 基于ESG评分进行风险预算分配",
+            "- 控制单一维度风险暴露",
+            "- 实施动态再平衡",
+            "\n**3. 事件驱动策略**",
+            "- 监控ESG相关负面事件",
+            "- 利用市场过度反应获取超额收益",
+            "- 建立事件影响评估模型",
+            lambda ctx: self._JIA_ADVICE if ctx.params else None,
+            "\n## 9. 结论",
+            lambda ctx: [f"本研究基于甲模型对{ctx.n}家企业进行了全面的ESG评分分析。"],
+            "研究发现，甲模型通过多维度交叉项效应、非线性调整机制",
+            "和政策响应参数，能够有效识别企业ESG风险和机遇，",
+            "为量化投资决策提供了科学依据。",
+            "\n未来研究方向包括：",
+            "- 扩大样本规模，增强模型泛化能力",
+            "- 引入更多另类数据源",
+            "- 开发实时ESG评分系统",
+            "- 构建ESG投资组合优化算法",
+            "\n## 参考文献",
+            "[1] 中国人民银行等. 关于进一步强化金融支持绿色低碳发展的指导意见[Z]. 2024.",
+            "[2] 中国人民银行等. 关于发挥绿色金融作用 服务美丽中国建设的意见[Z]. 2024.",
+            "[3] Markowitz, H. Portfolio Selection[J]. Journal of Finance, 1952, 7(1): 77-91.",
+            "[4] Fama, E. F., French, K. R. Common risk factors in the returns on stocks and bonds[J]. Journal of Financial Economics, 1993, 33(1): 3-56.",
+            "\n---",
+            "\n**声明**: 本报告仅供研究参考，不构成投资建议。投资有风险，决策需谨慎。",
+            lambda ctx: [f"\n**QureLab团队** | {ctx.time}"],
+        ]
+
+    # 启用甲模型参数时追加的专业建议（静态文本）
+    _JIA_ADVICE = [
+        "\n### 8.3 基于甲模型的专业建议",
+        "**价值导向投资**:",
+        "- 将ESG理念融入投资决策全流程",
+        "- 关注长期价值创造能力",
+        "- 平衡财务回报与社会效益",
+        "\n**实质性原则**:",
+        "- 重点关注对业务影响最大的ESG议题",
+        "- 建立行业特定的ESG评估框架",
+        "- 定期更新重要性矩阵",
+        "\n**利益相关方协同**:",
+        "- 加强与投资者的ESG沟通",
+        "- 建立客户ESG需求反馈机制",
+        "- 推动供应链ESG标准统一",
+    ]
+
+    # 甲模型参数配置章节：(小节标题, 说明, [(显示名称, 参数名, 默认值, 格式, 后缀)])
+    _PARAM_SECTIONS = [
+        (
+            "### 2.1 基础权重体系",
+            "甲模型采用组合赋权法，结合主观权重和客观权重：",
+            [
+                ("环境(E)维度权重", "e_weight", 0.4, ".3f", ""),
+                ("社会(S)维度权重", "s_weight", 0.3, ".3f", ""),
+                ("治理(G)维度权重", "g_weight", 0.3, ".3f", ""),
+                ("主观权重系数α", "alpha", 0.5, ".3f", ""),
+            ],
+        ),
+        (
+            "\n### 2.2 交叉项联动系数",
+            "基于现代投资组合理论，甲模型引入维度间协同效应：",
+            [
+                ("E×S联动效应系数(δ)", "delta_coeff", 0.1, ".3f", ""),
+                ("E×G联动效应系数(ε)", "epsilon_coeff", 0.15, ".3f", ""),
+                ("S×G联动效应系数(ζ)", "zeta_coeff", 0.12, ".3f", ""),
+            ],
+        ),
+        (
+            "\n### 2.3 非线性调整参数",
+            "采用行为金融学理论，对极端事件进行非线性处理：",
+            [
+                ("事件严重度放大因子", "severity_factor", 0.4, ".3f", ""),
+                ("最大奖励分数", "max_bonus", 10, ".1f", "分"),
+                ("奖励曲线陡度", "bonus_steepness", 0.8, ".3f", ""),
+                ("阈值乘数", "threshold_multiplier", 1.0, ".3f", ""),
+            ],
+        ),
+        (
+            "\n### 2.4 事件类型风险系数",
+            "基于历史数据统计和专家判断，设定差异化风险权重：",
+            [
+                ("数据泄露系数", "data_breach_coeff", 1.2, ".2f", ""),
+                ("环境污染系数", "env_pollution_coeff", 1.8, ".2f", ""),
+                ("安全事故系数", "safety_accident_coeff", 1.5, ".2f", ""),
+                ("腐败违规系数", "corruption_coeff", 2.0, ".2f", ""),
+                ("劳资纠纷系数", "labor_dispute_coeff", 1.0, ".2f", ""),
+                ("产品召回系数", "product_recall_coeff", 1.3, ".2f", ""),
+            ],
+        ),
+        (
+            "\n### 2.5 政策响应机制",
+            "结合绿色金融政策导向，动态调整评分权重：",
+            [
+                ("碳税敏感系数(β)", "carbon_tax_sensitivity", 0.08, ".3f", ""),
+                ("ESG披露权重", "esg_disclosure_weight", 0.15, ".3f", ""),
+                ("绿色金融奖励", "green_finance_bonus", 0.05, ".3f", ""),
+                ("监管合规系数", "regulatory_compliance", 1.0, ".3f", ""),
+            ],
+        ),
+    ]
+
+    def _detailed_params(self, ctx):
+        if not ctx.params:
+            return None
+        lines = ["## 2. 甲模型参数配置"]
+        for title, intro, items in self._PARAM_SECTIONS:
+            lines.extend([title, intro])
+            for label, name, default, spec, unit in items:
+                lines.append(
+                    f"- {label}: {format(ctx.param(name, default), spec)}{unit}"
+                )
+        lines.extend(
+            [
+                "\n### 2.6 模型功能配置",
+                f"- 交叉项效应: {'启用' if ctx.param('use_cross_terms', True) else '禁用'}",
+                f"- 事件调整机制: {'启用' if ctx.param('include_events', False) else '禁用'}",
+                "",
+            ]
+        )
+        return lines
+
+    def _detailed_statistics(self, ctx):
+        final = ctx.final
+        q25, median, q75 = np.quantile(final, [0.25, 0.5, 0.75])
+        std = final.std(ddof=1) if ctx.n > 1 else np.nan
+        return [
+            f"- **样本规模**: {ctx.n}家企业",
+            f"- **ESG平均得分**: {ctx.avg:.2f}分",
+            f"- **标准差**: {std:.2f}",
+            f"- **最高得分**: {final.max():.2f}分",
+            f"- **最低得分**: {final.min():.2f}分",
+            f"- **中位数**: {median:.2f}分",
+            f"- **第一四分位数(Q1)**: {q25:.2f}分",
+            f"- **第三四分位数(Q3)**: {q75:.2f}分",
+            f"- **四分位距(IQR)**: {q75 - q25:.2f}分\n",
+        ]
+
+    def _detailed_rating_table(self, ctx):
+        ratings, counts = np.unique(ctx.ratings, return_counts=True)
+        ratings, counts = ratings[::-1], counts[::-1]
+        return _table(
+            "| 评级 | 企业数量 | 占比 |",
+            "|------|----------|------|",
+            [
+                ratings.tolist(),
+                [f"{count}家" for count in counts.tolist()],
+                [f"{pct}%" for pct in _fmt(counts / ctx.n * 100, ".1f")],
+            ],
+        ) + [""]
+
+    def _detailed_dimension_table(self, ctx):
+        columns = [[name for _, name in DIMENSIONS]]
+        matrix = np.column_stack([ctx.dims[col] for col, _ in DIMENSIONS])
+        std = matrix.std(axis=0, ddof=1) if ctx.n > 1 else np.full(3, np.nan)
+        for values in [
+            matrix.mean(axis=0),
+            std,
+            matrix.max(axis=0),
+            matrix.min(axis=0),
+        ]:
+            columns.append(_fmt(values))
+        return _table(
+            "| 维度 | 平均得分 | 标准差 | 最高分 | 最低分 |",
+            "|------|----------|--------|--------|--------|",
+            columns,
+        ) + [""]
+
+    def _detailed_top_table(self, ctx):
+        top = top_k(ctx.final, 10)
+        return _table(
+            "| 排名 | 企业名称 | ESG总分 | 评级 | E得分 | S得分 | G得分 |",
+            "|------|----------|---------|------|-------|-------|-------|",
+            [
+                [str(i) for i in range(1, len(top) + 1)],
+                [str(name) for name in ctx.names[top].tolist()],
+                _fmt(ctx.final[top]),
+                ctx.ratings[top].tolist(),
+            ]
+            + [_fmt(ctx.dims[col][top]) for col, _ in DIMENSIONS],
+        ) + [""]
+
+    def _detailed_bottom_table(self, ctx):
+        bottom = top_k(ctx.final, 5, largest=False)
+        # 找出最低的维度（并列时按维度字母顺序取第一个）
+        letters = np.array(["E", "G", "S"])
+        matrix = np.column_stack(
+            [
+                ctx.dims["E得分"][bottom],
+                ctx.dims["G得分"][bottom],
+                ctx.dims["S得分"][bottom],
+            ]
+        )
+        lowest = matrix.argmin(axis=1)
+        lowest_values = matrix[np.arange(len(bottom)), lowest]
+        problems = [
+            f"{letter}维度偏低({value}分)"
+            for letter, value in zip(
+                letters[lowest].tolist(), _fmt(lowest_values, ".1f")
+            )
+        ]
+        start = ctx.n - len(bottom)
+        return _table(
+            "| 排名 | 企业名称 | ESG总分 | 评级 | 主要问题 |",
+            "|------|----------|---------|------|----------|",
+            [
+                [str(start + i) for i in range(1, len(bottom) + 1)],
+                [str(name) for name in ctx.names[bottom].tolist()],
+                _fmt(ctx.final[bottom]),
+                ctx.ratings[bottom].tolist(),
+                problems,
+            ],
+        ) + [""]
+
+    def _detailed_risk_tiers(self, ctx):
+        final = ctx.final
+        high_risk = int(np.count_nonzero(final < 40))
+        medium_risk = int(np.count_nonzero((final >= 40) & (final < 70)))
+        low_risk = int(np.count_nonzero(final >= 70))
+        return [
+            "基于ESG评分的风险分层结果：",
+            f"- **低风险组合** (ESG≥70分): {low_risk}家企业 ({low_risk / ctx.n * 100:.1f}%)",
+            f"- **中等风险组合** (40≤ESG<70分): {medium_risk}家企业 ({medium_risk / ctx.n * 100:.1f}%)",
+            f"- **高风险组合** (ESG<40分): {high_risk}家企业 ({high_risk / ctx.n * 100:.1f}%)",
+        ]
+
+    def _detailed_policy(self, ctx):
+        if not ctx.params:
+            return None
+        return [
+            f"- **碳税敏感性调整**: 系数{ctx.param('carbon_tax_sensitivity', 0.08):.3f}，反映碳定价政策影响",
+            f"- **ESG披露权重**: {ctx.param('esg_disclosure_weight', 0.15):.3f}，鼓励信息透明度",
+            f"- **绿色金融奖励**: {ctx.param('green_finance_bonus', 0.05):.3f}，支持绿色项目融资",
+        ]
+
+    def _detailed_weights(self, ctx):
+        if "weights" not in ctx.model_results:
+            return None
+        weights = ctx.model_results["weights"]
+        return [
+            "\n## 7. 模型验证与回测分析",
+            "### 7.1 权重分布统计",
+            f"- 权重向量维度: {len(weights)}",
+            f"- 权重最大值: {weights.max():.4f}",
+            f"- 权重最小值: {weights.min():.4f}",
+            f"- 权重标准差: {weights.std():.4f}",
+            f"- 权重集中度(HHI): {(weights**2).sum():.4f}",
+        ]
+
+    def _detailed_dimension_advice(self, ctx):
+        lines = []
+        if ctx.dim_avg("E得分") < 50:
+            lines.extend(
+                [
+                    "**环境维度改进**:",
+                    "- 加大清洁能源投资，推进碳中和目标",
+                    "- 建立环境管理体系，获得ISO14001认证",
+                    "- 开展环境风险评估，制定应急预案",
+                ]
+            )
+        if ctx.dim_avg("S得分") < 50:
+            lines.extend(
+                [
+                    "\n**社会维度改进**:",
+                    "- 完善员工福利体系，提升员工满意度",
+                    "- 加强供应链社会责任管理",
+                    "- 积极参与社区公益活动",
+                ]
+            )
+        if ctx.dim_avg("G得分") < 50:
+            lines.extend(
+                [
+                    "\n**治理维度改进**:",
+                    "- 优化董事会结构，提高独立董事比例",
+                    "- 建立健全内控制度和风险管理体系",
+                    "- 加强信息披露透明度",
+                ]
+            )
+        return lines
@@ -5,18 +5,25 @@ import numpy as np
 # import plotly.express as px  # Removed unused import
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import tempfile
+import copy
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from docx import Document
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.style import WD_STYLE_TYPE
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from functools import partial
 from esg_model import ESGModel
-from esg_data_utils import ESGDataProcessor
+from esg_data_utils import ESGDataProcessor, CompactLongData
+from esg_cache import DatasetCache, StageCache
+from esg_store import ESGScoreStore, ScoreHistoryDataset, IndustryBenchmarks
+from esg_results import ResultsPager
+from esg_export import StreamingExporter, ExportStore
+from esg_report import ReportRenderer
+from esg_templates import ReportTemplates
+from esg_charts import UniverseDashboard, FigureCache, BASE_TEMPLATE, results_hash
+from esg_tearsheet import TearSheetBatch
+from esg_ranking import StreamingTopK, group_top_k, top_k
+from esg_analysis import ImprovementPlanner, ScoreAttribution, WhatIfSession
+from esg_sparse import SparseIndicatorMatrix
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -27,15 +34,277 @@ class ESGGradioApp:
     ESG评分系统Gradio界面
     """
 
-    def __init__(self):
+    # 评分页面各参数控件的默认值（界面控件按此初始化，推测性预计算也使用这组参数）
+    DEFAULT_SCORING_ARGS = {
+        "alpha": 0.5,
+        "include_events": True,
+        "e_weight": 0.4,
+        "s_weight": 0.3,
+        "g_weight": 0.3,
+        "delta_coeff": 0.1,
+        "epsilon_coeff": 0.15,
+        "zeta_coeff": 0.12,
+        "severity_factor": 0.4,
+        "max_bonus": 10,
+        "bonus_steepness": 0.8,
+        "threshold_multiplier": 1.0,
+        "data_breach_coeff": 1.2,
+        "env_pollution_coeff": 1.8,
+        "safety_accident_coeff": 1.5,
+        "corruption_coeff": 2.0,
+        "labor_dispute_coeff": 1.0,
+        "product_recall_coeff": 1.3,
+        "carbon_tax_sensitivity": 0.08,
+        "esg_disclosure_weight": 0.15,
+        "green_finance_bonus": 0.05,
+        "regulatory_compliance": 1.0,
+        "use_cross_terms": True,
+    }
+
+    # 启用评分持久化时的默认存储目录
+    DEFAULT_STORAGE_DIR = os.path.join(os.path.expanduser("~"), ".esg_scoring")
+
+    # 数据中表示报告期的列（不作为指标参与评分）
+    PERIOD_COLUMNS = ["报告期", "period"]
+
+    # 上传预览读取的行数
+    PREVIEW_ROWS = 10
+
+    # 指标数超过该值的多公司数据使用稀疏宽指标模式评分
+    SPARSE_INDICATOR_THRESHOLD = 200
+
+    # 评分结果表每页默认行数
+    RESULTS_PAGE_SIZE = 50
+
+    # 可视化面板：标签页名称到图表类型的映射
+    CHART_PANELS = {
+        "综合仪表板": "overview",
+        "得分分布": "histogram",
+        "行业对比": "industry",
+        "E/S密度": "density",
+    }
+
+    def __init__(
+        self,
+        speculative_scoring=False,
+        dataset_cache=True,
+        score_store=False,
+        score_history=False,
+        industry_benchmarks=False,
+        storage_dir=None,
+    ):
         self.model = ESGModel()
         self.processor = ESGDataProcessor()
         self.current_data = None
         self.current_events = None
 
+        # 完整评分结果保留在服务端，界面只显示当前页
+        self.current_results = None
+        self.current_model_results = None
+        self.results_pager = None
+        self.imported_results = None
+
+        # 分块流式导出，导出文件统一写入按内容寻址、限制容量的导出目录
+        self.exporter = StreamingExporter()
+        self.export_store = ExportStore()
+
+        # 报告解析一次后并发渲染为各导出格式
+        self.report_renderer = ReportRenderer()
+
+        # 启动时预编译四种报告模板
+        self.report_templates = ReportTemplates()
+
+        # 指标级得分归因（按评分结果中的甲模型参数精确分解）
+        self.score_attribution = ScoreAttribution()
+        self.improvement_planner = ImprovementPlanner()
+
+        # 单公司假设分析会话（手动录入的单公司数据评分完成后创建）
+        self.whatif_session = None
+        self._manual_company = None  # 当前数据为手动录入时的公司名称
+        self._data_problem = None  # 当前数据未通过验证时的问题描述
+
+        # 多公司结果的全样本仪表板；图表按需构建，并按结果哈希和图表类型缓存
+        self.universe_dashboard = UniverseDashboard()
+        self.figure_cache = FigureCache()
+        self._results_key = None
+
+        # 按文件内容缓存清洗后的数据集（传入DatasetCache实例可自定义目录和容量）
+        if dataset_cache is True:
+            dataset_cache = DatasetCache()
+        self.dataset_cache = dataset_cache or None
+
+        # 评分持久化默认关闭，需显式启用；启用时写入storage_dir（默认 ~/.esg_scoring）
+        self.storage_dir = storage_dir or self.DEFAULT_STORAGE_DIR
+
+        # 持久化评分存储（传入ESGScoreStore实例可自定义数据库路径）
+        if score_store is True:
+            score_store = ESGScoreStore(os.path.join(self.storage_dir, "esg_scores.db"))
+        self.score_store = score_store or None
+
+        # 按报告期和行业分区的Parquet评分历史（需要pyarrow）
+        if score_history is True:
+            try:
+                score_history = ScoreHistoryDataset(
+                    os.path.join(self.storage_dir, "score_history")
+                )
+            except ImportError:
+                score_history = None
+        self.score_history = score_history or None
+
+        # 各行业历史评分分布，评分写入存储时增量更新，用于百分位和图表基准
+        if industry_benchmarks is True:
+            industry_benchmarks = IndustryBenchmarks(
+                os.path.join(self.storage_dir, "industry_benchmarks.npz")
+            )
+            # 首次启动时从已有评分存储重建
+            if len(industry_benchmarks) == 0 and self.score_store is not None:
+                try:
+                    industry_benchmarks.rebuild(
+                        self.score_store.iter_scores(page_size=50000)
+                    )
+                except Exception as e:
+                    print(f"警告: 行业基准重建失败: {str(e)}")
+        # 空分布的len为0，不能用真值判断是否启用
+        self.industry_benchmarks = (
+            None if industry_benchmarks is False else industry_benchmarks
+        )
+
         # 从数据处理器获取指标配置
         self.default_indicators = self.processor.get_all_indicators()
 
+        # 推测性预计算：上传成功后在后台按默认参数预先评分
+        self.speculative_scoring = speculative_scoring
+        self._data_version = 0
+        self._speculation = None
+        # 当前数据的分阶段评分缓存，只改部分参数时前面的阶段直接复用
+        self._stage_cache = StageCache()
+        self._speculation_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="esg-speculation"
+        )
+
+        # 评分结果在后台单线程写入各存储，按提交顺序执行，不占用评分请求
+        self._store_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="esg-store"
+        )
+
+        # 上传文件的后台完整解析
+        self._data_lock = threading.RLock()
+        self._pending_load = None
+        self._upload_load = None  # 最近一次上传的后台解析任务
+        self._load_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="esg-loader"
+        )
+
+    def _set_current_data(
+        self, data, events, speculate=False, manual_company=None, problem=None
+    ):
+        """
+        更新当前数据，并使之前针对旧数据的推测性计算和后台解析失效
+        manual_company为手动录入数据的公司名称，上传的数据为None；
+        problem为数据未通过验证时的问题描述
+        """
+        with self._data_lock:
+            self.current_data = data
+            self.current_events = events
+            self._data_version += 1
+            self._stage_cache = StageCache()
+            self._pending_load = None
+            self.whatif_session = None
+            self._manual_company = manual_company
+            self._data_problem = problem
+            self._cancel_speculation()
+
+            if speculate and self.speculative_scoring:
+                self._start_speculation()
+
+    def set_speculative_scoring(self, enabled):
+        """
+        开启或关闭上传后的推测性预计算
+        """
+        self.speculative_scoring = bool(enabled)
+        if not self.speculative_scoring:
+            self._cancel_speculation()
+        return (
+            "已开启推测性预计算" if self.speculative_scoring else "已关闭推测性预计算"
+        )
+
+    def _scoring_key(self, scoring_args):
+        """
+        将评分参数规范化为可比较的键
+        """
+        return tuple(
+            (name, round(float(scoring_args[name]), 6))
+            for name in self.DEFAULT_SCORING_ARGS
+        )
+
+    def _start_speculation(self):
+        """
+        在后台按默认参数完成预处理、熵权计算和评分
+        """
+        if self.current_data is None:
+            return
+
+        cancel_event = threading.Event()
+        future = self._speculation_executor.submit(
+            self._run_speculation,
+            self.current_data,
+            self.current_events,
+            copy.deepcopy(self.model),
+            cancel_event,
+            self._stage_cache,
+        )
+        self._speculation = {
+            "version": self._data_version,
+            "key": self._scoring_key(self.DEFAULT_SCORING_ARGS),
+            "future": future,
+            "cancel": cancel_event,
+        }
+
+    def _run_speculation(self, data, events, model, cancel_event, stage_cache=None):
+        """
+        推测性评分任务
+        使用前台模型的副本：结果与前台评分出自同一模型配置，又不与前台计算共享参数状态；
+        各阶段结果写入该数据的分阶段缓存，前台改用其他参数评分时可复用预处理和熵权
+        """
+        if cancel_event.is_set():
+            return None
+
+        return self._compute_scores(
+            data,
+            events,
+            model,
+            dict(self.DEFAULT_SCORING_ARGS),
+            cancel_event=cancel_event,
+            stage_cache=stage_cache,
+        )
+
+    def _cancel_speculation(self):
+        """
+        取消已被新数据取代的推测性计算
+        """
+        if self._speculation is not None:
+            self._speculation["cancel"].set()
+            self._speculation["future"].cancel()
+            self._speculation = None
+
+    def _take_speculation(self, scoring_args):
+        """
+        若推测性计算与当前数据和参数一致，则返回其结果
+        """
+        speculation = self._speculation
+        if (
+            speculation is None
+            or speculation["version"] != self._data_version
+            or speculation["key"] != self._scoring_key(scoring_args)
+        ):
+            return None
+
+        try:
+            return speculation["future"].result()
+        except Exception as e:
+            print(f"警告: 推测性评分失败，改为重新计算: {str(e)}")
+            return None
+
     def create_manual_input_data(self, company_name, industry, *indicator_values):
         """
         创建手动输入的数据
@@ -51,39 +320,28 @@ class ESGGradioApp:
                 + self.default_indicators["G"]
             )
 
-            # 创建纵向数据格式
-            data_rows = []
-            for i, indicator in enumerate(all_indicators):
-                value = 0.0  # 默认值
-                if i < len(indicator_values) and indicator_values[i] is not None:
-                    value = float(indicator_values[i])
-
-                # 确定指标类别
-                if indicator in self.default_indicators["E"]:
-                    category = "E"
-                elif indicator in self.default_indicators["S"]:
-                    category = "S"
-                else:
-                    category = "G"
-
-                data_rows.append(
-                    {
-                        "company_name": company_name,
-                        "industry": industry,
-                        "category": category,
-                        "indicator": indicator,
-                        "value": value,
-                    }
-                )
+            # 指标值矩阵（1 × 指标数）及各指标所属类别
+            values = np.zeros((1, len(all_indicators)), dtype=np.float32)  # 默认值0
+            for i in range(min(len(indicator_values), len(all_indicators))):
+                if indicator_values[i] is not None:
+                    values[0, i] = float(indicator_values[i])
+            categories = (
+                ["E"] * len(self.default_indicators["E"])
+                + ["S"] * len(self.default_indicators["S"])
+                + ["G"] * len(self.default_indicators["G"])
+            )
 
-            # 创建DataFrame
-            data = pd.DataFrame(data_rows)
-            self.current_data = data
-            self.current_events = [[]]  # 默认无事件
+            # 创建紧凑的纵向数据格式（分类编码 + float32取值）
+            compact = CompactLongData.from_wide(
+                [company_name], [industry], values, all_indicators, categories
+            )
+            data = compact.to_frame()
+            # 默认无事件
+            self._set_current_data(data, [[]], manual_company=company_name)
 
             return (
                 data,
-                f"成功创建公司 {company_name} 的ESG数据（{len(data_rows)}个指标）",
+                f"成功创建公司 {company_name} 的ESG数据（{len(data)}个指标）",
             )
 
         except Exception as e:
@@ -92,41 +350,105 @@ class ESGGradioApp:
     def upload_custom_data(self, file):
         """
         上传自定义数据（支持CSV和Excel格式）
+        先只读取表头和前若干行立即预览，完整解析、验证和清洗在后台进行
         """
+        self._upload_load = None
         try:
             if file is None:
                 return pd.DataFrame(), "请上传文件"
 
-            # 根据文件扩展名读取文件
-            file_extension = os.path.splitext(file.name)[1].lower()
-            if file_extension in [".xlsx", ".xls"]:
-                data = pd.read_excel(file.name)
-            elif file_extension == ".csv":
-                data = pd.read_csv(file.name)
-            else:
-                return pd.DataFrame(), "不支持的文件格式，请上传CSV或Excel文件"
+            # 只读取预览行，不解析整个文件
+            preview = self.processor.read_preview(file.name, nrows=self.PREVIEW_ROWS)
 
-            # 使用processor进行数据验证和清洗
-            try:
-                self.processor.validate_company_data(data)
-                cleaned_data = self.processor.clean_and_standardize_data(data)
-                self.current_data = cleaned_data
-                self.current_events = [
-                    [] for _ in range(len(cleaned_data))
-                ]  # 默认无事件
-
-                preview = cleaned_data.head(10).round(3)
-                return preview, f"成功上传并处理{len(cleaned_data)}行数据"
-            except ValueError as ve:
-                # 如果验证失败，仍然加载数据但给出警告
-                self.current_data = data
-                self.current_events = [[] for _ in range(len(data))]  # 默认无事件
-                preview = data.head(10).round(3)
-                return preview, f"数据已上传但存在问题: {str(ve)}"
+            # 清空旧数据并在后台完整解析
+            self._set_current_data(None, None)
+            version = self._data_version
+            self._pending_load = self._load_executor.submit(
+                self._load_data_file, file.name, version
+            )
+            self._upload_load = self._pending_load
+
+            return (
+                preview.round(3),
+                f"已读取前{len(preview)}行预览，完整数据正在后台解析和清洗",
+            )
 
         except Exception as e:
             return pd.DataFrame(), f"文件上传失败: {str(e)}"
 
+    def _load_data_file(self, file_path, version=None):
+        """
+        完整读取、验证并清洗数据文件，并将其设为当前数据
+        返回 (数据, 问题描述)；验证失败时仍加载原始数据并返回问题描述
+        """
+        # 相同内容的文件直接从数据集缓存内存映射读取，跳过解析和清洗
+        cache_key = None
+        cached = None
+        if self.dataset_cache is not None:
+            cache_key = self.dataset_cache.file_key(
+                file_path, self.processor.float_dtype
+            )
+            cached = self.dataset_cache.get(cache_key)
+
+        if cached is not None:
+            data, problem = cached
+        else:
+            # 逐批读取并验证，合并后就地清洗；验证失败时保留原始数据和问题描述
+            data, problem = self.processor.load_data_file(file_path)
+
+            if cache_key is not None:
+                self.dataset_cache.put(cache_key, data, problem)
+
+        with self._data_lock:
+            # 解析期间已有新数据时，放弃本次结果
+            if version is not None and version != self._data_version:
+                return None, problem
+
+            self._set_current_data(
+                data,
+                [[] for _ in range(len(data))],  # 默认无事件
+                speculate=problem is None,
+                problem=problem,
+            )
+
+        return data, problem
+
+    def _wait_for_pending_load(self):
+        """
+        等待后台完整解析完成，返回 (错误信息, 问题描述)
+        解析失败时返回错误信息；数据未通过验证时仍已加载，返回问题描述
+        """
+        pending = self._pending_load
+
+        if pending is not None:
+            try:
+                pending.result()
+            except Exception as e:
+                return f"文件解析失败: {str(e)}", None
+
+        problem = self._data_problem
+        if problem is None:
+            return None, None
+        return None, f"数据已上传但存在问题: {problem}"
+
+    def data_load_status(self):
+        """
+        后台解析完成后的数据状态（上传预览之后更新）
+        上传失败或解析期间已有新数据时保持原状态
+        """
+        upload = self._upload_load
+        if upload is None:
+            return gr.skip()
+        try:
+            data, problem = upload.result()
+        except Exception as e:
+            return f"文件解析失败: {str(e)}"
+        if data is None:
+            return gr.skip()
+        if problem is not None:
+            return f"数据已上传但存在问题: {problem}"
+        return f"成功上传并处理{len(data)}行数据"
+
     def calculate_esg_scores(
         self,
         alpha,
@@ -152,224 +474,811 @@ class ESGGradioApp:
         green_finance_bonus=0.05,
         regulatory_compliance=1.0,
         use_cross_terms=True,
+        report_period=None,
     ):
         """
         计算ESG评分
+        report_period为写入存储的报告期，留空时取数据中的报告期列，都没有时为当前季度
         """
         try:
-            if self.current_data is None:
-                return pd.DataFrame(), "", "请先生成或上传数据"
-
-            # 使用当前加载的数据
-            company_data = self.current_data
-
-            # 检查数据格式
-            if "indicator" in company_data.columns and "value" in company_data.columns:
-                # 纵向格式数据，需要转换为横向格式
-                pivot_data = company_data.pivot_table(
-                    index=["company_name", "industry"],
-                    columns="indicator",
-                    values="value",
-                    fill_value=0,
-                ).reset_index()
-
-                # 获取ESG指标列
-                esg_columns = [
-                    col
-                    for col in pivot_data.columns
-                    if col not in ["company_name", "industry"]
-                ]
-                esg_data = pivot_data[esg_columns]
-                company_info = pivot_data[["company_name", "industry"]]
+            load_error, load_problem = self._wait_for_pending_load()
+            if load_error is not None:
+                return self._scoring_failed(load_error)
+
+            with self._data_lock:
+                data, events = self.current_data, self.current_events
+                stage_cache = self._stage_cache
+                manual_company = self._manual_company
+            if data is None:
+                return self._scoring_failed("请先生成或上传数据")
+
+            scoring_args = {
+                "alpha": alpha,
+                "include_events": include_events,
+                "e_weight": e_weight,
+                "s_weight": s_weight,
+                "g_weight": g_weight,
+                "delta_coeff": delta_coeff,
+                "epsilon_coeff": epsilon_coeff,
+                "zeta_coeff": zeta_coeff,
+                "severity_factor": severity_factor,
+                "max_bonus": max_bonus,
+                "bonus_steepness": bonus_steepness,
+                "threshold_multiplier": threshold_multiplier,
+                "data_breach_coeff": data_breach_coeff,
+                "env_pollution_coeff": env_pollution_coeff,
+                "safety_accident_coeff": safety_accident_coeff,
+                "corruption_coeff": corruption_coeff,
+                "labor_dispute_coeff": labor_dispute_coeff,
+                "product_recall_coeff": product_recall_coeff,
+                "carbon_tax_sensitivity": carbon_tax_sensitivity,
+                "esg_disclosure_weight": esg_disclosure_weight,
+                "green_finance_bonus": green_finance_bonus,
+                "regulatory_compliance": regulatory_compliance,
+                "use_cross_terms": use_cross_terms,
+            }
+
+            # 默认参数且数据未变化时，直接复用上传后的推测性计算结果
+            scored = self._take_speculation(scoring_args)
+            if scored is None:
+                scored = self._compute_scores(
+                    data, events, self.model, scoring_args, stage_cache=stage_cache
+                )
+            results_df, results, jia_model_params = scored
+
+            # 追加到评分存储：界面指定的报告期优先，其次为数据中的报告期列
+            report_period = (report_period or "").strip() or None
+            periods = None if report_period else self._data_periods(results_df)
+            self._store_scores(
+                results_df if periods is None else results_df.assign(报告期=periods),
+                jia_model_params,
+                period=report_period,
+            )
+
+            # 完整结果保留在服务端，表格只返回第一页
+            self.current_results = results_df
+            self.current_model_results = results
+            self._results_key = results_hash(results_df)
+            self.results_pager = ResultsPager(results_df)
+
+            # 手动录入的单公司结果：基于本次拟合的权重开启假设分析会话
+            self.whatif_session = None
+            if (
+                manual_company is not None
+                and len(results_df) == 1
+                and results_df["公司名称"].iloc[0] == manual_company
+            ):
+                try:
+                    self.whatif_session = WhatIfSession(
+                        results,
+                        industry=results_df["行业"].iloc[0],
+                        company_name=manual_company,
+                    )
+                except Exception as e:
+                    print(f"警告: 假设分析会话创建失败: {str(e)}")
+            first_page, _ = self.results_pager.page(page_size=self.RESULTS_PAGE_SIZE)
+
+            # 生成分析报告
+            report = self.generate_analysis_report(
+                results_df, results, jia_model_params
+            )
+            if load_problem is not None:
+                report = f"⚠️ {load_problem}\n\n{report}"
+
+            # 图表不在此处构建，由当前查看的面板按需生成
+            return first_page, None, report
+
+        except Exception as e:
+            return self._scoring_failed(f"评分计算失败: {str(e)}")
+
+    def _scoring_failed(self, message):
+        """
+        评分失败：清空上一次的评分结果，避免后续的分页和图表步骤把旧结果当作本次结果显示
+        """
+        self.current_results = None
+        self.current_model_results = None
+        self.results_pager = None
+        self._results_key = None
+        self.whatif_session = None
+        empty_fig = go.Figure().add_annotation(
+            text=message,
+            xref="paper",
+            yref="paper",
+            x=0.5,
+            y=0.5,
+            showarrow=False,
+        )
+        return pd.DataFrame(), empty_fig, message
+
+    def _scoring_data(self, company_data, model):
+        """
+        将当前数据整理为评分输入，返回 (指标数据, 公司信息)
+        指标数据为DataFrame，宽指标数据为SparseIndicatorMatrix
+        """
+        # 检查数据格式
+        if "indicator" in company_data.columns and "value" in company_data.columns:
+            long_data = CompactLongData.from_frame(company_data)
+            if (
+                long_data.n_entities > 1
+                and len(long_data.indicators) > self.SPARSE_INDICATOR_THRESHOLD
+            ):
+                # 宽指标数据直接构建稀疏矩阵，不散射为稠密矩阵
+                esg_data = SparseIndicatorMatrix.from_long(long_data, model)
+                if esg_data.duplicates:
+                    print(
+                        f"警告: 纵向数据中有{esg_data.duplicates}个重复单元格（已取平均值）"
+                    )
+                company_info = esg_data.entities
             else:
-                # 横向格式数据（原有格式）
-                esg_columns = [
-                    col
-                    for col in company_data.columns
-                    if col
-                    not in [
-                        "company_id",
-                        "company_name",
-                        "industry",
-                        "market_cap",
-                        "employees",
-                        "公司名称",
-                        "行业",
-                    ]
+                # 纵向格式数据，按分类编码直接散射为横向矩阵
+                pivot = long_data.pivot()
+                if pivot["duplicates"] or pivot["missing"]:
+                    print(
+                        f"警告: 纵向数据中有{pivot['duplicates']}个重复单元格（已取平均值），"
+                        f"{pivot['missing']}个缺失单元格"
+                    )
+
+                # 获取ESG指标列（缺失单元格：多公司时由预处理按中位数填充，单公司时记为0）
+                esg_columns = list(pivot["indicators"])
+                esg_data = pd.DataFrame(pivot["matrix"], columns=esg_columns)
+                if len(esg_data) == 1:
+                    esg_data = esg_data.fillna(0)
+                company_info = pivot["entities"]
+        else:
+            # 横向格式数据（原有格式）
+            esg_columns = [
+                col
+                for col in company_data.columns
+                if col
+                not in [
+                    "company_id",
+                    "company_name",
+                    "industry",
+                    "market_cap",
+                    "employees",
+                    "公司名称",
+                    "行业",
                 ]
+                + self.PERIOD_COLUMNS
+            ]
 
-                if len(esg_columns) == 0:
-                    return pd.DataFrame(), "", "数据中未找到ESG指标列"
+            if len(esg_columns) == 0:
+                raise ValueError("数据中未找到ESG指标列")
 
-                esg_data = company_data[esg_columns]
-                company_info = (
-                    company_data[["公司名称", "行业"]]
-                    if "公司名称" in company_data.columns
-                    else None
+            esg_data = company_data[esg_columns]
+            company_info = (
+                company_data[["公司名称", "行业"]]
+                if "公司名称" in company_data.columns
+                else None
+            )
+            if len(esg_data) > 1 and len(esg_columns) > self.SPARSE_INDICATOR_THRESHOLD:
+                # 宽指标数据按稀疏矩阵评分，缺失单元格不参与计算
+                esg_data = SparseIndicatorMatrix.from_wide(
+                    esg_data, company_info, model
                 )
 
-            # 处理事件数据
-            events = None  # 默认无事件
-            if include_events and self.current_events is not None:
-                # 如果current_events是嵌套列表，展平并过滤有效事件
-                flat_events = []
-                if isinstance(self.current_events, list):
-                    for event_list in self.current_events:
-                        if isinstance(event_list, list):
-                            for event in event_list:
-                                if isinstance(event, dict) and event:
-                                    flat_events.append(event)
-                        elif isinstance(event_list, dict) and event_list:
-                            flat_events.append(event_list)
-                events = flat_events if flat_events else None
-
-            # 获取行业信息
-            if "indicator" in company_data.columns and "value" in company_data.columns:
-                # 纵向格式
-                industry = (
-                    company_info["industry"].iloc[0]
-                    if len(company_info) > 0
-                    else "制造业"
-                )
+        return esg_data, company_info
+
+    def _compute_scores(
+        self,
+        company_data,
+        current_events,
+        model,
+        scoring_args,
+        cancel_event=None,
+        stage_cache=None,
+    ):
+        """
+        对给定数据执行预处理、赋权和评分，返回结果表、模型结果和甲模型参数
+        stage_cache为该数据的分阶段缓存，给出时只重算受参数变化影响的阶段
+        """
+        if stage_cache is None:
+            esg_data, company_info = self._scoring_data(company_data, model)
+        else:
+            esg_data, company_info = stage_cache.get_or_compute(
+                ("data",), lambda: self._scoring_data(company_data, model)
+            )
+
+        # 处理事件数据
+        events = None  # 默认无事件
+        if scoring_args["include_events"] and current_events is not None:
+            # 如果current_events是嵌套列表，展平并过滤有效事件
+            flat_events = []
+            if isinstance(current_events, list):
+                for event_list in current_events:
+                    if isinstance(event_list, list):
+                        for event in event_list:
+                            if isinstance(event, dict) and event:
+                                flat_events.append(event)
+                    elif isinstance(event_list, dict) and event_list:
+                        flat_events.append(event_list)
+            events = flat_events if flat_events else None
+
+        # 获取行业信息
+        if "indicator" in company_data.columns and "value" in company_data.columns:
+            # 纵向格式
+            industry = (
+                company_info["industry"].iloc[0] if len(company_info) > 0 else "制造业"
+            )
+        else:
+            # 横向格式
+            if "行业" in company_data.columns:
+                industry = company_data["行业"].iloc[0]
+            elif "industry" in company_data.columns:
+                industry = company_data["industry"].iloc[0]
             else:
-                # 横向格式
-                if "行业" in company_data.columns:
-                    industry = company_data["行业"].iloc[0]
-                elif "industry" in company_data.columns:
-                    industry = company_data["industry"].iloc[0]
-                else:
-                    industry = "制造业"
-
-            # 构建甲模型参数字典
-            jia_model_params = {
-                "alpha": float(alpha),
-                "industry_weights": {
-                    industry: {
-                        "E": float(e_weight),
-                        "S": float(s_weight),
-                        "G": float(g_weight),
-                    },
-                    "默认": {
-                        "E": float(e_weight),
-                        "S": float(s_weight),
-                        "G": float(g_weight),
-                    },
-                },
-                "cross_term_coeffs": {
-                    "delta": float(delta_coeff),
-                    "epsilon": float(epsilon_coeff),
-                    "zeta": float(zeta_coeff),
-                },
-                "nonlinear_params": {
-                    "severity_factor": float(severity_factor),
-                    "max_bonus": float(max_bonus),
-                    "bonus_steepness": float(bonus_steepness),
-                    "threshold_multiplier": float(threshold_multiplier),
+                industry = "制造业"
+
+        # 构建甲模型参数字典
+        jia_model_params = {
+            "alpha": float(scoring_args["alpha"]),
+            "industry_weights": {
+                industry: {
+                    "E": float(scoring_args["e_weight"]),
+                    "S": float(scoring_args["s_weight"]),
+                    "G": float(scoring_args["g_weight"]),
                 },
-                "event_coeffs": {
-                    "数据泄露": float(data_breach_coeff),
-                    "环境污染": float(env_pollution_coeff),
-                    "工伤事故": float(safety_accident_coeff),
-                    "财务舞弊": float(corruption_coeff),
-                    "劳工纠纷": float(labor_dispute_coeff),
-                    "产品质量": float(product_recall_coeff),
+                "默认": {
+                    "E": float(scoring_args["e_weight"]),
+                    "S": float(scoring_args["s_weight"]),
+                    "G": float(scoring_args["g_weight"]),
                 },
-                "policy_response": {
-                    "carbon_tax_sensitivity": float(carbon_tax_sensitivity),
-                    "esg_disclosure_weight": float(esg_disclosure_weight),
-                    "green_finance_bonus": float(green_finance_bonus),
-                },
-                "use_cross_terms": bool(use_cross_terms),
-            }
+            },
+            "cross_term_coeffs": {
+                "delta": float(scoring_args["delta_coeff"]),
+                "epsilon": float(scoring_args["epsilon_coeff"]),
+                "zeta": float(scoring_args["zeta_coeff"]),
+            },
+            "nonlinear_params": {
+                "severity_factor": float(scoring_args["severity_factor"]),
+                "max_bonus": float(scoring_args["max_bonus"]),
+                "bonus_steepness": float(scoring_args["bonus_steepness"]),
+                "threshold_multiplier": float(scoring_args["threshold_multiplier"]),
+            },
+            "event_coeffs": {
+                "数据泄露": float(scoring_args["data_breach_coeff"]),
+                "环境污染": float(scoring_args["env_pollution_coeff"]),
+                "工伤事故": float(scoring_args["safety_accident_coeff"]),
+                "财务舞弊": float(scoring_args["corruption_coeff"]),
+                "劳工纠纷": float(scoring_args["labor_dispute_coeff"]),
+                "产品质量": float(scoring_args["product_recall_coeff"]),
+            },
+            "policy_response": {
+                "carbon_tax_sensitivity": float(scoring_args["carbon_tax_sensitivity"]),
+                "esg_disclosure_weight": float(scoring_args["esg_disclosure_weight"]),
+                "green_finance_bonus": float(scoring_args["green_finance_bonus"]),
+            },
+            "use_cross_terms": bool(scoring_args["use_cross_terms"]),
+        }
 
-            # 计算ESG评分
-            results = self.model.calculate_esg_score(
-                data=esg_data,
-                industry=industry,
-                events=events,
-                alpha=float(alpha),
-                jia_model_params=jia_model_params,
+        # 推测性计算已被新数据取代时提前退出
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+
+        # 计算ESG评分
+        results = model.calculate_esg_score(
+            data=esg_data,
+            industry=industry,
+            events=events,
+            alpha=float(scoring_args["alpha"]),
+            jia_model_params=jia_model_params,
+            stage_cache=stage_cache,
+        )
+
+        # 整理结果
+        if "indicator" in company_data.columns and "value" in company_data.columns:
+            # 纵向格式数据
+            company_names = (
+                company_info["company_name"].tolist()
+                if len(company_info) > 0
+                else [f"公司{i + 1}" for i in range(len(esg_data))]
+            )
+            industries = (
+                company_info["industry"].tolist()
+                if len(company_info) > 0
+                else [industry] * len(esg_data)
+            )
+
+            results_df = pd.DataFrame(
+                {
+                    "公司ID": range(len(esg_data)),
+                    "公司名称": company_names,
+                    "行业": industries,
+                    "ESG总分": results["final_score"].round(2),
+                    "Base Score": results["base_score"].round(2),
+                    "E得分": results["e_score"].round(2),
+                    "S得分": results["s_score"].round(2),
+                    "G得分": results["g_score"].round(2),
+                }
+            )
+        else:
+            # 横向格式数据（原有格式）
+            results_df = pd.DataFrame(
+                {
+                    "公司ID": company_data["company_id"].tolist()
+                    if "company_id" in company_data.columns
+                    else range(len(esg_data)),
+                    "公司名称": company_data["company_name"].tolist()
+                    if "company_name" in company_data.columns
+                    else [f"公司{i + 1}" for i in range(len(esg_data))],
+                    "行业": company_data["industry"].tolist()
+                    if "industry" in company_data.columns
+                    else [industry] * len(esg_data),
+                    "ESG总分": results["final_score"].round(2),
+                    "Base Score": results["base_score"].round(2),
+                    "E得分": results["e_score"].round(2),
+                    "S得分": results["s_score"].round(2),
+                    "G得分": results["g_score"].round(2),
+                }
             )
 
-            # 整理结果
-            if (
-                "indicator" in self.current_data.columns
-                and "value" in self.current_data.columns
-            ):
-                # 纵向格式数据
-                company_names = (
-                    company_info["company_name"].tolist()
-                    if len(company_info) > 0
-                    else [f"公司{i + 1}" for i in range(len(esg_data))]
+        # 添加评级
+        results_df["评级"] = model.assign_ratings(
+            results_df["ESG总分"].to_numpy(), results_df["行业"].to_numpy()
+        )[0]
+
+        return results_df, results, jia_model_params
+
+    def _data_periods(self, results_df):
+        """
+        当前数据中各评分结果对应的报告期，数据没有报告期列时返回None
+        横向数据逐行对应；纵向数据的报告期须唯一
+        """
+        data = self.current_data
+        column = next((c for c in self.PERIOD_COLUMNS if c in data.columns), None)
+        if column is None:
+            return None
+
+        periods = data[column].astype(object)
+        if "indicator" not in data.columns and len(data) == len(results_df):
+            return periods.where(periods.notna(), None).to_numpy()
+
+        unique = periods.dropna().astype(str).unique()
+        if len(unique) == 1:
+            return np.full(len(results_df), unique[0], dtype=object)
+        print(f"警告: 纵向数据包含{len(unique)}个报告期，存储时使用默认报告期")
+        return None
+
+    def _store_scores(self, results_df, jia_model_params, period=None):
+        """
+        提交后台任务，将评分结果写入已启用的存储；未启用任何存储时返回None
+        """
+        if (
+            self.score_store is None
+            and self.score_history is None
+            and self.industry_benchmarks is None
+        ):
+            return None
+        return self._store_executor.submit(
+            self._write_scores, results_df.copy(), jia_model_params, period
+        )
+
+    def wait_for_storage(self):
+        """
+        等待已提交的存储写入全部完成（查询历史评分前调用）
+        """
+        self._store_executor.submit(lambda: None).result()
+
+    def _write_scores(self, results_df, jia_model_params, period=None):
+        """
+        将评分结果追加到持久化存储、分区评分历史和行业基准分布，存储失败不影响评分流程
+        """
+        run_id = None
+        if self.score_store is not None:
+            try:
+                run_id = self.score_store.append_run(
+                    results_df, params=jia_model_params, period=period
                 )
-                industries = (
-                    company_info["industry"].tolist()
-                    if len(company_info) > 0
-                    else [industry] * len(esg_data)
+            except Exception as e:
+                print(f"警告: 评分结果存储失败: {str(e)}")
+
+        if self.score_history is not None:
+            try:
+                run_id = self.score_history.write(
+                    results_df, period=period, run_id=run_id, params=jia_model_params
                 )
+            except Exception as e:
+                print(f"警告: 评分历史写入失败: {str(e)}")
+
+        if self.industry_benchmarks is not None:
+            try:
+                self.industry_benchmarks.update(results_df, period=period)
+            except Exception as e:
+                print(f"警告: 行业基准更新失败: {str(e)}")
+
+        return run_id
+
+    def page_results(
+        self,
+        page,
+        page_size,
+        sort_by,
+        descending,
+        industry,
+        rating,
+        min_score,
+        max_score,
+    ):
+        """
+        服务端分页：按筛选和排序条件返回当前页的评分结果
+        """
+        if self.results_pager is None:
+            return pd.DataFrame(), "暂无评分结果", 1
+
+        try:
+            page_df, info = self.results_pager.page(
+                page=page,
+                page_size=page_size or self.RESULTS_PAGE_SIZE,
+                sort_by=sort_by,
+                descending=descending,
+                industry=industry,
+                rating=rating,
+                min_score=min_score,
+                max_score=max_score,
+            )
+        except Exception as e:
+            return pd.DataFrame(), f"分页查询失败: {str(e)}", 1
+
+        page_info = (
+            f"共 {info['total']} 条记录（全部 {len(self.results_pager)} 条），"
+            f"第 {info['page']} / {info['pages']} 页"
+        )
+        return page_df, page_info, info["page"]
+
+    def previous_results_page(self, page, *args):
+        """
+        上一页
+        """
+        return self.page_results((page or 1) - 1, *args)
+
+    def next_results_page(self, page, *args):
+        """
+        下一页
+        """
+        return self.page_results((page or 1) + 1, *args)
+
+    def reset_results_view(self, page_size):
+        """
+        新的评分完成后重置筛选条件，并刷新行业、评级和排序列的可选项
+        """
+        pager = self.results_pager
+        page_df, page_info, _ = self.page_results(
+            1, page_size, None, True, None, None, None, None
+        )
+        return (
+            page_df,
+            gr.update(choices=pager.industries() if pager else [], value=[]),
+            gr.update(choices=pager.ratings() if pager else [], value=[]),
+            gr.update(
+                choices=pager.sortable_columns() if pager else [],
+                value=ResultsPager.DEFAULT_SORT if pager else None,
+            ),
+            True,
+            None,
+            None,
+            1,
+            page_info,
+        )
+
+    def build_chart(self, chart_type):
+        """
+        按需构建当前评分结果的某个图表面板（相同结果和图表类型直接复用缓存）
+        """
+        results_df = self.current_results
+        if results_df is None or len(results_df) == 0:
+            return self.create_visualization_charts(None, None)
+
+        if chart_type == "overview":
+            return self.figure_cache.get_or_build(
+                self._results_key,
+                chart_type,
+                lambda: self.create_visualization_charts(
+                    results_df, self.current_model_results
+                ),
+            )
+
+        if len(results_df) == 1:
+            return go.Figure().add_annotation(
+                text="单个公司的评分请在“综合仪表板”中查看",
+                xref="paper",
+                yref="paper",
+                x=0.5,
+                y=0.5,
+                showarrow=False,
+                font=dict(size=16, color="#888888"),
+            )
+
+        def build():
+            agg = self.figure_cache.get_or_build(
+                self._results_key,
+                "aggregate",
+                lambda: self.universe_dashboard.aggregate(results_df),
+            )
+            return self.universe_dashboard.panel_figure(agg, chart_type)
+
+        try:
+            return self.figure_cache.get_or_build(self._results_key, chart_type, build)
+        except Exception as e:
+            return go.Figure().add_annotation(
+                text=f"图表生成失败: {str(e)}",
+                xref="paper",
+                yref="paper",
+                x=0.5,
+                y=0.5,
+                showarrow=False,
+            )
+
+    def select_chart_panel(self, panel_label):
+        """
+        切换到某个图表面板时才构建该面板的图表
+        """
+        return panel_label, self.build_chart(self.CHART_PANELS[panel_label])
+
+    def render_chart_panels(self, selected_panel):
+        """
+        评分完成后只构建当前查看的面板，其余面板清空，待切换时再构建
+        评分失败时没有当前结果：综合仪表板保留评分步骤写入的错误提示，其余面板清空
+        """
+        if self.current_results is None:
+            overview = next(iter(self.CHART_PANELS))
+            return tuple(
+                gr.skip() if label == overview else None for label in self.CHART_PANELS
+            )
+        selected_panel = selected_panel or next(iter(self.CHART_PANELS))
+        return tuple(
+            self.build_chart(chart_type) if label == selected_panel else None
+            for label, chart_type in self.CHART_PANELS.items()
+        )
+
+    def current_attribution(self):
+        """
+        当前评分结果的指标贡献矩阵（按结果哈希缓存）
+        """
+        if self.current_results is None or self.current_model_results is None:
+            return None
+        return self.figure_cache.get_or_build(
+            self._results_key,
+            "attribution",
+            lambda: self.score_attribution.attribute(
+                self.current_model_results, self.current_results["行业"].iloc[0]
+            ),
+        )
+
+    def explain_company_score(self, company_name, top_n=10):
+        """
+        解释某家公司的得分：贡献最大的指标及其线性项、交叉项和饱和加分
+        """
+        try:
+            attribution = self.current_attribution()
+            if attribution is None:
+                return pd.DataFrame(), "请先完成ESG评分"
+
+            names = self.current_results["公司名称"].astype(str).to_numpy()
+            matches = np.flatnonzero(names == str(company_name or "").strip())
+            if len(matches) == 0:
+                return pd.DataFrame(), f"未找到公司: {company_name}"
+            row = int(matches[0])
+
+            drivers = self.score_attribution.top_drivers(
+                attribution, row, int(top_n or 10)
+            ).round(3)
+            contributions = attribution["contributions"].iloc[row]
+            summary = (
+                f"**{names[row]}** ESG总分 {contributions.sum():.2f} = "
+                f"指标贡献 {contributions.iloc[:-2].sum():.2f} + "
+                f"{ScoreAttribution.BASELINE} {contributions[ScoreAttribution.BASELINE]:.2f} + "
+                f"{ScoreAttribution.RESIDUAL} {contributions[ScoreAttribution.RESIDUAL]:.2f}"
+            )
+            return drivers, summary
 
-                results_df = pd.DataFrame(
-                    {
-                        "公司ID": range(len(esg_data)),
-                        "公司名称": company_names,
-                        "行业": industries,
-                        "ESG总分": results["final_score"].round(2),
-                        "Base Score": results["base_score"].round(2),
-                        "E得分": results["e_score"].round(2),
-                        "S得分": results["s_score"].round(2),
-                        "G得分": results["g_score"].round(2),
-                    }
+        except Exception as e:
+            return pd.DataFrame(), f"得分归因失败: {str(e)}"
+
+    def whatif_update(self, indicator, company_name, value):
+        """
+        假设分析：修改单个指标后增量更新得分（无需重新创建数据和完整评分）
+        仅作用于由手动录入数据评分得到的会话，且录入表单中的公司须与会话一致
+        """
+        session = self.whatif_session
+        if session is None:
+            return "手动录入的单公司数据评分完成后，修改指标即可实时查看得分变化"
+        if session.company_name != self._manual_company or session.company_name != (
+            company_name or ""
+        ):
+            return (
+                f"假设分析会话属于 {session.company_name}，"
+                "请重新创建该公司的ESG数据并评分"
+            )
+
+        try:
+            scores = session.update({indicator: value})
+        except Exception as e:
+            return f"假设分析失败: {str(e)}"
+
+        baseline = session.baseline
+        delta = scores["ESG总分"] - baseline["ESG总分"]
+        pillars = " | ".join(
+            f"{col[0]}: {scores[col]:.2f} ({scores[col] - baseline[col]:+.2f})"
+            for col in ("E得分", "S得分", "G得分")
+        )
+        return (
+            f"**假设分析** ESG总分 {scores['ESG总分']:.2f}（较评分结果 {delta:+.2f}），"
+            f"评级 {scores['评级']}\n\n{pillars}"
+        )
+
+    # 改进路径规划在界面上预览的行数
+    PLAN_PREVIEW_ROWS = 200
+
+    def plan_improvements(self, target_rating, progress=gr.Progress()):
+        """
+        为全部公司批量规划达到目标评级所需改进的最少指标，返回汇总、步骤预览和完整规划文件
+        """
+        try:
+            if self.current_results is None or self.current_model_results is None:
+                return pd.DataFrame(), pd.DataFrame(), None, "请先完成ESG评分"
+
+            results_df = self.current_results
+            summary, steps = self.improvement_planner.plan(
+                self.current_model_results,
+                target_rating,
+                industry=results_df["行业"].iloc[0],
+                industries=results_df["行业"].to_numpy(),
+            )
+            summary.insert(0, "公司名称", results_df["公司名称"].to_numpy())
+            summary.insert(1, "行业", results_df["行业"].to_numpy())
+            steps.insert(
+                1,
+                "公司名称",
+                results_df["公司名称"].to_numpy()[steps["公司序号"].to_numpy()],
+            )
+
+            # 完整规划（每个改进步骤一行）导出为文件，界面只预览前若干行
+            plan_df = steps.merge(
+                summary.drop(columns=["公司名称"]),
+                left_on="公司序号",
+                right_index=True,
+            ).round(4)
+            file_path, _ = self.export_results(plan_df, "CSV", progress)
+
+            counts = summary["状态"].value_counts()
+            status = (
+                f"目标评级“{target_rating}”：已达标 {counts.get('已达标', 0)} 家，"
+                f"可达成 {counts.get('可达成', 0)} 家，"
+                f"无法达成 {counts.get('无法达成', 0)} 家"
+            )
+            return (
+                summary.head(self.PLAN_PREVIEW_ROWS).round(2),
+                steps.head(self.PLAN_PREVIEW_ROWS).round(4),
+                file_path,
+                status,
+            )
+
+        except Exception as e:
+            return pd.DataFrame(), pd.DataFrame(), None, f"改进路径规划失败: {str(e)}"
+
+    # 排行榜分组方式：界面选项到结果列的映射
+    RANKING_GROUPS = {"不分组": None, "按行业": "行业", "按报告期": "报告期"}
+
+    def rank_companies(self, scope, top_n, bottom, group_by, industries, period):
+        """
+        排行榜：当前结果或评分历史中总分最高（或最低）的前N名，可按行业或报告期分组
+        评分历史逐批流式读取，只维护每组前N名
+        """
+        try:
+            top_n = int(top_n or 10)
+            if top_n <= 0:
+                raise ValueError("排行数量必须为正整数")
+            group_column = self.RANKING_GROUPS.get(group_by)
+            industries = [
+                name.strip()
+                for name in (industries or "").replace("，", ",").split(",")
+                if name.strip()
+            ]
+            period = (period or "").strip() or None
+
+            if scope == "评分历史":
+                ranking = self._rank_history(
+                    top_n, bottom, group_column, industries, period
                 )
             else:
-                # 横向格式数据（原有格式）
-                results_df = pd.DataFrame(
-                    {
-                        "公司ID": self.current_data["company_id"].tolist()
-                        if "company_id" in self.current_data.columns
-                        else range(len(esg_data)),
-                        "公司名称": self.current_data["company_name"].tolist()
-                        if "company_name" in self.current_data.columns
-                        else [f"公司{i + 1}" for i in range(len(esg_data))],
-                        "行业": self.current_data["industry"].tolist()
-                        if "industry" in self.current_data.columns
-                        else [industry] * len(esg_data),
-                        "ESG总分": results["final_score"].round(2),
-                        "Base Score": results["base_score"].round(2),
-                        "E得分": results["e_score"].round(2),
-                        "S得分": results["s_score"].round(2),
-                        "G得分": results["g_score"].round(2),
-                    }
-                )
+                ranking = self._rank_current(top_n, bottom, group_column, industries)
+
+            if ranking is None:
+                return pd.DataFrame(), "暂无可排行的评分数据"
+            return ranking, f"共 {len(ranking)} 条排行记录"
+
+        except Exception as e:
+            return pd.DataFrame(), f"排行查询失败: {str(e)}"
+
+    def _rank_current(self, top_n, bottom, group_column, industries):
+        results_df = self.current_results
+        if results_df is None or len(results_df) == 0:
+            return None
+        if industries:
+            results_df = results_df[results_df["行业"].astype(str).isin(industries)]
 
-            # 添加评级
-            results_df["评级"] = results_df["ESG总分"].apply(
-                lambda x: self.model.get_score_interpretation(x)[0]
+        scores = results_df["ESG总分"].to_numpy(dtype=np.float64)
+        if group_column == "行业":
+            groups = group_top_k(
+                scores, results_df["行业"].astype(str).to_numpy(), top_n, not bottom
             )
+            positions = list(groups.values())
+        else:
+            # 当前结果只有一个报告期，按报告期分组等同于不分组
+            positions = [top_k(scores, top_n, not bottom)]
+
+        frames = []
+        for selected in positions:
+            frame = results_df.iloc[selected]
+            frame.insert(0, "排名", np.arange(1, len(frame) + 1))
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    def _rank_history(self, top_n, bottom, group_column, industries, period):
+        # 包含刚提交、尚在后台写入的评分
+        self.wait_for_storage()
+        columns = {
+            field: label for label, field in ESGScoreStore.RESULT_COLUMNS.items()
+        }
+        columns["period"] = "报告期"
+        ranking = StreamingTopK(
+            top_n, column="ESG总分", largest=not bottom, by=group_column
+        )
 
-            # 生成可视化图表
-            charts = self.create_visualization_charts(results_df, results)
-
-            # 生成分析报告
-            report = self.generate_analysis_report(
-                results_df, results, jia_model_params
+        if self.score_history is not None:
+            chunks = self.score_history.scan(
+                industries=industries or None,
+                period_from=period,
+                period_to=period,
+                columns=list(columns),
             )
+        elif self.score_store is not None:
+            chunks = self.score_store.iter_scores(
+                page_size=50000,
+                industry=industries[0] if len(industries) == 1 else None,
+                period=period,
+            )
+        else:
+            return None
 
-            return results_df, charts, report
+        for chunk in chunks:
+            if industries:
+                chunk = chunk[chunk["industry"].isin(industries)]
+            ranking.push(chunk[list(columns)].rename(columns=columns))
+        result = ranking.result()
+        return result if len(result) > 0 else None
 
-        except Exception as e:
-            empty_fig = go.Figure().add_annotation(
-                text=f"评分计算失败: {str(e)}",
-                xref="paper",
-                yref="paper",
-                x=0.5,
-                y=0.5,
-                showarrow=False,
-            )
-            return pd.DataFrame(), empty_fig, f"评分计算失败: {str(e)}"
+    # 没有同业历史时的默认参考基准
+    DEFAULT_BENCHMARK = {
+        "mean": {"final_score": 70, "e_score": 70, "s_score": 70, "g_score": 70},
+        "top": 85,
+    }
+
+    def _industry_baseline(self, industry, total_score, company_name=None):
+        """
+        单公司图表使用的行业基准：同业均值、优秀企业分位和该公司的行业百分位
+        该公司自身的历史评分不计入同业基准
+        """
+        baseline = None
+        if self.industry_benchmarks is not None and industry is not None:
+            baseline = self.industry_benchmarks.baseline(industry, exclude=company_name)
+        if baseline is None or not set(self.DEFAULT_BENCHMARK["mean"]) <= set(
+            baseline["mean"]
+        ):
+            return dict(self.DEFAULT_BENCHMARK, caption="ESG总分")
+
+        percentile = self.industry_benchmarks.percentile(
+            industry, total_score, exclude=company_name
+        )
+        return dict(
+            baseline,
+            caption=f"ESG总分（行业分位{percentile:.0f}%，{baseline['count']}家同业）",
+        )
 
     def create_visualization_charts(self, results_df, model_results):
         """
-        创建单公司ESG详细分析图表仪表板
+        创建ESG分析图表仪表板
+        单公司结果显示详细分析，多公司结果显示全样本分布仪表板
         """
         try:
             if results_df is None or len(results_df) == 0:
@@ -383,7 +1292,11 @@ class ESGGradioApp:
                     font=dict(size=16, color="#888888"),
                 )
 
-            # 取第一个公司的数据进行详细分析
+            # 多公司结果：服务端汇总后绘制全样本仪表板
+            if len(results_df) > 1:
+                return self.universe_dashboard.figure(results_df)
+
+            # 单公司详细分析
             company_data = results_df.iloc[0]
             company_name = company_data.get("公司名称", "企业")
 
@@ -438,8 +1351,18 @@ class ESGGradioApp:
                 col=1,
             )
 
+            # 行业基准：有历史同业分布时使用真实同业均值和分位，否则使用默认参考值
+            total_score = company_data["ESG总分"]
+            benchmark = self._industry_baseline(
+                company_data.get("行业"), total_score, company_name
+            )
+
             # 添加行业平均水平参考线
-            industry_avg = [70, 70, 70]  # 假设的行业平均水平
+            industry_avg = [
+                benchmark["mean"]["e_score"],
+                benchmark["mean"]["s_score"],
+                benchmark["mean"]["g_score"],
+            ]
             fig.add_trace(
                 go.Scatterpolar(
                     r=industry_avg,
@@ -455,8 +1378,9 @@ class ESGGradioApp:
             )
 
             # 2. ESG总分仪表盘 (第1行第2列)
-            total_score = company_data["ESG总分"]
-            rating, description = self.model.get_score_interpretation(total_score)
+            rating, description = self.model.get_score_interpretation(
+                total_score, company_data.get("行业")
+            )
 
             # 确定仪表盘颜色
             if total_score >= 80:
@@ -473,8 +1397,11 @@ class ESGGradioApp:
                     mode="gauge+number+delta",
                     value=total_score,
                     domain={"x": [0, 1], "y": [0, 1]},
-                    title={"text": f"<b>{company_name}</b><br>ESG总分"},
-                    delta={"reference": 70, "position": "top"},
+                    title={"text": f"<b>{company_name}</b><br>{benchmark['caption']}"},
+                    delta={
+                        "reference": benchmark["mean"]["final_score"],
+                        "position": "top",
+                    },
                     gauge={
                         "axis": {"range": [None, 100]},
                         "bar": {"color": gauge_color},
@@ -498,8 +1425,8 @@ class ESGGradioApp:
             # 3. 评级与基准对比 (第1行第3列)
             benchmark_scores = {
                 "本企业": total_score,
-                "行业平均": 70,
-                "优秀企业": 85,
+                "行业平均": benchmark["mean"]["final_score"],
+                "优秀企业": benchmark["top"],
                 "政策要求": 60,
             }
 
@@ -658,7 +1585,7 @@ class ESGGradioApp:
                     font=dict(size=20, family="Arial Black"),
                     pad=dict(t=20),
                 ),
-                template="plotly_white",
+                template=BASE_TEMPLATE,
                 showlegend=True,
                 legend=dict(
                     orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5
@@ -816,242 +1743,34 @@ class ESGGradioApp:
             if results_df is None or len(results_df) == 0:
                 return "**❌ 无法生成报告**\n\n请先完成数据分析。"
 
-            current_time = datetime.now().strftime("%Y年%m月%d日")
-            results_df.iloc[0]["公司名称"] if len(
-                results_df
-            ) == 1 else f"{len(results_df)}家企业"
-
-            if template_type == "简化报告":
-                return self._generate_simplified_report(
-                    results_df, jia_model_params, current_time
-                )
-            elif template_type == "详细技术报告":
-                return self._generate_detailed_report(
-                    results_df, jia_model_params, current_time
-                )
-            elif template_type == "投资决策报告":
-                return self._generate_investment_report(
-                    results_df, jia_model_params, current_time
-                )
-            else:  # 标准分析报告
-                return self._generate_standard_report(
-                    results_df, jia_model_params, current_time
-                )
+            # 详细技术报告不包含模型权重统计（导入的结果没有模型中间结果）
+            return self.report_templates.render(
+                template_type, results_df, jia_model_params, model_results={}
+            )
 
         except Exception as e:
             return f"**❌ 报告生成失败**: {str(e)}"
 
-    def _generate_standard_report(self, results_df, jia_model_params, current_time):
-        """生成标准分析报告"""
-        return "标准分析报告功能正在开发中..."
-
-    def _generate_simplified_report(self, results_df, jia_model_params, current_time):
-        """生成简化报告"""
-        return "简化报告功能正在开发中..."
-
-    def _generate_detailed_report(self, results_df, jia_model_params, current_time):
-        """生成详细技术报告"""
-        return "详细技术报告功能正在开发中..."
-
-    def _generate_investment_report(self, results_df, jia_model_params, current_time):
-        """生成投资决策报告"""
-        return "投资决策报告功能正在开发中..."
-
-    def _generate_standard_report(self, results_df, jia_model_params, current_time):
-        """生成标准报告"""
-        report = []
-        company_name = (
-            results_df.iloc[0]["公司名称"]
-            if len(results_df) == 1
-            else f"{len(results_df)}家企业"
-        )
-
-        report.append("# 📋 ESG评分分析报告")
-        report.append(f"## {company_name} ESG表现评估")
-        report.append(f"\n**报告日期**: {current_time}")
-        report.append(f"**评估对象**: {company_name}")
-        report.append("**评估方法**: 甲模型量化评分体系")
-        report.append("**QureLab团队** 专业出品\n")
-        report.append("---\n")
-
-        # 执行摘要
-        avg_score = results_df["ESG总分"].mean()
-        report.append("## 📊 执行摘要")
-        report.append(f"本报告采用甲模型对{company_name}进行ESG评分分析。")
-        report.append(f"综合评分为**{avg_score:.2f}分**，")
-
-        if avg_score >= 80:
-            report.append("表现**优秀**，具备强劲的可持续发展能力。")
-        elif avg_score >= 60:
-            report.append("表现**良好**，在可持续发展方面具有一定基础。")
-        elif avg_score >= 40:
-            report.append("表现**中等**，需要在多个维度加强改进。")
-        else:
-            report.append("表现**有待提升**，建议全面优化ESG管理体系。")
-
-        # 主要发现
-        report.append("\n### 🔍 主要发现")
-        if len(results_df) == 1:
-            company = results_df.iloc[0]
-            dimensions = [
-                ("环境(E)", company["E得分"]),
-                ("社会(S)", company["S得分"]),
-                ("治理(G)", company["G得分"]),
-            ]
-            best_dim = max(dimensions, key=lambda x: x[1])
-            worst_dim = min(dimensions, key=lambda x: x[1])
-
-            report.append(
-                f"- **优势领域**: {best_dim[0]}维度表现突出({best_dim[1]:.1f}分)"
-            )
-            report.append(
-                f"- **改进重点**: {worst_dim[0]}维度需要加强({worst_dim[1]:.1f}分)"
-            )
-            report.append(f"- **整体评级**: {company['评级']}")
-
-        # 详细分析
-        report.append("\n## 📈 详细分析")
-        report.append("### 各维度表现")
-
-        for dim in ["E得分", "S得分", "G得分"]:
-            dim_name = {"E得分": "环境(E)", "S得分": "社会(S)", "G得分": "治理(G)"}[dim]
-            dim_avg = results_df[dim].mean()
-
-            if dim_avg >= 80:
-                performance = "优秀"
-                suggestion = "继续保持领先优势"
-            elif dim_avg >= 60:
-                performance = "良好"
-                suggestion = "可进一步优化提升"
-            elif dim_avg >= 40:
-                performance = "中等"
-                suggestion = "需要重点改进"
-            else:
-                performance = "待提升"
-                suggestion = "急需全面改善"
-
-            report.append(f"\n**{dim_name}**: {dim_avg:.1f}分 ({performance})")
-            report.append(f"- {suggestion}")
-
-        # 建议
-        report.append("\n## 💡 改进建议")
-        if len(results_df) == 1:
-            company = results_df.iloc[0]
-            if company["E得分"] < 70:
-                report.append("- **环境方面**: 加强碳排放管控，提升可再生能源使用比例")
-            if company["S得分"] < 70:
-                report.append(
-                    "- **社会方面**: 完善员工福利体系，加强供应链社会责任管理"
-                )
-            if company["G得分"] < 70:
-                report.append("- **治理方面**: 强化董事会独立性，完善风险管理体系")
-
-        report.append("\n---")
-        report.append("\n*本报告基于甲模型量化评分体系生成，仅供参考*")
-
-        return "\n".join(report)
-
-    def _generate_simplified_report(self, results_df, jia_model_params, current_time):
-        """生成简化报告"""
-        company_name = (
-            results_df.iloc[0]["公司名称"]
-            if len(results_df) == 1
-            else f"{len(results_df)}家企业"
-        )
-        avg_score = results_df["ESG总分"].mean()
-
-        report = [
-            "# 📋 ESG评分简报",
-            f"**{company_name}** | {current_time}",
-            "",
-            f"**综合得分**: {avg_score:.1f}分",
-            f"**评级**: {results_df.iloc[0]['评级'] if len(results_df) == 1 else '见详细数据'}",
-            "",
-            "**各维度得分**:",
-            f"- 环境(E): {results_df['E得分'].mean():.1f}分",
-            f"- 社会(S): {results_df['S得分'].mean():.1f}分",
-            f"- 治理(G): {results_df['G得分'].mean():.1f}分",
-            "",
-            "*QureLab甲模型评估结果*",
-        ]
-        return "\n".join(report)
-
-    def _generate_detailed_report(self, results_df, jia_model_params, current_time):
-        """生成详细报告"""
-        # 这里可以调用原来的generate_analysis_report函数
-        return self.generate_analysis_report(results_df, {}, jia_model_params)
-
-    def _generate_investment_report(self, results_df, jia_model_params, current_time):
-        """生成投资分析报告"""
-        company_name = (
-            results_df.iloc[0]["公司名称"]
-            if len(results_df) == 1
-            else f"{len(results_df)}家企业"
-        )
-        avg_score = results_df["ESG总分"].mean()
-
-        report = [
-            "# 💼 ESG投资分析报告",
-            f"## {company_name} 投资建议",
-            f"**分析日期**: {current_time}",
-            "",
-            "### 🎯 投资要点",
-            f"- **ESG得分**: {avg_score:.1f}分",
-            f"- **投资评级**: {'推荐' if avg_score >= 75 else '观望' if avg_score >= 60 else '谨慎'}",
-            "",
-            "### 📊 风险评估",
-        ]
-
-        if avg_score >= 80:
-            report.append("- **风险等级**: 低风险")
-            report.append("- **投资建议**: 优质ESG标的，建议重点关注")
-        elif avg_score >= 60:
-            report.append("- **风险等级**: 中等风险")
-            report.append("- **投资建议**: ESG表现中等，可适度配置")
-        else:
-            report.append("- **风险等级**: 高风险")
-            report.append("- **投资建议**: ESG风险较高，建议谨慎投资")
-
-        report.extend(
-            [
-                "",
-                "### 💡 投资逻辑",
-                "基于甲模型量化分析，该标的在ESG各维度表现如下：",
-                f"- 环境维度: {results_df['E得分'].mean():.1f}分",
-                f"- 社会维度: {results_df['S得分'].mean():.1f}分",
-                f"- 治理维度: {results_df['G得分'].mean():.1f}分",
-                "",
-                "*本报告仅供投资参考，不构成投资建议*",
-            ]
-        )
-
-        return "\n".join(report)
-
     def export_text_content(self, content, filename_prefix):
         """
         导出文本内容为文件
         """
         try:
-            import tempfile
-            import os
-            from datetime import datetime
-
             if not content or content.strip() == "":
                 return None
 
-            # 创建临时文件
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{filename_prefix}_{timestamp}.txt"
 
-            # 使用临时目录
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, filename)
+            def write(file_path):
+                with open(file_path, "w", encoding="utf-8") as f:
+                    f.write(content)
 
-            # 写入文件
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content)
-
-            return file_path
+            # 相同内容重复导出时直接复用已有文件
+            return self.export_store.get_or_create(
+                self.export_store.content_key(content, "txt"),
+                f"{filename_prefix}_{timestamp}.txt",
+                write,
+            )
 
         except Exception as e:
             print(f"导出文件失败: {str(e)}")
@@ -1064,438 +1783,76 @@ class ESGGradioApp:
         生成专业的ESG分析报告（基于甲模型设计理念）
         """
         try:
-            report = []
-            current_time = datetime.now().strftime("%Y年%m月%d日")
-
-            # 报告标题和基本信息
-            report.append("# 企业ESG评分分析报告")
-            report.append("## ——基于甲模型的量化投资策略研究")
-            report.append("\n**QureLab团队研究成果**\n")
-            report.append(f"**报告日期**: {current_time}")
-            report.append(f"**样本规模**: {len(results_df)}家企业")
-            report.append("**研究方法**: 甲模型量化评分体系")
-            report.append("\n---\n")
-
-            # 摘要
-            report.append("## 摘要")
-            avg_score = results_df["ESG总分"].mean()
-            report.append(
-                f"本报告基于甲模型设计理念，对{len(results_df)}家企业进行了全面的ESG评分分析。"
-            )
-            report.append(
-                f"样本企业ESG平均得分为{avg_score:.2f}分，整体表现{'良好' if avg_score >= 70 else '中等' if avg_score >= 50 else '有待提升'}。"
-            )
-            report.append("甲模型通过多维度交叉项效应、非线性调整机制和政策响应参数，")
-            report.append(
-                "实现了对企业ESG表现的精准量化评估，为投资决策提供了科学依据。\n"
-            )
-
-            # 关键词
-            report.append(
-                "**关键词**: ESG评分、甲模型、量化投资、可持续发展、风险管理\n"
-            )
-
-            # 1. 引言
-            report.append("## 1. 引言")
-            report.append("### 1.1 研究背景")
-            report.append(
-                "随着全球可持续发展理念的深入推进，ESG（环境、社会、治理）投资已成为"
-            )
-            report.append(
-                "现代金融市场的重要趋势。2024年中国人民银行等七部委联合印发的"
+            return self.report_templates.render(
+                "详细技术报告", results_df, jia_model_params, model_results
             )
-            report.append("《关于进一步强化金融支持绿色低碳发展的指导意见》明确提出，")
-            report.append(
-                "要建立国际领先的金融支持绿色低碳发展体系，推动ESG信息披露规范化。"
-            )
-
-            report.append("\n### 1.2 甲模型设计理念")
-            report.append("甲模型是QureLab团队基于量化投资理论和ESG评估实践开发的")
-            report.append("综合评分体系。该模型融合了多模态数据处理、机器学习算法")
-            report.append("和金融工程方法，具有以下核心特征：")
-            report.append("- **多维度整合**: 通过E×S、E×G、S×G交叉项效应建模")
-            report.append("- **非线性调整**: 采用事件分级惩罚和饱和函数奖励机制")
-            report.append("- **政策响应**: 动态反映绿色金融政策和监管要求")
-            report.append("- **行业差异化**: 基于行业特征的权重优化配置\n")
-
-            # 2. 甲模型参数配置
-            if jia_model_params:
-                report.append("## 2. 甲模型参数配置")
-                report.append("### 2.1 基础权重体系")
-                report.append("甲模型采用组合赋权法，结合主观权重和客观权重：")
-                report.append(
-                    f"- 环境(E)维度权重: {jia_model_params.get('e_weight', 0.4):.3f}"
-                )
-                report.append(
-                    f"- 社会(S)维度权重: {jia_model_params.get('s_weight', 0.3):.3f}"
-                )
-                report.append(
-                    f"- 治理(G)维度权重: {jia_model_params.get('g_weight', 0.3):.3f}"
-                )
-                report.append(
-                    f"- 主观权重系数α: {jia_model_params.get('alpha', 0.5):.3f}"
-                )
-
-                report.append("\n### 2.2 交叉项联动系数")
-                report.append("基于现代投资组合理论，甲模型引入维度间协同效应：")
-                report.append(
-                    f"- E×S联动效应系数(δ): {jia_model_params.get('delta_coeff', 0.1):.3f}"
-                )
-                report.append(
-                    f"- E×G联动效应系数(ε): {jia_model_params.get('epsilon_coeff', 0.15):.3f}"
-                )
-                report.append(
-                    f"- S×G联动效应系数(ζ): {jia_model_params.get('zeta_coeff', 0.12):.3f}"
-                )
-
-                report.append("\n### 2.3 非线性调整参数")
-                report.append("采用行为金融学理论，对极端事件进行非线性处理：")
-                report.append(
-                    f"- 事件严重度放大因子: {jia_model_params.get('severity_factor', 0.4):.3f}"
-                )
-                report.append(
-                    f"- 最大奖励分数: {jia_model_params.get('max_bonus', 10):.1f}分"
-                )
-                report.append(
-                    f"- 奖励曲线陡度: {jia_model_params.get('bonus_steepness', 0.8):.3f}"
-                )
-                report.append(
-                    f"- 阈值乘数: {jia_model_params.get('threshold_multiplier', 1.0):.3f}"
-                )
-
-                report.append("\n### 2.4 事件类型风险系数")
-                report.append("基于历史数据统计和专家判断，设定差异化风险权重：")
-                report.append(
-                    f"- 数据泄露系数: {jia_model_params.get('data_breach_coeff', 1.2):.2f}"
-                )
-                report.append(
-                    f"- 环境污染系数: {jia_model_params.get('env_pollution_coeff', 1.8):.2f}"
-                )
-                report.append(
-                    f"- 安全事故系数: {jia_model_params.get('safety_accident_coeff', 1.5):.2f}"
-                )
-                report.append(
-                    f"- 腐败违规系数: {jia_model_params.get('corruption_coeff', 2.0):.2f}"
-                )
-                report.append(
-                    f"- 劳资纠纷系数: {jia_model_params.get('labor_dispute_coeff', 1.0):.2f}"
-                )
-                report.append(
-                    f"- 产品召回系数: {jia_model_params.get('product_recall_coeff', 1.3):.2f}"
-                )
-
-                report.append("\n### 2.5 政策响应机制")
-                report.append("结合绿色金融政策导向，动态调整评分权重：")
-                report.append(
-                    f"- 碳税敏感系数(β): {jia_model_params.get('carbon_tax_sensitivity', 0.08):.3f}"
-                )
-                report.append(
-                    f"- ESG披露权重: {jia_model_params.get('esg_disclosure_weight', 0.15):.3f}"
-                )
-                report.append(
-                    f"- 绿色金融奖励: {jia_model_params.get('green_finance_bonus', 0.05):.3f}"
-                )
-                report.append(
-                    f"- 监管合规系数: {jia_model_params.get('regulatory_compliance', 1.0):.3f}"
-                )
 
-                report.append("\n### 2.6 模型功能配置")
-                report.append(
-                    f"- 交叉项效应: {'启用' if jia_model_params.get('use_cross_terms', True) else '禁用'}"
-                )
-                report.append(
-                    f"- 事件调整机制: {'启用' if jia_model_params.get('include_events', False) else '禁用'}"
-                )
-                report.append("")
-
-            # 3. 数据统计分析
-            report.append("## 3. 样本数据统计分析")
-            report.append("### 3.1 基本统计信息")
-            report.append(f"- **样本规模**: {len(results_df)}家企业")
-            report.append(f"- **ESG平均得分**: {results_df['ESG总分'].mean():.2f}分")
-            report.append(f"- **标准差**: {results_df['ESG总分'].std():.2f}")
-            report.append(f"- **最高得分**: {results_df['ESG总分'].max():.2f}分")
-            report.append(f"- **最低得分**: {results_df['ESG总分'].min():.2f}分")
-            report.append(f"- **中位数**: {results_df['ESG总分'].median():.2f}分")
-
-            # 分位数分析
-            q25 = results_df["ESG总分"].quantile(0.25)
-            q75 = results_df["ESG总分"].quantile(0.75)
-            report.append(f"- **第一四分位数(Q1)**: {q25:.2f}分")
-            report.append(f"- **第三四分位数(Q3)**: {q75:.2f}分")
-            report.append(f"- **四分位距(IQR)**: {q75 - q25:.2f}分\n")
+        except Exception as e:
+            return f"报告生成失败: {str(e)}"
 
-            # 评级分布
-            report.append("### 3.2 ESG评级分布")
-            rating_dist = results_df["评级"].value_counts().sort_index(ascending=False)
-            report.append("| 评级 | 企业数量 | 占比 |")
-            report.append("|------|----------|------|")
-            for rating, count in rating_dist.items():
-                percentage = count / len(results_df) * 100
-                report.append(f"| {rating} | {count}家 | {percentage:.1f}% |")
-            report.append("")
-
-            # 维度分析
-            report.append("### 3.3 各维度表现分析")
-            e_avg = results_df["E得分"].mean()
-            s_avg = results_df["S得分"].mean()
-            g_avg = results_df["G得分"].mean()
-
-            report.append("| 维度 | 平均得分 | 标准差 | 最高分 | 最低分 |")
-            report.append("|------|----------|--------|--------|--------|")
-            report.append(
-                f"| 环境(E) | {e_avg:.2f} | {results_df['E得分'].std():.2f} | {results_df['E得分'].max():.2f} | {results_df['E得分'].min():.2f} |"
-            )
-            report.append(
-                f"| 社会(S) | {s_avg:.2f} | {results_df['S得分'].std():.2f} | {results_df['S得分'].max():.2f} | {results_df['S得分'].min():.2f} |"
-            )
-            report.append(
-                f"| 治理(G) | {g_avg:.2f} | {results_df['G得分'].std():.2f} | {results_df['G得分'].max():.2f} | {results_df['G得分'].min():.2f} |"
-            )
-            report.append("")
-
-            # 4. 企业表现排名
-            report.append("## 4. 企业ESG表现排名")
-
-            # 表现最佳企业
-            report.append("### 4.1 ESG表现优秀企业（前10名）")
-            top10 = results_df.nlargest(10, "ESG总分")
-            report.append(
-                "| 排名 | 企业名称 | ESG总分 | 评级 | E得分 | S得分 | G得分 |"
-            )
-            report.append(
-                "|------|----------|---------|------|-------|-------|-------|"
-            )
-            for i, (idx, row) in enumerate(top10.iterrows(), 1):
-                report.append(
-                    f"| {i} | {row['公司名称']} | {row['ESG总分']:.2f} | {row['评级']} | {row['E得分']:.2f} | {row['S得分']:.2f} | {row['G得分']:.2f} |"
-                )
-            report.append("")
-
-            # 需要改进的企业
-            report.append("### 4.2 ESG表现待提升企业（后5名）")
-            bottom5 = results_df.nsmallest(5, "ESG总分")
-            report.append("| 排名 | 企业名称 | ESG总分 | 评级 | 主要问题 |")
-            report.append("|------|----------|---------|------|----------|")
-            for i, (idx, row) in enumerate(bottom5.iterrows(), 1):
-                # 找出最低的维度
-                min_dim = min(
-                    [(row["E得分"], "E"), (row["S得分"], "S"), (row["G得分"], "G")]
-                )
-                problem = f"{min_dim[1]}维度偏低({min_dim[0]:.1f}分)"
-                report.append(
-                    f"| {len(results_df) - len(bottom5) + i} | {row['公司名称']} | {row['ESG总分']:.2f} | {row['评级']} | {problem} |"
-                )
-            report.append("")
-
-            # 5. 量化投资策略分析
-            report.append("## 5. 基于甲模型的量化投资策略分析")
-            report.append("### 5.1 数据驱动的投资决策")
-            report.append("根据量化投资理论，甲模型采用多模态数据处理技术，")
-            report.append("整合了结构化财务数据、非结构化新闻舆情、")
-            report.append("以及实时政策信息，形成全方位的ESG评估体系。")
-
-            report.append("\n### 5.2 因子分析与特征工程")
-            report.append("甲模型构建了三类核心因子：")
-            report.append("- **量价因子**: 基于市场交易数据的技术指标")
-            report.append("- **基本面因子**: 来源于财务报表和ESG披露信息")
-            report.append("- **另类因子**: 包括舆情数据、政策响应等")
-
-            report.append("\n### 5.3 风险管理与组合优化")
-            high_risk_count = len(results_df[results_df["ESG总分"] < 40])
-            medium_risk_count = len(
-                results_df[(results_df["ESG总分"] >= 40) & (results_df["ESG总分"] < 70)]
-            )
-            low_risk_count = len(results_df[results_df["ESG总分"] >= 70])
-
-            report.append("基于ESG评分的风险分层结果：")
-            report.append(
-                f"- **低风险组合** (ESG≥70分): {low_risk_count}家企业 ({low_risk_count / len(results_df) * 100:.1f}%)"
-            )
-            report.append(
-                f"- **中等风险组合** (40≤ESG<70分): {medium_risk_count}家企业 ({medium_risk_count / len(results_df) * 100:.1f}%)"
-            )
-            report.append(
-                f"- **高风险组合** (ESG<40分): {high_risk_count}家企业 ({high_risk_count / len(results_df) * 100:.1f}%)"
-            )
-
-            # 6. 政策环境分析
-            report.append("\n## 6. 绿色金融政策环境分析")
-            report.append("### 6.1 政策背景")
-            report.append("2024年10月，中国人民银行等四部委联合印发")
-            report.append("《关于发挥绿色金融作用 服务美丽中国建设的意见》，")
-            report.append("明确了绿色金融支持美丽中国建设的重点领域和实施路径。")
-
-            report.append("\n### 6.2 政策影响分析")
-            report.append("甲模型的政策响应机制体现在以下方面：")
-            if jia_model_params:
-                carbon_sensitivity = jia_model_params.get(
-                    "carbon_tax_sensitivity", 0.08
-                )
-                disclosure_weight = jia_model_params.get("esg_disclosure_weight", 0.15)
-                green_bonus = jia_model_params.get("green_finance_bonus", 0.05)
+    def _export_progress(self, progress, desc):
+        """
+        将导出器的行数进度转换为界面进度条
+        """
 
-                report.append(
-                    f"- **碳税敏感性调整**: 系数{carbon_sensitivity:.3f}，反映碳定价政策影响"
-                )
-                report.append(
-                    f"- **ESG披露权重**: {disclosure_weight:.3f}，鼓励信息透明度"
+        def report(written, total):
+            if progress is not None:
+                progress(
+                    written / total if total else None, desc=f"{desc}: {written}行"
                 )
-                report.append(
-                    f"- **绿色金融奖励**: {green_bonus:.3f}，支持绿色项目融资"
-                )
-
-            # 7. 模型验证与回测
-            if "weights" in model_results:
-                report.append("\n## 7. 模型验证与回测分析")
-                weights = model_results["weights"]
-                report.append("### 7.1 权重分布统计")
-                report.append(f"- 权重向量维度: {len(weights)}")
-                report.append(f"- 权重最大值: {weights.max():.4f}")
-                report.append(f"- 权重最小值: {weights.min():.4f}")
-                report.append(f"- 权重标准差: {weights.std():.4f}")
-
-                # 计算权重集中度
-                weight_concentration = (weights**2).sum()
-                report.append(f"- 权重集中度(HHI): {weight_concentration:.4f}")
-
-            # 8. 投资建议
-            report.append("\n## 8. 投资策略建议")
-
-            # 基于平均得分给出建议
-            report.append("### 8.1 维度优化建议")
-            if e_avg < 50:
-                report.append("**环境维度改进**:")
-                report.append("- 加大清洁能源投资，推进碳中和目标")
-                report.append("- 建立环境管理体系，获得ISO14001认证")
-                report.append("- 开展环境风险评估，制定应急预案")
-
-            if s_avg < 50:
-                report.append("\n**社会维度改进**:")
-                report.append("- 完善员工福利体系，提升员工满意度")
-                report.append("- 加强供应链社会责任管理")
-                report.append("- 积极参与社区公益活动")
-
-            if g_avg < 50:
-                report.append("\n**治理维度改进**:")
-                report.append("- 优化董事会结构，提高独立董事比例")
-                report.append("- 建立健全内控制度和风险管理体系")
-                report.append("- 加强信息披露透明度")
-
-            # 量化投资建议
-            report.append("\n### 8.2 量化投资策略建议")
-            report.append("基于甲模型分析结果，建议采用以下投资策略：")
-
-            report.append("\n**1. 多因子选股策略**")
-            report.append("- 构建ESG-增强型多因子模型")
-            report.append("- 结合价值、成长、质量因子")
-            report.append("- 动态调整因子权重")
-
-            report.append("\n**2. 风险平价策略**")
-            report.append("- 基于ESG评分进行风险预算分配")
-            report.append("- 控制单一维度风险暴露")
-            report.append("- 实施动态再平衡")
-
-            report.append("\n**3. 事件驱动策略**")
-            report.append("- 监控ESG相关负面事件")
-            report.append("- 利用市场过度反应获取超额收益")
-            report.append("- 建立事件影响评估模型")
-
-            # 甲模型特色建议
-            if jia_model_params:
-                report.append("\n### 8.3 基于甲模型的专业建议")
-                report.append("**价值导向投资**:")
-                report.append("- 将ESG理念融入投资决策全流程")
-                report.append("- 关注长期价值创造能力")
-                report.append("- 平衡财务回报与社会效益")
-
-                report.append("\n**实质性原则**:")
-                report.append("- 重点关注对业务影响最大的ESG议题")
-                report.append("- 建立行业特定的ESG评估框架")
-                report.append("- 定期更新重要性矩阵")
-
-                report.append("\n**利益相关方协同**:")
-                report.append("- 加强与投资者的ESG沟通")
-                report.append("- 建立客户ESG需求反馈机制")
-                report.append("- 推动供应链ESG标准统一")
-
-            # 9. 结论
-            report.append("\n## 9. 结论")
-            report.append(
-                f"本研究基于甲模型对{len(results_df)}家企业进行了全面的ESG评分分析。"
-            )
-            report.append("研究发现，甲模型通过多维度交叉项效应、非线性调整机制")
-            report.append("和政策响应参数，能够有效识别企业ESG风险和机遇，")
-            report.append("为量化投资决策提供了科学依据。")
-
-            report.append("\n未来研究方向包括：")
-            report.append("- 扩大样本规模，增强模型泛化能力")
-            report.append("- 引入更多另类数据源")
-            report.append("- 开发实时ESG评分系统")
-            report.append("- 构建ESG投资组合优化算法")
-
-            # 参考文献
-            report.append("\n## 参考文献")
-            report.append(
-                "[1] 中国人民银行等. 关于进一步强化金融支持绿色低碳发展的指导意见[Z]. 2024."
-            )
-            report.append(
-                "[2] 中国人民银行等. 关于发挥绿色金融作用 服务美丽中国建设的意见[Z]. 2024."
-            )
-            report.append(
-                "[3] Markowitz, H. Portfolio Selection[J]. Journal of Finance, 1952, 7(1): 77-91."
-            )
-            report.append(
-                "[4] Fama, E. F., French, K. R. Common risk factors in the returns on stocks and bonds[J]. Journal of Financial Economics, 1993, 33(1): 3-56."
-            )
-
-            report.append("\n---")
-            report.append(
-                "\n**声明**: 本报告仅供研究参考，不构成投资建议。投资有风险，决策需谨慎。"
-            )
-            report.append(f"\n**QureLab团队** | {current_time}")
-
-            return "\n".join(report)
 
-        except Exception as e:
-            return f"报告生成失败: {str(e)}"
+        return report
 
-    def export_input_data(self, format_type):
+    def export_input_data(self, format_type, progress=gr.Progress()):
         """
-        导出输入数据（纵向格式）
+        导出输入数据（纵向格式），分块流式写出
         """
         try:
+            load_error, _ = self._wait_for_pending_load()
+            if load_error is not None:
+                return None, load_error
+
             if self.current_data is None or len(self.current_data) == 0:
                 return None, "没有可导出的数据"
 
-            # 创建临时文件
-            if format_type == "CSV":
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
-                self.current_data.to_csv(
-                    temp_file.name, index=False, encoding="utf-8-sig"
-                )
-                return temp_file.name, "输入数据已导出为CSV文件（纵向格式）"
-            else:  # Excel
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-                self.current_data.to_excel(temp_file.name, index=False)
-                return temp_file.name, "输入数据已导出为Excel文件（纵向格式）"
+            file_path = self.export_store.get_or_create(
+                self.export_store.content_key(self.current_data, format_type),
+                f"ESG输入数据{self.exporter.suffix(format_type)}",
+                lambda path: self.exporter.export(
+                    self.current_data,
+                    format_type,
+                    path=path,
+                    progress=self._export_progress(progress, "导出输入数据"),
+                ),
+            )
+            return file_path, f"输入数据已导出为{format_type}文件（纵向格式）"
 
         except Exception as e:
             return None, f"导出失败: {str(e)}"
 
-    def export_results(self, results_df):
+    def export_results(
+        self, results_df=None, format_type="Excel", progress=gr.Progress()
+    ):
         """
-        导出评分结果
+        导出评分结果（默认导出服务端保留的完整结果，而不是界面上的当前页）
         """
         try:
+            if results_df is None:
+                results_df = self.current_results
             if results_df is None or len(results_df) == 0:
                 return None, "没有可导出的数据"
 
-            # 创建临时文件
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-            results_df.to_excel(temp_file.name, index=False)
-
-            return temp_file.name, "结果已导出为Excel文件"
+            file_path = self.export_store.get_or_create(
+                self.export_store.content_key(results_df, format_type),
+                f"ESG评分结果{self.exporter.suffix(format_type)}",
+                lambda path: self.exporter.export(
+                    results_df,
+                    format_type,
+                    path=path,
+                    progress=self._export_progress(progress, "导出评分结果"),
+                ),
+            )
+            return file_path, f"结果已导出为{format_type}文件"
 
         except Exception as e:
             return None, f"导出失败: {str(e)}"
@@ -1508,63 +1865,7 @@ class ESGGradioApp:
             if not report_content:
                 return None
 
-            # 创建Word文档
-            doc = Document()
-
-            # 设置文档样式
-            style = doc.styles["Normal"]
-            style.font.name = "宋体"
-            style.font.size = Pt(12)
-
-            # 添加标题样式
-            title_style = doc.styles.add_style("CustomTitle", WD_STYLE_TYPE.PARAGRAPH)
-            title_style.font.name = "黑体"
-            title_style.font.size = Pt(16)
-            title_style.font.bold = True
-            title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-            # 添加二级标题样式
-            heading_style = doc.styles.add_style(
-                "CustomHeading", WD_STYLE_TYPE.PARAGRAPH
-            )
-            heading_style.font.name = "黑体"
-            heading_style.font.size = Pt(14)
-            heading_style.font.bold = True
-
-            # 解析报告内容并添加到文档
-            lines = report_content.split("\n")
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith("# "):
-                    # 主标题
-                    p = doc.add_paragraph(line[2:], style="CustomTitle")
-                elif line.startswith("## "):
-                    # 二级标题
-                    p = doc.add_paragraph(line[3:], style="CustomHeading")
-                elif line.startswith("### "):
-                    # 三级标题
-                    p = doc.add_paragraph(line[4:])
-                    p.style.font.bold = True
-                elif line.startswith("- "):
-                    # 列表项
-                    p = doc.add_paragraph(line[2:], style="List Bullet")
-                elif line.startswith("**") and line.endswith("**"):
-                    # 粗体文本
-                    p = doc.add_paragraph()
-                    run = p.add_run(line[2:-2])
-                    run.bold = True
-                else:
-                    # 普通段落
-                    doc.add_paragraph(line)
-
-            # 保存到临时文件
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-            doc.save(temp_file.name)
-
-            return temp_file.name
+            return self._export_report(report_content, "docx")
 
         except Exception as e:
             print(f"Word导出失败: {str(e)}")
@@ -1578,79 +1879,97 @@ class ESGGradioApp:
             if not report_content:
                 return None
 
-            # 创建临时文件
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-
-            # 创建PDF文档
-            doc = SimpleDocTemplate(temp_file.name, pagesize=A4)
-
-            # 获取样式
-            styles = getSampleStyleSheet()
-
-            # 创建自定义样式
-            title_style = ParagraphStyle(
-                "CustomTitle",
-                parent=styles["Title"],
-                fontSize=16,
-                spaceAfter=20,
-                alignment=1,  # 居中
-            )
-
-            heading_style = ParagraphStyle(
-                "CustomHeading",
-                parent=styles["Heading1"],
-                fontSize=14,
-                spaceAfter=12,
-                spaceBefore=12,
-            )
-
-            normal_style = ParagraphStyle(
-                "CustomNormal", parent=styles["Normal"], fontSize=12, spaceAfter=6
-            )
-
-            # 解析内容并创建段落
-            story = []
-            lines = report_content.split("\n")
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    story.append(Spacer(1, 6))
-                    continue
-
-                if line.startswith("# "):
-                    # 主标题
-                    story.append(Paragraph(line[2:], title_style))
-                elif line.startswith("## "):
-                    # 二级标题
-                    story.append(Paragraph(line[3:], heading_style))
-                elif line.startswith("### "):
-                    # 三级标题
-                    story.append(Paragraph(f"<b>{line[4:]}</b>", normal_style))
-                elif line.startswith("- "):
-                    # 列表项
-                    story.append(Paragraph(f"• {line[2:]}", normal_style))
-                elif line.startswith("**") and line.endswith("**"):
-                    # 粗体文本
-                    story.append(Paragraph(f"<b>{line[2:-2]}</b>", normal_style))
-                else:
-                    # 普通段落
-                    story.append(Paragraph(line, normal_style))
-
-            # 构建PDF
-            doc.build(story)
-
-            return temp_file.name
+            return self._export_report(report_content, "pdf")
 
         except Exception as e:
             print(f"PDF导出失败: {str(e)}")
             return None
 
-    def import_scoring_data(self, results_df):
+    def _export_report(self, report_content, format_type):
+        """
+        通过导出目录获取报告文件，报告只解析一次，渲染器样式在各次导出间复用
+        """
+        return self.export_store.get_or_create(
+            self.export_store.content_key(
+                report_content, format_type, ReportRenderer.VERSION
+            ),
+            f"ESG分析报告{ReportRenderer.FORMATS[format_type]}",
+            lambda path: self.report_renderer.render(report_content, format_type, path),
+        )
+
+    def export_report_all_formats(self, report_content):
+        """
+        一次导出TXT、Word和PDF三种格式，各格式并发渲染
+        """
+        if not report_content:
+            return None, None, None
+
+        futures = [
+            self.report_renderer.submit(self._export_report, report_content, fmt)
+            for fmt in ("txt", "docx", "pdf")
+        ]
+        paths = []
+        for fmt, future in zip(("TXT", "Word", "PDF"), futures):
+            try:
+                paths.append(future.result())
+            except Exception as e:
+                print(f"{fmt}导出失败: {str(e)}")
+                paths.append(None)
+        return tuple(paths)
+
+    def generate_tear_sheets(self, format_choice, progress=gr.Progress()):
+        """
+        为全部公司批量生成单页报告并打包为ZIP（进程池并发渲染，后台队列执行）
+        """
+        try:
+            results_df = (
+                self.imported_results
+                if self.imported_results is not None
+                else self.current_results
+            )
+            if results_df is None or len(results_df) == 0:
+                return None, "暂无评分数据，请先完成ESG评分"
+
+            formats = {
+                "PDF": ("pdf",),
+                "Word": ("docx",),
+                "PDF+Word": ("pdf", "docx"),
+            }[format_choice]
+            report_date = datetime.now().strftime("%Y年%m月%d日")
+            batch = TearSheetBatch(formats=formats, benchmarks=self.industry_benchmarks)
+
+            def report(done, total):
+                if progress is not None:
+                    progress(done / total if total else None, desc=f"已生成{done}家")
+
+            # 历史同业分位随行业基准变化，基准版本计入缓存键
+            peer_samples = (
+                0
+                if self.industry_benchmarks is None
+                else self.industry_benchmarks.version
+            )
+            file_path = self.export_store.get_or_create(
+                self.export_store.content_key(
+                    results_df, "tearsheets", *formats, report_date, peer_samples
+                ),
+                "ESG单页报告.zip",
+                lambda path: batch.build_zip(
+                    results_df, path, report_date, progress=report
+                ),
+            )
+            return file_path, f"已生成{len(results_df)}家企业的单页报告"
+
+        except Exception as e:
+            return None, f"单页报告生成失败: {str(e)}"
+
+    def import_scoring_data(self, results_df=None):
         """
         从评分页面导入数据到分析报告页面
+        完整结果保留在服务端，预览只显示排序后的第一页
         """
         try:
+            if results_df is None:
+                results_df = self.current_results
             if results_df is None or len(results_df) == 0:
                 return (
                     "❌ 暂无评分数据，请先在'模型配置与评分'页面完成ESG评分",
@@ -1661,8 +1980,15 @@ class ESGGradioApp:
             # 显示导入成功状态
             status_msg = f"✅ 成功导入评分数据，共 {len(results_df)} 条记录"
 
+            self.imported_results = results_df
+
             # 返回预览数据
-            preview_df = gr.Dataframe(value=results_df, visible=True, interactive=False)
+            preview_page, _ = ResultsPager(results_df).page(
+                page_size=self.RESULTS_PAGE_SIZE
+            )
+            preview_df = gr.Dataframe(
+                value=preview_page, visible=True, interactive=False
+            )
 
             # 激活生成报告按钮
             generate_btn = gr.Button(interactive=True)
@@ -1676,17 +2002,27 @@ class ESGGradioApp:
                 gr.Button(interactive=False),
             )
 
-    def generate_imported_analysis_report(self, imported_df, template_type):
+    def clear_imported_data(self):
+        """
+        清空导入的评分数据
+        """
+        self.imported_results = None
+        return (
+            "暂无数据，请先导入评分结果",
+            gr.Dataframe(visible=False),
+            gr.Button(interactive=False),
+        )
+
+    def generate_imported_analysis_report(self, template_type, imported_df=None):
         """
         基于导入的评分数据生成分析报告
         """
         try:
+            if imported_df is None:
+                imported_df = self.imported_results
             if imported_df is None or len(imported_df) == 0:
-                return (
-                    "*请先导入评分数据*",
-                    gr.Button(interactive=False),
-                    gr.Button(interactive=False),
-                    gr.Button(interactive=False),
+                return ("*请先导入评分数据*",) + tuple(
+                    gr.Button(interactive=False) for _ in range(4)
                 )
 
             # 使用现有的报告生成方法
@@ -1696,21 +2032,14 @@ class ESGGradioApp:
                 template_type=template_type,
             )
 
-            # 激活导出按钮
-            txt_btn = gr.Button(interactive=True)
-            word_btn = gr.Button(interactive=True)
-            pdf_btn = gr.Button(interactive=True)
-
-            return report_content, txt_btn, word_btn, pdf_btn
+            # 激活导出按钮（TXT、Word、PDF和全部格式）
+            return (report_content,) + tuple(
+                gr.Button(interactive=True) for _ in range(4)
+            )
 
         except Exception as e:
             error_msg = f"报告生成失败: {str(e)}"
-            return (
-                error_msg,
-                gr.Button(interactive=False),
-                gr.Button(interactive=False),
-                gr.Button(interactive=False),
-            )
+            return (error_msg,) + tuple(gr.Button(interactive=False) for _ in range(4))
 
     def toggle_evaluation_type(self, evaluation_type):
         """
@@ -1737,30 +2066,12 @@ class ESGGradioApp:
             if file is None:
                 return "请上传文件"
 
-            # 根据文件扩展名读取文件
-            file_extension = os.path.splitext(file.name)[1].lower()
-            if file_extension in [".xlsx", ".xls"]:
-                data = pd.read_excel(file.name)
-            elif file_extension == ".csv":
-                data = pd.read_csv(file.name)
-            else:
-                return "不支持的文件格式，请上传CSV或Excel文件"
-
-            # 使用processor进行数据验证和清洗
-            try:
-                self.processor.validate_company_data(data)
-                cleaned_data = self.processor.clean_and_standardize_data(data)
-                self.current_data = cleaned_data
-                self.current_events = [
-                    [] for _ in range(len(cleaned_data))
-                ]  # 默认无事件
-
-                return f"✅ 成功加载{len(cleaned_data)}行数据，包含{len(cleaned_data)}个公司的ESG数据"
-            except ValueError as ve:
+            data, problem = self._load_data_file(file.name)
+            if problem is not None:
                 # 如果验证失败，仍然加载数据但给出警告
-                self.current_data = data
-                self.current_events = [[] for _ in range(len(data))]  # 默认无事件
-                return f"⚠️ 数据已加载但存在问题: {str(ve)}"
+                return f"⚠️ 数据已加载但存在问题: {problem}"
+
+            return f"✅ 成功加载{len(data)}行数据，包含{len(data)}个公司的ESG数据"
 
         except Exception as e:
             return f"❌ 文件加载失败: {str(e)}"
@@ -1887,13 +2198,18 @@ class ESGGradioApp:
                                             )
                                         )
 
+                                # 单公司评分后修改指标，实时显示假设分析结果
+                                whatif_status = gr.Markdown(
+                                    "手动录入的单公司数据评分完成后，修改指标即可实时查看得分变化"
+                                )
+
                                 with gr.Row():
                                     create_btn = gr.Button(
                                         "创建ESG数据", variant="primary", size="lg"
                                     )
                                     with gr.Column():
                                         export_format = gr.Dropdown(
-                                            choices=["CSV", "Excel"],
+                                            choices=list(StreamingExporter.FORMATS),
                                             value="Excel",
                                             label="导出格式",
                                         )
@@ -1905,7 +2221,9 @@ class ESGGradioApp:
                             # 文件上传选项
                             with gr.Column():
                                 gr.Markdown("### 📁 或上传数据文件")
-                                gr.Markdown("支持Excel (.xlsx) 和 CSV (.csv) 格式")
+                                gr.Markdown(
+                                    "支持Excel (.xlsx)、CSV (.csv) 和 Parquet/Feather 格式"
+                                )
                                 gr.Markdown("**文件格式要求：**")
                                 gr.Markdown("""
                                 - 包含列：公司名称, 行业, ESG指标列
@@ -1914,11 +2232,22 @@ class ESGGradioApp:
                                 """)
                                 upload_file = gr.File(
                                     label="上传Excel或CSV文件",
-                                    file_types=[".xlsx", ".xls", ".csv"],
+                                    file_types=[
+                                        ".xlsx",
+                                        ".xls",
+                                        ".csv",
+                                        ".parquet",
+                                        ".feather",
+                                        ".arrow",
+                                    ],
                                 )
                                 upload_btn = gr.Button(
                                     "上传数据", variant="primary", size="lg"
                                 )
+                                speculative_check = gr.Checkbox(
+                                    value=self.speculative_scoring,
+                                    label="上传后预先按默认参数计算评分",
+                                )
 
                             # 通用状态显示区域
                             data_status = gr.Textbox(
@@ -1940,7 +2269,14 @@ class ESGGradioApp:
                         with gr.Column(scale=2):
                             scoring_upload_file = gr.File(
                                 label="上传Excel或CSV文件",
-                                file_types=[".xlsx", ".xls", ".csv"],
+                                file_types=[
+                                    ".xlsx",
+                                    ".xls",
+                                    ".csv",
+                                    ".parquet",
+                                    ".feather",
+                                    ".arrow",
+                                ],
                             )
                         with gr.Column(scale=1):
                             load_data_btn = gr.Button(
@@ -1955,11 +2291,14 @@ class ESGGradioApp:
 
                     gr.Markdown("### 模型参数配置")
 
+                    # 控件初始值统一取自DEFAULT_SCORING_ARGS，与推测性预计算的参数一致
+                    defaults = self.DEFAULT_SCORING_ARGS
+
                     # 基础权重配置
                     with gr.Accordion("基础权重配置", open=True):
                         with gr.Row():
                             alpha_param = gr.Slider(
-                                0, 1, value=0.5, label="主观权重系数α"
+                                0, 1, value=defaults["alpha"], label="主观权重系数α"
                             )
 
                         with gr.Row():
@@ -1967,7 +2306,7 @@ class ESGGradioApp:
                                 e_weight = gr.Slider(
                                     minimum=0.1,
                                     maximum=0.8,
-                                    value=0.4,
+                                    value=defaults["e_weight"],
                                     step=0.05,
                                     label="环境(E)维度权重",
                                 )
@@ -1975,7 +2314,7 @@ class ESGGradioApp:
                                 s_weight = gr.Slider(
                                     minimum=0.1,
                                     maximum=0.8,
-                                    value=0.3,
+                                    value=defaults["s_weight"],
                                     step=0.05,
                                     label="社会(S)维度权重",
                                 )
@@ -1983,7 +2322,7 @@ class ESGGradioApp:
                                 g_weight = gr.Slider(
                                     minimum=0.1,
                                     maximum=0.8,
-                                    value=0.3,
+                                    value=defaults["g_weight"],
                                     step=0.05,
                                     label="治理(G)维度权重",
                                 )
@@ -1995,7 +2334,7 @@ class ESGGradioApp:
                                 delta_coeff = gr.Slider(
                                     minimum=-0.5,
                                     maximum=0.5,
-                                    value=0.1,
+                                    value=defaults["delta_coeff"],
                                     step=0.01,
                                     label="δ (E×S交叉项系数)",
                                 )
@@ -2003,7 +2342,7 @@ class ESGGradioApp:
                                 epsilon_coeff = gr.Slider(
                                     minimum=-0.5,
                                     maximum=0.5,
-                                    value=0.15,
+                                    value=defaults["epsilon_coeff"],
                                     step=0.01,
                                     label="ε (E×G交叉项系数)",
                                 )
@@ -2011,7 +2350,7 @@ class ESGGradioApp:
                                 zeta_coeff = gr.Slider(
                                     minimum=-0.5,
                                     maximum=0.5,
-                                    value=0.12,
+                                    value=defaults["zeta_coeff"],
                                     step=0.01,
                                     label="ζ (S×G交叉项系数)",
                                 )
@@ -2023,14 +2362,14 @@ class ESGGradioApp:
                                 severity_factor = gr.Slider(
                                     minimum=0.1,
                                     maximum=1.0,
-                                    value=0.4,
+                                    value=defaults["severity_factor"],
                                     step=0.05,
                                     label="严重度放大因子β",
                                 )
                                 max_bonus = gr.Slider(
                                     minimum=5,
                                     maximum=20,
-                                    value=10,
+                                    value=defaults["max_bonus"],
                                     step=1,
                                     label="最大奖励分数",
                                 )
@@ -2038,14 +2377,14 @@ class ESGGradioApp:
                                 bonus_steepness = gr.Slider(
                                     minimum=0.1,
                                     maximum=2.0,
-                                    value=0.8,
+                                    value=defaults["bonus_steepness"],
                                     step=0.1,
                                     label="奖励曲线陡度k",
                                 )
                                 threshold_multiplier = gr.Slider(
                                     minimum=0.8,
                                     maximum=1.2,
-                                    value=1.0,
+                                    value=defaults["threshold_multiplier"],
                                     step=0.05,
                                     label="阈值乘数",
                                 )
@@ -2057,21 +2396,21 @@ class ESGGradioApp:
                                 data_breach_coeff = gr.Slider(
                                     minimum=0.5,
                                     maximum=2.0,
-                                    value=1.2,
+                                    value=defaults["data_breach_coeff"],
                                     step=0.1,
                                     label="数据泄露系数",
                                 )
                                 env_pollution_coeff = gr.Slider(
                                     minimum=0.8,
                                     maximum=2.5,
-                                    value=1.8,
+                                    value=defaults["env_pollution_coeff"],
                                     step=0.1,
                                     label="环境污染系数",
                                 )
                                 safety_accident_coeff = gr.Slider(
                                     minimum=0.6,
                                     maximum=2.0,
-                                    value=1.5,
+                                    value=defaults["safety_accident_coeff"],
                                     step=0.1,
                                     label="安全事故系数",
                                 )
@@ -2079,21 +2418,21 @@ class ESGGradioApp:
                                 corruption_coeff = gr.Slider(
                                     minimum=1.0,
                                     maximum=3.0,
-                                    value=2.0,
+                                    value=defaults["corruption_coeff"],
                                     step=0.1,
                                     label="腐败违规系数",
                                 )
                                 labor_dispute_coeff = gr.Slider(
                                     minimum=0.5,
                                     maximum=1.8,
-                                    value=1.0,
+                                    value=defaults["labor_dispute_coeff"],
                                     step=0.1,
                                     label="劳资纠纷系数",
                                 )
                                 product_recall_coeff = gr.Slider(
                                     minimum=0.7,
                                     maximum=2.2,
-                                    value=1.3,
+                                    value=defaults["product_recall_coeff"],
                                     step=0.1,
                                     label="产品召回系数",
                                 )
@@ -2105,14 +2444,14 @@ class ESGGradioApp:
                                 carbon_tax_sensitivity = gr.Slider(
                                     minimum=0.01,
                                     maximum=0.2,
-                                    value=0.08,
+                                    value=defaults["carbon_tax_sensitivity"],
                                     step=0.01,
                                     label="碳税敏感系数",
                                 )
                                 esg_disclosure_weight = gr.Slider(
                                     minimum=0.05,
                                     maximum=0.3,
-                                    value=0.15,
+                                    value=defaults["esg_disclosure_weight"],
                                     step=0.01,
                                     label="ESG披露权重",
                                 )
@@ -2120,40 +2459,150 @@ class ESGGradioApp:
                                 green_finance_bonus = gr.Slider(
                                     minimum=0.02,
                                     maximum=0.15,
-                                    value=0.05,
+                                    value=defaults["green_finance_bonus"],
                                     step=0.01,
                                     label="绿色金融奖励",
                                 )
                                 regulatory_compliance = gr.Slider(
                                     minimum=0.8,
                                     maximum=1.5,
-                                    value=1.0,
+                                    value=defaults["regulatory_compliance"],
                                     step=0.05,
                                     label="监管合规系数",
                                 )
 
                     with gr.Row():
                         include_events_check = gr.Checkbox(
-                            value=True, label="启用事件调整（甲模型非线性调整）"
+                            value=defaults["include_events"],
+                            label="启用事件调整（甲模型非线性调整）",
                         )
                         use_cross_terms = gr.Checkbox(
-                            value=True, label="启用交叉项效应（甲模型整合性原则）"
+                            value=defaults["use_cross_terms"],
+                            label="启用交叉项效应（甲模型整合性原则）",
                         )
 
+                    report_period = gr.Textbox(
+                        label="报告期（可选）",
+                        placeholder="如2024Q4；留空时取数据中的报告期列，没有则为当前季度",
+                    )
+
                     calculate_btn = gr.Button(
                         "🚀 计算ESG评分", variant="primary", size="lg"
                     )
 
                     gr.Markdown("### 📈 评分结果")
+                    with gr.Row():
+                        results_industry_filter = gr.Dropdown(
+                            choices=[], multiselect=True, label="行业筛选"
+                        )
+                        results_rating_filter = gr.Dropdown(
+                            choices=[], multiselect=True, label="评级筛选"
+                        )
+                        results_min_score = gr.Number(value=None, label="最低总分")
+                        results_max_score = gr.Number(value=None, label="最高总分")
+                    with gr.Row():
+                        results_sort_by = gr.Dropdown(choices=[], label="排序列")
+                        results_descending = gr.Checkbox(value=True, label="降序")
+                        results_page_size = gr.Dropdown(
+                            choices=[20, 50, 100, 200],
+                            value=self.RESULTS_PAGE_SIZE,
+                            label="每页行数",
+                        )
+                        results_page = gr.Number(value=1, precision=0, label="页码")
                     results_table = gr.Dataframe(label="评分结果", interactive=False)
+                    with gr.Row():
+                        results_prev_btn = gr.Button("上一页", size="sm")
+                        results_page_info = gr.Markdown("暂无评分结果")
+                        results_next_btn = gr.Button("下一页", size="sm")
+
+                    with gr.Accordion("🏆 排行榜", open=False):
+                        with gr.Row():
+                            ranking_scope = gr.Radio(
+                                choices=["当前结果", "评分历史"],
+                                value="当前结果",
+                                label="数据范围",
+                            )
+                            ranking_group = gr.Dropdown(
+                                choices=list(self.RANKING_GROUPS),
+                                value="不分组",
+                                label="分组",
+                            )
+                            ranking_top_n = gr.Number(
+                                value=10, precision=0, label="前N名"
+                            )
+                            ranking_bottom = gr.Checkbox(
+                                value=False, label="按最低分排行"
+                            )
+                        with gr.Row():
+                            ranking_industries = gr.Textbox(
+                                label="行业（逗号分隔，留空为全部）"
+                            )
+                            ranking_period = gr.Textbox(
+                                label="报告期（如2024Q3，留空为全部）"
+                            )
+                            ranking_btn = gr.Button("查询排行", variant="secondary")
+                        ranking_status = gr.Markdown()
+                        ranking_table = gr.Dataframe(
+                            label="排行结果", interactive=False
+                        )
+
+                    with gr.Accordion("🔍 得分归因", open=False):
+                        with gr.Row():
+                            attribution_company = gr.Textbox(label="公司名称")
+                            attribution_top_n = gr.Number(
+                                value=10, precision=0, label="显示指标数"
+                            )
+                            attribution_btn = gr.Button(
+                                "分析得分构成", variant="secondary"
+                            )
+                        attribution_summary = gr.Markdown()
+                        attribution_table = gr.Dataframe(
+                            label="主要贡献指标", interactive=False
+                        )
+
+                    with gr.Accordion("🎯 改进路径规划", open=False):
+                        with gr.Row():
+                            plan_target = gr.Dropdown(
+                                choices=list(self.model.rating_bands.labels[1:]),
+                                value="良好",
+                                label="目标评级",
+                            )
+                            plan_btn = gr.Button("规划改进路径", variant="secondary")
+                        plan_status = gr.Markdown()
+                        plan_summary = gr.Dataframe(
+                            label="各公司规划汇总", interactive=False
+                        )
+                        plan_steps = gr.Dataframe(
+                            label="改进步骤（标准化值：0为样本最差，1为样本最佳）",
+                            interactive=False,
+                        )
+                        plan_file = gr.File(label="下载完整规划")
 
                     gr.Markdown("### 📊 可视化分析")
-                    charts_plot = gr.Plot(label="分析图表")
+                    # 各面板只在被查看时构建图表
+                    chart_panel_state = gr.State(next(iter(self.CHART_PANELS)))
+                    chart_plots = {}
+                    with gr.Tabs():
+                        for panel_label in self.CHART_PANELS:
+                            with gr.TabItem(panel_label) as chart_tab:
+                                chart_plots[panel_label] = gr.Plot(label=panel_label)
+                            chart_tab.select(
+                                fn=partial(self.select_chart_panel, panel_label),
+                                inputs=[],
+                                outputs=[chart_panel_state, chart_plots[panel_label]],
+                                queue=False,
+                            )
+                    charts_plot = chart_plots["综合仪表板"]
 
                     with gr.Row():
                         export_results_btn = gr.Button(
                             "下载评分结果", variant="secondary"
                         )
+                        export_results_format = gr.Dropdown(
+                            choices=list(StreamingExporter.FORMATS),
+                            value="Excel",
+                            label="导出格式",
+                        )
                         export_results_file = gr.File(label="下载评分结果")
                         export_results_status = gr.Textbox(
                             label="导出状态", interactive=False
@@ -2236,6 +2685,9 @@ class ESGGradioApp:
                         export_report_pdf_btn = gr.Button(
                             "📄 导出PDF", variant="secondary", interactive=False
                         )
+                        export_report_all_btn = gr.Button(
+                            "📦 导出全部格式", variant="secondary", interactive=False
+                        )
 
                     # 导出文件
                     with gr.Row():
@@ -2249,6 +2701,25 @@ class ESGGradioApp:
                             label="PDF报告下载", interactive=False
                         )
 
+                    # 全部公司的单页报告
+                    gr.Markdown("#### 🗂️ 批量单页报告")
+                    with gr.Row():
+                        tear_sheet_format = gr.Dropdown(
+                            choices=["PDF", "Word", "PDF+Word"],
+                            value="PDF",
+                            label="单页报告格式",
+                        )
+                        tear_sheet_btn = gr.Button(
+                            "🗂️ 生成全部公司单页报告(ZIP)", variant="secondary"
+                        )
+                    with gr.Row():
+                        tear_sheet_file = gr.File(
+                            label="单页报告ZIP下载", interactive=False
+                        )
+                        tear_sheet_status = gr.Textbox(
+                            label="生成状态", interactive=False
+                        )
+
             # 事件绑定
             all_inputs = (
                 [company_name, industry_choice] + e_inputs + s_inputs + g_inputs
@@ -2259,9 +2730,27 @@ class ESGGradioApp:
                 fn=self.export_input_data,
                 inputs=[export_format],
                 outputs=[export_input_file, export_input_status],
-                queue=False,
             )
 
+            # 假设分析：每个指标单独绑定，只增量更新被修改的指标；
+            # 只响应用户输入；计算进行中的连续修改只保留最后一次（always_last）
+            all_indicators = (
+                self.default_indicators["E"]
+                + self.default_indicators["S"]
+                + self.default_indicators["G"]
+            )
+            for indicator, indicator_input in zip(
+                all_indicators, e_inputs + s_inputs + g_inputs
+            ):
+                indicator_input.input(
+                    fn=partial(self.whatif_update, indicator),
+                    inputs=[company_name, indicator_input],
+                    outputs=[whatif_status],
+                    queue=False,
+                    trigger_mode="always_last",
+                    show_progress="hidden",
+                )
+
             # 数据创建
             create_btn.click(
                 fn=self.create_manual_input_data,
@@ -2270,11 +2759,23 @@ class ESGGradioApp:
                 queue=False,
             )
 
+            # 预览立即返回，后台解析完成后再更新数据状态（含验证问题）
             upload_btn.click(
                 fn=self.upload_custom_data,
                 inputs=[upload_file],
                 outputs=[data_preview, data_status],
                 queue=False,
+            ).then(
+                fn=self.data_load_status,
+                outputs=[data_status],
+                show_progress="hidden",
+            )
+
+            speculative_check.change(
+                fn=self.set_speculative_scoring,
+                inputs=[speculative_check],
+                outputs=[data_status],
+                queue=False,
             )
 
             # 数据加载
@@ -2312,17 +2813,105 @@ class ESGGradioApp:
                     green_finance_bonus,
                     regulatory_compliance,
                     use_cross_terms,
+                    report_period,
                 ],
                 outputs=[results_table, charts_plot],
                 queue=False,
+            ).then(
+                fn=self.reset_results_view,
+                inputs=[results_page_size],
+                outputs=[
+                    results_table,
+                    results_industry_filter,
+                    results_rating_filter,
+                    results_sort_by,
+                    results_descending,
+                    results_min_score,
+                    results_max_score,
+                    results_page,
+                    results_page_info,
+                ],
+                queue=False,
+            ).then(
+                fn=self.render_chart_panels,
+                inputs=[chart_panel_state],
+                outputs=list(chart_plots.values()),
+                queue=False,
+            )
+
+            # 结果分页、排序与筛选（只在服务端计算，前端仅接收当前页）
+            paging_inputs = [
+                results_page,
+                results_page_size,
+                results_sort_by,
+                results_descending,
+                results_industry_filter,
+                results_rating_filter,
+                results_min_score,
+                results_max_score,
+            ]
+            paging_outputs = [results_table, results_page_info, results_page]
+            for control in paging_inputs[1:]:
+                control.input(
+                    fn=lambda *args: self.page_results(1, *args[1:]),
+                    inputs=paging_inputs,
+                    outputs=paging_outputs,
+                    queue=False,
+                )
+            results_page.submit(
+                fn=self.page_results,
+                inputs=paging_inputs,
+                outputs=paging_outputs,
+                queue=False,
+            )
+            results_prev_btn.click(
+                fn=self.previous_results_page,
+                inputs=paging_inputs,
+                outputs=paging_outputs,
+                queue=False,
+            )
+            results_next_btn.click(
+                fn=self.next_results_page,
+                inputs=paging_inputs,
+                outputs=paging_outputs,
+                queue=False,
+            )
+
+            # 排行榜查询
+            ranking_btn.click(
+                fn=self.rank_companies,
+                inputs=[
+                    ranking_scope,
+                    ranking_top_n,
+                    ranking_bottom,
+                    ranking_group,
+                    ranking_industries,
+                    ranking_period,
+                ],
+                outputs=[ranking_table, ranking_status],
             )
 
-            # 结果导出
+            # 得分归因
+            attribution_btn.click(
+                fn=self.explain_company_score,
+                inputs=[attribution_company, attribution_top_n],
+                outputs=[attribution_table, attribution_summary],
+            )
+
+            # 改进路径规划
+            plan_btn.click(
+                fn=self.plan_improvements,
+                inputs=[plan_target],
+                outputs=[plan_summary, plan_steps, plan_file, plan_status],
+            )
+
+            # 结果导出（导出服务端的完整结果）
             export_results_btn.click(
-                fn=self.export_results,
-                inputs=[results_table],
+                fn=lambda format_type, progress=gr.Progress(): self.export_results(
+                    None, format_type, progress
+                ),
+                inputs=[export_results_format],
                 outputs=[export_results_file, export_results_status],
-                queue=False,
             )
 
             # 分析报告页面事件处理
@@ -2330,7 +2919,7 @@ class ESGGradioApp:
             # 导入评分数据
             import_scoring_data_btn.click(
                 fn=self.import_scoring_data,
-                inputs=[results_table],
+                inputs=[],
                 outputs=[
                     imported_data_status,
                     imported_results_preview,
@@ -2341,11 +2930,7 @@ class ESGGradioApp:
 
             # 清空导入数据
             clear_imported_data_btn.click(
-                fn=lambda: (
-                    "暂无数据，请先导入评分结果",
-                    gr.Dataframe(visible=False),
-                    gr.Button(interactive=False),
-                ),
+                fn=self.clear_imported_data,
                 inputs=[],
                 outputs=[
                     imported_data_status,
@@ -2358,12 +2943,13 @@ class ESGGradioApp:
             # 生成分析报告
             generate_analysis_report_btn.click(
                 fn=self.generate_imported_analysis_report,
-                inputs=[imported_results_preview, report_template_choice],
+                inputs=[report_template_choice],
                 outputs=[
                     analysis_report_content,
                     export_report_txt_btn,
                     export_report_word_btn,
                     export_report_pdf_btn,
+                    export_report_all_btn,
                 ],
                 queue=False,
             )
@@ -2390,6 +2976,20 @@ class ESGGradioApp:
                 queue=False,
             )
 
+            export_report_all_btn.click(
+                fn=self.export_report_all_formats,
+                inputs=[analysis_report_content],
+                outputs=[export_txt_file, export_word_file, export_pdf_file],
+                queue=False,
+            )
+
+            # 批量单页报告（耗时任务，通过队列在后台执行并显示进度）
+            tear_sheet_btn.click(
+                fn=self.generate_tear_sheets,
+                inputs=[tear_sheet_format],
+                outputs=[tear_sheet_file, tear_sheet_status],
+            )
+
         return interface
 
 
@@ -51,8 +51,14 @@ def main():
     print()
 
     try:
-        # 创建应用实例
-        app = ESGGradioApp()
+        # 创建应用实例；设置ESG_STORAGE_DIR时启用评分持久化并写入该目录
+        storage_dir = os.environ.get("ESG_STORAGE_DIR")
+        app = ESGGradioApp(
+            score_store=bool(storage_dir),
+            score_history=bool(storage_dir),
+            industry_benchmarks=bool(storage_dir),
+            storage_dir=storage_dir,
+        )
 
         # 创建界面
         interface = app.create_interface()
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from esg_ahp import AHPEngine, random_index
+
+
+def _consistent(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights[:, None] / weights[None, :]
+
+
+# 循环偏好的判断矩阵：A≻B、B≻C、C≻A，严重不一致
+CYCLIC = np.array([[1, 9, 1 / 9], [1 / 9, 1, 9], [9, 1 / 9, 1]])
+
+# Saaty常用示例，轻度不一致
+SAATY = np.array([[1, 1 / 3, 1 / 2], [3, 1, 3], [2, 1 / 3, 1]])
+
+
+def _reference_cr(matrix):
+    # 逐个矩阵按定义计算：CR = (λmax - n) / (n - 1) / RI
+    n = len(matrix)
+    lambda_max = np.linalg.eigvals(matrix).real.max()
+    return (lambda_max - n) / (n - 1) / random_index(n)
+
+
+@pytest.mark.parametrize("method", AHPEngine.METHODS)
+def test_consistent_matrix(method):
+    weights = np.array([0.5, 0.2, 0.2, 0.1])
+    result = AHPEngine(method).evaluate(_consistent(weights))
+
+    np.testing.assert_allclose(result["weights"][0], weights, atol=1e-9)
+    np.testing.assert_allclose(result["lambda_max"], 4.0, atol=1e-9)
+    np.testing.assert_allclose(result["cr"], 0.0, atol=1e-9)
+    assert result["consistent"].all()
+
+
+def test_known_consistency_ratios():
+    result = AHPEngine().evaluate(np.stack([SAATY, CYCLIC]))
+
+    np.testing.assert_allclose(
+        result["cr"], [_reference_cr(SAATY), _reference_cr(CYCLIC)], rtol=1e-9
+    )
+    assert 0 < result["cr"][0] < 0.1
+    assert result["cr"][1] > 0.1
+    assert result["consistent"].tolist() == [True, False]
+    # 几何平均法按 mean((A·w) / w) 估计λmax，与特征值相近
+    geometric = AHPEngine("geometric").evaluate(SAATY)
+    assert geometric["cr"][0] == pytest.approx(result["cr"][0], abs=0.01)
+
+
+@pytest.mark.parametrize("method", AHPEngine.METHODS)
+def test_batch_matches_single(method):
+    rng = np.random.default_rng(0)
+    matrices = []
+    for _ in range(6):
+        # 在一致矩阵上加扰动，再恢复互反性
+        matrix = _consistent(rng.uniform(1, 9, 5)) * rng.uniform(0.5, 2, (5, 5))
+        rows, cols = np.triu_indices(5, 1)
+        matrix[cols, rows] = 1 / matrix[rows, cols]
+        np.fill_diagonal(matrix, 1.0)
+        matrices.append(matrix)
+    engine = AHPEngine(method)
+    batch = engine.evaluate(np.stack(matrices))
+
+    for i, matrix in enumerate(matrices):
+        single = engine.evaluate(matrix)
+        np.testing.assert_allclose(batch["weights"][i], single["weights"][0])
+        np.testing.assert_allclose(batch["cr"][i], single["cr"][0])
+        if method == "eigenvector":
+            assert batch["cr"][i] == pytest.approx(_reference_cr(matrix))
+
+
+def test_aggregate_skips_inconsistent_experts():
+    weights = np.array([0.6, 0.3, 0.1])
+    matrices = np.stack([_consistent(weights), _consistent(weights), CYCLIC])
+    engine = AHPEngine()
+
+    result = engine.aggregate(matrices, consistent_only=True)
+    assert result["experts"].tolist() == [0, 1]
+    np.testing.assert_allclose(result["weights"], weights, atol=1e-9)
+    assert result["cr"] == pytest.approx(0.0, abs=1e-9)
+
+    # 全部参与时群体判断矩阵仍保持互反性
+    pooled = engine.aggregate(matrices)
+    np.testing.assert_allclose(pooled["matrix"] * pooled["matrix"].T, 1.0)
+    with pytest.raises(ValueError):
+        engine.aggregate(CYCLIC, consistent_only=True)
+
+
+@pytest.mark.parametrize(
+    "matrix",
+    [
+        np.ones((2, 3)),
+        np.array([[1, 2], [2, 1]]),
+        np.array([[1, -2], [-0.5, 1]]),
+    ],
+)
+def test_invalid_matrices(matrix):
+    with pytest.raises(ValueError):
+        AHPEngine().evaluate(matrix)
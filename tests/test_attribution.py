@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_analysis import ScoreAttribution
+from esg_model import ESGModel
+
+
+def _data(model, n=30, seed=0):
+    # 各维度取几个指标，另加一个不属于任何维度的指标
+    columns = (
+        model.e_indicators[:4]
+        + model.s_indicators[:4]
+        + model.g_indicators[:4]
+        + ["其他"]
+    )
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(0, 100, (n, len(columns))), columns=columns)
+
+
+@pytest.mark.parametrize("industry", ["能源", "金融", "默认"])
+@pytest.mark.parametrize("events", [None, [{"type": "环境", "severity": 2}]])
+def test_rows_sum_to_final_score(industry, events):
+    model = ESGModel()
+    data = _data(model)
+    results = model.calculate_esg_score(data, industry, events=events)
+    attribution = ScoreAttribution(model).attribute(results, industry)
+    contributions = attribution["contributions"]
+
+    np.testing.assert_allclose(
+        contributions.sum(axis=1), results["final_score"], atol=1e-9
+    )
+    # 指标贡献 = 线性项 + 交叉项 + 饱和加分，不属于任何维度的指标没有贡献
+    columns = list(data.columns)
+    np.testing.assert_allclose(
+        contributions[columns].to_numpy(),
+        (
+            attribution["linear"] + attribution["cross"] + attribution["nonlinear"]
+        ).to_numpy(),
+        atol=1e-9,
+    )
+    assert (contributions["其他"] == 0).all()
+
+    pillars = attribution["pillar_scores"]
+    for column, key in [
+        ("E得分", "e_score"),
+        ("S得分", "s_score"),
+        ("G得分", "g_score"),
+    ]:
+        np.testing.assert_allclose(pillars[column], results[key], atol=1e-9)
+
+
+def test_decomposition_is_exact_without_events():
+    model = ESGModel()
+    results = model.calculate_esg_score(_data(model), "能源")
+    attribution = ScoreAttribution(model).attribute(results, "能源")
+
+    final_score = np.asarray(results["final_score"])
+    residual = attribution["contributions"][ScoreAttribution.RESIDUAL].to_numpy()
+    # 覆盖饱和加分区间；未被截断的行调整项为0，截断的行为截掉的部分
+    assert (np.asarray(results["base_score"]) > 80).any()
+    unclipped = final_score < 100
+    np.testing.assert_allclose(residual[unclipped], 0, atol=1e-9)
+    assert (residual[~unclipped] <= 0).all()
+    assert np.abs(attribution["nonlinear"].to_numpy()).sum() > 0
+
+
+def test_single_company():
+    model = ESGModel()
+    results = model.calculate_esg_score(_data(model, n=1), "科技")
+    # 未指定模型时按评分结果中的参数重建
+    attribution = ScoreAttribution().attribute(results, "科技")
+
+    np.testing.assert_allclose(
+        attribution["contributions"].sum(axis=1), results["final_score"], atol=1e-9
+    )
+    np.testing.assert_allclose(
+        attribution["pillar_scores"]["E得分"], results["e_score"], atol=1e-9
+    )
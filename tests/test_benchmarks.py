@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_store import IndustryBenchmarks
+
+
+def _results(rows, period="2024Q1"):
+    return pd.DataFrame(
+        [
+            {"公司名称": company, "行业": industry, "ESG总分": score, "报告期": period}
+            for company, industry, score in rows
+        ]
+    )
+
+
+def test_rerun_replaces_previous_score():
+    benchmarks = IndustryBenchmarks()
+    for score in [60.0, 70.0, 80.0]:
+        benchmarks.update(_results([("A", "X", score)]))
+
+    # 同一公司同一报告期只保留最近一次评分
+    assert len(benchmarks) == 1
+    assert benchmarks.count("X") == 1
+    assert benchmarks.baseline("X")["mean"]["final_score"] == 80.0
+
+    # 不同报告期各自计入
+    benchmarks.update(_results([("A", "X", 50.0)], period="2024Q2"))
+    assert len(benchmarks) == 2
+    assert benchmarks.quantile("X", 0.0) == 50.0
+
+
+def test_exclude_removes_own_scores():
+    benchmarks = IndustryBenchmarks()
+    benchmarks.update(_results([("A", "X", 80.0)]))
+    benchmarks.update(_results([("A", "X", 40.0)], period="2024Q2"))
+
+    # 只有自身样本时没有同业基准
+    assert benchmarks.baseline("X", exclude="A") is None
+    assert benchmarks.count("X", exclude="A") == 0
+    assert np.isnan(benchmarks.percentile("X", 80.0, exclude="A"))
+
+    benchmarks.update(_results([("B", "X", 50.0), ("C", "X", 90.0)]))
+    assert benchmarks.count("X", exclude="A") == 2
+    assert benchmarks.count(IndustryBenchmarks.ALL_INDUSTRIES, exclude="A") == 2
+    assert benchmarks.baseline("X", exclude="A")["mean"]["final_score"] == 70.0
+    assert benchmarks.percentile("X", 80.0, exclude="A") == 50.0
+    assert benchmarks.percentile("X", 80.0) == 75.0
+
+
+def test_batch_matches_single_exclusion():
+    benchmarks = IndustryBenchmarks()
+    rows = [("A", "X", 50.0), ("B", "X", 70.0), ("C", "X", 90.0), ("D", "Y", 60.0)]
+    benchmarks.update(_results(rows))
+    benchmarks.update(_results([("A", "X", 75.0)], period="2024Q2"))
+
+    companies = [company for company, _, _ in rows]
+    industries = [industry for _, industry, _ in rows]
+    scores = [score for _, _, score in rows]
+    percentiles = benchmarks.percentiles(industries, scores, companies=companies)
+    counts = benchmarks.counts(industries, companies=companies)
+
+    expected = [
+        benchmarks.percentile(industry, score, exclude=company)
+        for company, industry, score in rows
+    ]
+    np.testing.assert_allclose(percentiles, expected)
+    assert counts.tolist() == [
+        benchmarks.count(industry, exclude=company) for company, industry, _ in rows
+    ]
+    assert counts.tolist() == [2, 3, 3, 0]
+
+
+def test_industry_change_moves_score():
+    benchmarks = IndustryBenchmarks()
+    benchmarks.update(_results([("A", "X", 60.0), ("B", "X", 70.0)]))
+    benchmarks.update(_results([("A", "Y", 65.0)]))
+
+    assert benchmarks.count("X") == 1
+    assert benchmarks.count("Y") == 1
+    assert benchmarks.count(IndustryBenchmarks.ALL_INDUSTRIES) == 2
+    assert benchmarks.count("Y", exclude="A") == 0
+    assert benchmarks.industries() == ["X", "Y"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "benchmarks.npz")
+    benchmarks = IndustryBenchmarks(path, save_interval=3600)
+    benchmarks.update(_results([("A", "X", 60.0), ("B", "Y", 70.0)]))
+    # 间隔内的更新留到flush时写出
+    benchmarks.update(_results([("A", "X", 80.0)]))
+    benchmarks.flush()
+
+    loaded = IndustryBenchmarks(path)
+    assert len(loaded) == 2
+    assert loaded.version == benchmarks.version
+    assert loaded.quantile("X", 0.5) == 80.0
+    assert loaded.count("X", exclude="A") == 0
+
+    # 加载后再次评分仍然替换旧值
+    loaded.update(_results([("A", "X", 40.0)]), save=False)
+    assert loaded.count("X") == 1
+    assert loaded.quantile("X", 0.5) == 40.0
+
+
+def test_rebuild_keeps_last_score():
+    benchmarks = IndustryBenchmarks()
+    benchmarks.update(_results([("Z", "X", 10.0)]))
+    frames = [
+        _results([("A", "X", 60.0), ("B", "X", 70.0)]),
+        _results([("A", "X", 90.0)]),
+    ]
+    benchmarks.rebuild(frames)
+
+    assert len(benchmarks) == 2
+    assert benchmarks.quantile("X", 0.0) == 70.0
+    assert benchmarks.quantile("X", 1.0) == 90.0
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_full_recount(seed):
+    # 多次增量更新后与从最新评分直接计算的结果一致
+    rng = np.random.default_rng(seed)
+    benchmarks = IndustryBenchmarks()
+    latest = {}
+    for _ in range(5):
+        companies = rng.choice(20, size=8, replace=False)
+        rows = [
+            (f"公司{c}", f"行业{c % 3}", float(rng.integers(0, 100))) for c in companies
+        ]
+        benchmarks.update(_results(rows))
+        latest.update({company: (industry, s) for company, industry, s in rows})
+
+    for company, (industry, score) in latest.items():
+        peers = [s for c, (i, s) in latest.items() if i == industry and c != company]
+        assert benchmarks.count(industry, exclude=company) == len(peers)
+        if peers:
+            expected = np.mean(np.array(peers) <= score) * 100
+            assert benchmarks.percentile(industry, score, exclude=company) == (
+                pytest.approx(expected)
+            )
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from esg_data_utils import ESGDataProcessor, _ColumnBuffer
+
+
+def _categorical(values):
+    return pd.Series(pd.Categorical(values))
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        [[None, None], ["制造业", None, "金融业"]],
+        [["制造业", "金融业"], [None, None, None]],
+        [[None], [None]],
+    ],
+)
+def test_column_buffer_all_blank_categorical_batch(parts):
+    # 整批为空值的分类列没有类别，不能按编码-1查表
+    buffer = _ColumnBuffer()
+    for part in parts:
+        buffer.append(_categorical(part))
+    result = pd.Series(buffer.result())
+    expected = pd.Series([value for part in parts for value in part], dtype=object)
+    assert result.isna().tolist() == expected.isna().tolist()
+    assert result.dropna().astype(str).tolist() == expected.dropna().tolist()
+
+
+def test_column_buffer_promotes_mixed_numeric_batches():
+    buffer = _ColumnBuffer()
+    buffer.append(pd.Series(np.arange(3, dtype=np.int64)))
+    buffer.append(pd.Series([0.5, np.nan]))
+    np.testing.assert_array_equal(buffer.result(), [0.0, 1.0, 2.0, 0.5, np.nan])
+
+
+def _write_xlsx(path, header, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+@pytest.mark.parametrize("batch_size", [2, 1000])
+def test_read_excel_streaming_blank_industry_column(tmp_path, batch_size):
+    path = str(tmp_path / "blank_industry.xlsx")
+    rows = [[f"公司{i}", None, float(i)] for i in range(5)]
+    _write_xlsx(path, ["company_name", "industry", "独立董事比例"], rows)
+
+    data = ESGDataProcessor().read_excel_streaming(path, batch_size=batch_size)
+    assert data["company_name"].astype(str).tolist() == [f"公司{i}" for i in range(5)]
+    assert data["industry"].isna().all()
+    np.testing.assert_array_equal(data["独立董事比例"], np.arange(5.0))
+
+
+def test_read_excel_streaming_matches_full_read(tmp_path):
+    path = str(tmp_path / "batches.xlsx")
+    rows = [
+        [f"公司{i}", ["制造业", "金融业", None][i % 3], i * 1.5, None if i % 4 else 7]
+        for i in range(11)
+    ]
+    _write_xlsx(
+        path, ["company_name", "industry", "独立董事比例", "小股东提案通过率"], rows
+    )
+
+    processor = ESGDataProcessor()
+    streamed = processor.read_excel_streaming(path, batch_size=3)
+    single = processor.read_excel_streaming(path, batch_size=1000)
+    pd.testing.assert_frame_equal(
+        streamed.astype({"company_name": str, "industry": object}),
+        single.astype({"company_name": str, "industry": object}),
+    )
+
+
+def test_load_data_file_reports_validation_problem(tmp_path):
+    path = str(tmp_path / "no_industry.xlsx")
+    _write_xlsx(path, ["company_name", "独立董事比例"], [["A", 1.0], ["B", 2.0]])
+
+    data, problem = ESGDataProcessor().load_data_file(path, batch_size=1)
+    assert problem is not None and "industry" in problem
+    assert len(data) == 2
@@ -0,0 +1,105 @@
+import os
+
+import pandas as pd
+import pytest
+
+from esg_export import ExportStore, StreamingExporter
+
+
+def _failing_chunks():
+    yield pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize("format_type", list(StreamingExporter.FORMATS))
+def test_export_round_trip(tmp_path, format_type):
+    exporter = StreamingExporter(chunk_rows=3)
+    data = pd.DataFrame({"a": range(10), "b": [f"公司{i}" for i in range(10)]})
+    path = str(tmp_path / f"out{exporter.suffix(format_type)}")
+    progress = []
+    exporter.export(
+        data, format_type, path, progress=lambda n, total: progress.append(n)
+    )
+
+    readers = {
+        "CSV": lambda p: pd.read_csv(p, encoding="utf-8-sig"),
+        "CSV.GZ": lambda p: pd.read_csv(p, encoding="utf-8-sig"),
+        "Parquet": pd.read_parquet,
+        "Feather": pd.read_feather,
+        "Excel": pd.read_excel,
+    }
+    pd.testing.assert_frame_equal(readers[format_type](path), data)
+    assert progress == [3, 6, 9, 10]
+
+
+@pytest.mark.parametrize("format_type", list(StreamingExporter.FORMATS))
+def test_failed_export_leaves_no_file(tmp_path, format_type):
+    exporter = StreamingExporter()
+    path = str(tmp_path / f"out{exporter.suffix(format_type)}")
+    with pytest.raises(RuntimeError):
+        exporter.export(_failing_chunks(), format_type, path)
+    assert not os.path.exists(path)
+
+
+def _write(content):
+    def writer(path):
+        with open(path, "wb") as f:
+            f.write(content)
+
+    return writer
+
+
+def _set_mtime(store, key, mtime):
+    entry_dir = os.path.join(store.root_dir, key)
+    for name in os.listdir(entry_dir):
+        os.utime(os.path.join(entry_dir, name), (mtime, mtime))
+
+
+def test_export_store_reuses_content_addressed_files(tmp_path):
+    store = ExportStore(str(tmp_path))
+    data = pd.DataFrame({"a": [1, 2]})
+    key = store.content_key(data, "CSV")
+    assert key == store.content_key(data.copy(), "CSV")
+    assert key != store.content_key(data, "Parquet")
+
+    calls = []
+
+    def writer(path):
+        calls.append(path)
+        _write(b"x")(path)
+
+    first = store.get_or_create(key, "out.csv", writer)
+    second = store.get_or_create(key, "out.csv", writer)
+    assert first == second and os.path.exists(first)
+    assert len(calls) == 1
+
+
+def test_export_store_evicts_least_recently_used(tmp_path):
+    store = ExportStore(str(tmp_path), max_bytes=250)
+    paths = {
+        key: store.get_or_create(key, f"{key}.bin", _write(b"x" * 100))
+        for key in ("a", "b")
+    }
+    _set_mtime(store, "a", 1000)
+    _set_mtime(store, "b", 2000)
+    # 访问a刷新其访问时间，b成为最久未使用的条目
+    assert store.get_or_create("a", "a.bin", _write(b"")) == paths["a"]
+
+    store.get_or_create("c", "c.bin", _write(b"x" * 100))
+    assert os.path.exists(paths["a"])
+    assert not os.path.exists(paths["b"])
+    assert os.path.exists(os.path.join(str(tmp_path), "c", "c.bin"))
+
+
+def test_export_store_expires_old_entries_but_keeps_new_file(tmp_path):
+    store = ExportStore(str(tmp_path), max_bytes=50, max_age=3600)
+    old = store.get_or_create("old", "old.bin", _write(b"x"))
+    _set_mtime(store, "old", 0)
+
+    # 新文件本身超过容量上限也不会被淘汰
+    new = store.get_or_create("new", "new.bin", _write(b"x" * 100))
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+    store.clear()
+    assert not os.path.exists(new)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from esg_data_utils import CompactLongData
+
+
+def _long_frame(seed=0, n_companies=30, n_indicators=12):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_companies):
+        industry = ["制造业", "金融业", "科技业"][i % 3]
+        for j in rng.choice(
+            n_indicators, size=rng.integers(1, n_indicators), replace=False
+        ):
+            rows.append(
+                (f"公司{i}", industry, "ESG"[j % 3], f"指标{j}", rng.uniform(0, 100))
+            )
+    data = pd.DataFrame(
+        rows, columns=["company_name", "industry", "category", "indicator", "value"]
+    )
+    # 重复单元格、缺失取值和缺失键
+    duplicates = data.sample(20, random_state=seed).assign(
+        value=lambda d: d["value"] + 10
+    )
+    data = pd.concat([data, duplicates], ignore_index=True)
+    data.loc[data.sample(15, random_state=seed + 1).index, "value"] = np.nan
+    data.loc[3, "industry"] = None
+    return data
+
+
+def test_pivot_matches_pivot_table():
+    data = _long_frame()
+    pivot = CompactLongData.from_frame(data).pivot()
+
+    valid = data.dropna(subset=["company_name", "industry", "indicator"])
+    expected = valid.pivot_table(
+        index=["company_name", "industry"],
+        columns="indicator",
+        values="value",
+        aggfunc="mean",
+    )
+    entities = pivot["entities"].astype(str)
+    actual = pd.DataFrame(
+        pivot["matrix"],
+        index=pd.MultiIndex.from_frame(entities),
+        columns=list(pivot["indicators"]),
+    )
+    # 取值按float32存储，比较时放宽精度
+    pd.testing.assert_frame_equal(
+        actual.sort_index().sort_index(axis=1),
+        expected.sort_index().sort_index(axis=1),
+        check_names=False,
+        rtol=1e-5,
+    )
+
+    observed = valid.dropna(subset=["value"])
+    cell_counts = observed.groupby(["company_name", "industry", "indicator"]).size()
+    assert pivot["duplicates"] == int((cell_counts > 1).sum())
+    assert pivot["missing"] == int(expected.isna().sum().sum())
+
+
+def test_from_wide_round_trip():
+    matrix = np.array([[1.0, np.nan, 3.0], [np.nan, 5.0, 6.0]], dtype=np.float32)
+    compact = CompactLongData.from_wide(
+        ["A", "B"], ["制造业", "金融业"], matrix, ["x", "y", "z"], ["E", "S", "G"]
+    )
+    assert len(compact) == 4
+    entities, wide = compact.to_wide()
+    assert entities["company_name"].astype(str).tolist() == ["A", "B"]
+    np.testing.assert_array_equal(wide, matrix)
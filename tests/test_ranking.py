@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_ranking import StreamingTopK, group_top_k, top_k
+
+
+def _stable_top(values, k, largest=True):
+    # 稳定全排序后取前k个，缺失值排在最后
+    values = np.asarray(values, dtype=np.float64)
+    return np.argsort(-values if largest else values, kind="stable")[:k]
+
+
+def _values(seed, n=200, missing=True):
+    rng = np.random.default_rng(seed)
+    # 取值范围小，产生大量并列
+    values = rng.integers(0, 10, n).astype(np.float64)
+    if missing:
+        values[rng.choice(n, n // 10, replace=False)] = np.nan
+    return values
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("largest", [True, False])
+@pytest.mark.parametrize("k", [0, 1, 5, 37, 180, 200, 250])
+def test_top_k_matches_stable_sort(seed, largest, k):
+    values = _values(seed)
+    np.testing.assert_array_equal(
+        top_k(values, k, largest), _stable_top(values, k, largest)
+    )
+
+
+def test_top_k_without_missing():
+    values = _values(3, missing=False)
+    for k in [1, 10, 199]:
+        np.testing.assert_array_equal(top_k(values, k), _stable_top(values, k))
+
+
+@pytest.mark.parametrize("largest", [True, False])
+def test_group_top_k_matches_stable_sort(largest):
+    values = _values(4)
+    groups = np.array(["能源", "金融", "科技"])[np.arange(len(values)) % 3]
+    result = group_top_k(values, groups, 7, largest)
+
+    assert sorted(result) == ["科技", "能源", "金融"]
+    for name, positions in result.items():
+        members = np.flatnonzero(groups == name)
+        expected = members[_stable_top(values[members], 7, largest)]
+        np.testing.assert_array_equal(positions, expected)
+
+
+def _frame(seed, n=300):
+    values = _values(seed, n)
+    return pd.DataFrame(
+        {
+            "公司名称": [f"公司{i}" for i in range(n)],
+            "行业": np.array(["能源", "金融", "科技"])[np.arange(n) % 3],
+            "ESG总分": values,
+        }
+    )
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 17, 300])
+@pytest.mark.parametrize("largest", [True, False])
+def test_streaming_top_k_matches_stable_sort(chunk_rows, largest):
+    data = _frame(5)
+    ranking = StreamingTopK(20, largest=largest)
+    for start in range(0, len(data), chunk_rows):
+        ranking.push(data.iloc[start : start + chunk_rows])
+    result = ranking.result()
+
+    expected = data.iloc[_stable_top(data["ESG总分"], 20, largest)]
+    assert result["排名"].tolist() == list(range(1, 21))
+    assert result["公司名称"].tolist() == expected["公司名称"].tolist()
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 300])
+def test_streaming_top_k_by_group(chunk_rows):
+    data = _frame(6)
+    ranking = StreamingTopK(5, by="行业")
+    for start in range(0, len(data), chunk_rows):
+        ranking.push(data.iloc[start : start + chunk_rows])
+    result = ranking.result()
+
+    for name, frame in result.groupby("行业", sort=False):
+        members = data[data["行业"] == name]
+        expected = members.iloc[_stable_top(members["ESG总分"], 5)]
+        assert frame["公司名称"].tolist() == expected["公司名称"].tolist()
+        assert frame["排名"].tolist() == [1, 2, 3, 4, 5]
+    assert result["行业"].unique().tolist() == ["科技", "能源", "金融"]
+
+
+def test_streaming_top_k_empty():
+    ranking = StreamingTopK(3)
+    ranking.push(pd.DataFrame())
+    assert ranking.result().columns.tolist() == ["排名"]
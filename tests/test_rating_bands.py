@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from esg_model import ESGModel, RatingBands
+
+
+def _scalar_interpretation(score):
+    # 原逐条判断的评分解释
+    if score >= 80:
+        return "优秀", "ESG表现卓越，可持续发展能力强"
+    elif score >= 60:
+        return "良好", "ESG表现较好，具备一定可持续发展能力"
+    elif score >= 40:
+        return "一般", "ESG表现中等，需要改进部分领域"
+    else:
+        return "较差", "ESG表现不佳，存在较大风险，需要全面改进"
+
+
+def _scores():
+    rng = np.random.default_rng(0)
+    # 阈值本身、阈值两侧、区间外和缺失值
+    edges = [39.999, 40, 40.001, 59.999, 60, 79.999, 80, 80.001, -5, 0, 100, 120]
+    return np.concatenate([rng.uniform(-10, 110, 500), edges, [np.nan]])
+
+
+def test_default_bands_match_scalar_interpretation():
+    model = ESGModel()
+    scores = _scores()
+    labels, descriptions = model.assign_ratings(scores)
+
+    for score, label, description in zip(scores, labels, descriptions):
+        expected = _scalar_interpretation(score)
+        assert (label, description) == expected
+        assert model.get_score_interpretation(score) == expected
+        assert model.get_score_interpretation(score, "科技") == expected
+
+
+def test_industry_thresholds():
+    bands = RatingBands(industry_thresholds={"能源": (30, 50, 70)})
+    scores = np.array([35.0, 35.0, 55.0, 55.0, 75.0, 75.0])
+    industries = ["能源", "科技", "能源", "科技", "能源", "科技"]
+
+    codes = bands.codes(scores, industries)
+    assert codes.tolist() == [1, 0, 2, 1, 3, 2]
+    labels, _ = bands.assign(scores, industries)
+    assert [
+        bands.interpret(score, industry)[0]
+        for score, industry in zip(scores, industries)
+    ] == labels.tolist()
+    # 未设置行业阈值时使用默认阈值
+    assert bands.codes(scores).tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_from_percentiles():
+    scores = np.arange(100, dtype=np.float64)
+    industries = np.where(scores < 50, "A", "B")
+    bands = RatingBands.from_percentiles(scores, industries=industries)
+
+    np.testing.assert_allclose(bands.thresholds, np.quantile(scores, (0.2, 0.5, 0.8)))
+    np.testing.assert_allclose(
+        bands.industry_thresholds["B"], np.quantile(scores[50:], (0.2, 0.5, 0.8))
+    )
+    # 各行业内部按分位分档，每档样本数接近分位比例
+    counts = np.bincount(bands.codes(scores, industries)[:50], minlength=4)
+    assert counts.tolist() == [10, 15, 15, 10]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"thresholds": (60, 40, 80)},
+        {"labels": ("差", "好")},
+        {"industry_thresholds": {"能源": (30, 50)}},
+    ],
+)
+def test_invalid_bands(kwargs):
+    with pytest.raises(ValueError):
+        RatingBands(**kwargs)
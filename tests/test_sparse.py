@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_data_utils import CompactLongData
+from esg_model import ESGModel
+from esg_sparse import SparseESGScorer, SparseIndicatorMatrix
+
+
+def _data(model, n=40, seed=0):
+    # 各维度取几个指标（含负向指标），并加入一个离群值以触发缩尾
+    columns = (
+        model.e_indicators[:4]
+        + ["碳排放总量", "单位营收能耗"]
+        + model.s_indicators[:4]
+        + model.g_indicators[:4]
+    )
+    columns = list(dict.fromkeys(columns))
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(rng.uniform(0, 100, (n, len(columns))), columns=columns)
+    data.iloc[-1, 2] = 500.0
+    return data
+
+
+@pytest.mark.parametrize("n", [1, 40])
+@pytest.mark.parametrize("industry", ["能源", "金融"])
+def test_fully_reported_matches_dense(n, industry):
+    # 全部单元格都已填报时，稀疏模式与稠密模式的结果一致
+    model = ESGModel()
+    data = _data(model, n)
+    dense = model.calculate_esg_score(data, industry)
+    sparse = model.calculate_esg_score(
+        SparseIndicatorMatrix.from_wide(data, model=model), industry
+    )
+
+    np.testing.assert_allclose(
+        sparse["processed_data"].matrix.toarray(),
+        dense["processed_data"].to_numpy(),
+        atol=1e-12,
+    )
+    np.testing.assert_allclose(sparse["weights"], dense["weights"], atol=1e-9)
+    for key in ["e_score", "s_score", "g_score", "base_score", "final_score"]:
+        np.testing.assert_allclose(
+            np.asarray(sparse[key]), np.asarray(dense[key]), atol=1e-9
+        )
+    np.testing.assert_allclose(sparse["coverage"], 1.0)
+
+
+def test_entropy_weights_match_dense():
+    model = ESGModel()
+    data = _data(model)
+    processed = model.preprocess_data(data)
+    np.testing.assert_allclose(
+        SparseESGScorer(model).entropy_weights(
+            SparseIndicatorMatrix.from_wide(processed, model=model)
+        ),
+        model.calculate_entropy_weights(processed),
+        atol=1e-12,
+    )
+
+
+def test_missing_cells_lower_coverage():
+    model = ESGModel()
+    data = _data(model)
+    data.iloc[0, 0] = np.nan
+    result = model.calculate_esg_score(
+        SparseIndicatorMatrix.from_wide(data, model=model), "能源"
+    )
+
+    coverage = result["coverage"]
+    assert coverage[0, 0] < 1.0
+    np.testing.assert_allclose(coverage[1:], 1.0)
+    np.testing.assert_allclose(coverage[0, 1:], 1.0)
+    assert np.isfinite(result["final_score"]).all()
+
+
+def test_long_and_wide_build_the_same_matrix():
+    model = ESGModel()
+    data = _data(model, n=6).astype(np.float32)
+    data.iloc[1, 3] = np.nan
+    pillars = model.indicator_pillars(data.columns)
+    categories = np.array(["E", "S", "G"])[pillars]
+    long_data = CompactLongData.from_wide(
+        [f"公司{i}" for i in range(len(data))],
+        ["制造业"] * len(data),
+        data.to_numpy(),
+        list(data.columns),
+        list(categories),
+    )
+
+    from_long = SparseIndicatorMatrix.from_long(long_data)
+    from_wide = SparseIndicatorMatrix.from_wide(data, model=model)
+    assert from_long.nnz == from_wide.nnz == data.notna().to_numpy().sum()
+    np.testing.assert_allclose(
+        from_long.matrix.toarray(), from_wide.matrix.toarray(), atol=1e-4
+    )
+    np.testing.assert_array_equal(from_long.pillars, from_wide.pillars)
+
+
+def test_pillars_from_column_prefixes():
+    frame = pd.DataFrame(
+        np.ones((2, 4)), columns=["E_碳强度", "社会:员工流失", "G-独立董事", "其他"]
+    )
+    assert SparseIndicatorMatrix.from_wide(frame).pillars.tolist() == [0, 1, 2, -1]
+    # 显式给出的类别优先于列名前缀
+    explicit = SparseIndicatorMatrix.from_wide(frame, categories={"其他": "治理"})
+    assert explicit.pillars.tolist() == [-1, -1, -1, 2]
+    with pytest.raises(ValueError):
+        SparseIndicatorMatrix.from_wide(frame, categories=["E"])
+
+
+def test_unresolved_pillars_raise():
+    model = ESGModel()
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame(
+        rng.uniform(0, 100, (10, 6)), columns=[f"vendor_{i}" for i in range(6)]
+    )
+    data = SparseIndicatorMatrix.from_wide(frame, model=model)
+    with pytest.raises(ValueError, match="vendor_0"):
+        model.calculate_esg_score(data, "能源")
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_analysis import WhatIfSession
+from esg_model import ESGModel
+from gradio_app import ESGGradioApp
+
+
+def _company(model, values):
+    columns = model.e_indicators[:5] + model.s_indicators[:5] + model.g_indicators[:5]
+    return pd.DataFrame([values[: len(columns)]], columns=columns)
+
+
+@pytest.mark.parametrize("events", [None, [{"type": "环境", "severity": 3}]])
+def test_session_matches_full_rescore(events):
+    model = ESGModel()
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, 15)
+    data = _company(model, values)
+    session = WhatIfSession(
+        model.calculate_esg_score(data, "制造", events=events), "制造", model
+    )
+
+    changes = {data.columns[0]: 95.0, data.columns[6]: 5.0, data.columns[12]: 60.0}
+    scores = session.update(changes)
+
+    changed = data.copy()
+    for name, value in changes.items():
+        changed[name] = value
+    expected = model.calculate_esg_score(changed, "制造", events=events)
+    assert scores["ESG总分"] == pytest.approx(float(expected["final_score"][0]))
+    assert scores["Base Score"] == pytest.approx(float(expected["base_score"][0]))
+    assert scores["E得分"] == pytest.approx(float(expected["e_score"][0]))
+    assert scores["G得分"] == pytest.approx(float(expected["g_score"][0]))
+
+    # 恢复到评分时的取值
+    assert session.reset() == session.baseline
+
+
+def test_app_whatif_matches_rescore():
+    app = ESGGradioApp(dataset_cache=False)
+    indicators = app.default_indicators
+    count = sum(len(names) for names in indicators.values())
+    values = [float(v) for v in range(10, 10 + count)]
+    app.create_manual_input_data("测试公司", "制造业", *values)
+    app.calculate_esg_scores(0.5, True)
+    session = app.whatif_session
+    assert session is not None
+
+    indicator = indicators["S"][1]
+    status = app.whatif_update(indicator, "测试公司", 80)
+    scores = session.scores()
+    assert f"{scores['ESG总分']:.2f}" in status
+    # 录入表单中的公司与会话不一致时不更新
+    assert "假设分析会话属于" in app.whatif_update(indicator, "别的公司", 0)
+
+    values[len(indicators["E"]) + 1] = 80.0
+    app.create_manual_input_data("测试公司", "制造业", *values)
+    app.calculate_esg_scores(0.5, True)
+    rescored = app.current_results.iloc[0]
+    # 结果表中的得分保留两位小数
+    assert round(scores["ESG总分"], 2) == pytest.approx(rescored["ESG总分"])
+    assert scores["评级"] == rescored["评级"]